@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 Test uchun 20 ta foydalanuvchi qo'shish skripti
+
+Katta hajmdagi ma'lumotlar uchun: python scripts/seed_data.py
 """
 import asyncio
 import sys
@@ -12,9 +14,8 @@ import random
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database.engine import session_maker
-from database.orm_query import orm_add_user
 from database.models import User, FunnelStatistic, Funnel
-from sqlalchemy import select
+from sqlalchemy import select, insert
 
 
 # Test foydalanuvchilar ma'lumotlari
@@ -47,32 +48,27 @@ async def add_test_users():
     print("🚀 Test foydalanuvchilarini qo'shish boshlandi...")
     
     async with session_maker() as session:
-        added_count = 0
+        # Mavjud foydalanuvchilarni bitta so'rov bilan tekshirish
+        test_user_ids = [user_data["user_id"] for user_data in TEST_USERS]
+        existing_query = select(User.user_id).where(User.user_id.in_(test_user_ids))
+        existing_ids = set((await session.execute(existing_query)).scalars().all())
         
         for user_data in TEST_USERS:
-            try:
-                # Foydalanuvchi mavjudligini tekshirish
-                query = select(User).where(User.user_id == user_data["user_id"])
-                result = await session.execute(query)
-                existing_user = result.scalar_one_or_none()
-                
-                if existing_user:
-                    print(f"⚠️  Foydalanuvchi {user_data['full_name']} ({user_data['user_id']}) allaqachon mavjud")
-                    continue
-                
-                # Yangi foydalanuvchi qo'shish
-                await orm_add_user(
-                    session=session,
-                    user_id=user_data["user_id"],
-                    full_name=user_data["full_name"],
-                    phone=user_data["phone"]
-                )
-                
-                added_count += 1
+            if user_data["user_id"] in existing_ids:
+                print(f"⚠️  Foydalanuvchi {user_data['full_name']} ({user_data['user_id']}) allaqachon mavjud")
+        
+        new_users = [user_data for user_data in TEST_USERS if user_data["user_id"] not in existing_ids]
+        added_count = 0
+        try:
+            # Yangi foydalanuvchilarni bitta batch INSERT bilan qo'shish
+            if new_users:
+                await session.execute(insert(User), new_users)
+                await session.commit()
+            added_count = len(new_users)
+            for user_data in new_users:
                 print(f"✅ Qo'shildi: {user_data['full_name']} ({user_data['user_id']})")
-                
-            except Exception as e:
-                print(f"❌ Xato: {user_data['full_name']} qo'shishda xato - {e}")
+        except Exception as e:
+            print(f"❌ Xato: foydalanuvchilarni qo'shishda xato - {e}")
     
     print(f"\n🎉 Jami {added_count} ta yangi foydalanuvchi qo'shildi!")
 
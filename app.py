@@ -3,7 +3,7 @@ import os
 import logging
 from datetime import datetime
 
-from aiogram import Bot, Dispatcher, types
+from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.bot import DefaultBotProperties
 from dotenv import find_dotenv, load_dotenv
@@ -17,65 +17,130 @@ logging.basicConfig(
 load_dotenv(find_dotenv())
 
 from middlewares.db import DataBaseSession
-from database.engine import create_db, session_maker
+from middlewares.inflight import InFlightMiddleware
+from common.rate_limit import RateLimitedSession, bulk_priority
+from middlewares.latency import (
+    LatencyMiddleware, HandlerNameMiddleware, ApiTimingMiddleware, setup_db_timing
+)
+from database.engine import create_db, session_maker, engine
+from database.user_upsert import user_upsert_buffer
 from handlers.user_private import user_private_router
 from handlers.admin_private import admin_router
 from handlers.admin_subscription import admin_subscription_router
 from services.subscription import SubscriptionService
 from services.scheduler import FreeLinkScheduler
+from services.analytics import AnalyticsService, FreeLinkAnalyticsService
+from services.metrics_server import start_metrics_server
+from services.bot_identity import bot_identity
+from services.free_link_bulk import FreeLinkBulkService
 
 from common.bot_cmds_list import private
+from common.admins import admin_registry
+from common.routing import include_routers
+from common.startup import StartupOrchestrator, sync_commands
+from common.tasks import SHUTDOWN_TIMEOUT, supervisor
+from common.jobs import jobs
 
 ALLOWED_UPDATES = ['message', 'edited_message', 'callback_query']
 
 bot = Bot(
     token=os.getenv('TOKEN'),
+    # Глобальный/по-чатовый rate limit и повтор при TelegramRetryAfter
+    session=RateLimitedSession(),
     default=DefaultBotProperties(
         parse_mode=ParseMode.HTML,
         protect_content=True
     )
 )
 
-# Загружаем список администраторов из переменных окружения
-admin_ids_str = os.getenv('ADMIN_IDS', '1210278389')
-bot.my_admins_list = [int(id.strip()) for id in admin_ids_str.split(',') if id.strip()]
-logging.info(f"Loaded admin IDs: {bot.my_admins_list}")
+# Загружаем список администраторов из переменных окружения (админы из базы - в on_startup)
+admin_registry.reload_from_env()
 
 dp = Dispatcher()
 
 # Подключаем роутеры - ВАЖНО: админские роутеры должны быть ПЕРВЫМИ!
-dp.include_router(admin_router)
-dp.include_router(admin_subscription_router)
-dp.include_router(user_private_router)  # пользовательский роутер последний
+# Они за AdminGateRouter: апдейты обычных пользователей их фильтры не проверяют
+include_routers(
+    dp,
+    admin_routers=[admin_router, admin_subscription_router],
+    user_routers=[user_private_router],  # пользовательский роутер последний
+)
+
+
+def setup_middlewares(dp: Dispatcher, bot: Bot) -> None:
+    """Подключение middleware (используется также нагрузочными тестами)"""
+    # Замер времени обработки апдейтов: общее, БД и Telegram API
+    dp.update.outer_middleware(LatencyMiddleware())
+    # Обрабатываемые update-ы дожидаемся при остановке (SHUTDOWN_TIMEOUT)
+    dp.update.outer_middleware(InFlightMiddleware())
+    dp.message.middleware(HandlerNameMiddleware())
+    dp.edited_message.middleware(HandlerNameMiddleware())
+    dp.callback_query.middleware(HandlerNameMiddleware())
+    bot.session.middleware(ApiTimingMiddleware())
+    setup_db_timing(engine)
+
+    # Подключаем middleware для работы с базой данных
+    dp.update.middleware(DataBaseSession(session_pool=session_maker))
+
+
+async def check_subscriptions():
+    """Проверка истекших подписок (ежечасная задача)"""
+    # Уведомления и кики планировщика идут в низкоприоритетной очереди
+    with bulk_priority():
+        async with session_maker() as session:
+            await SubscriptionService.check_and_expire_subscriptions(session, bot)
+
+
+async def refresh_analytics():
+    """Дневные сводки выручки/оттока/MRR и free link (ежечасно и по кнопке в админке)"""
+    async with session_maker() as session:
+        await AnalyticsService.refresh_daily_rollups(session)
+        await FreeLinkAnalyticsService.refresh_daily_rollups(session)
+
+
+def register_jobs():
+    """Периодические задачи: интервал с jitter, backoff при ошибках, статистика в /health"""
+    jobs.register('check_subscriptions', check_subscriptions, interval=3600)
+    jobs.register('analytics', refresh_analytics, interval=3600, retry=300)
+    jobs.register('free_links', lambda: FreeLinkScheduler.check_expired_free_links(bot), interval=3600, retry=300)
 
 
-async def check_subscriptions_task():
-    """Периодическая задача для проверки истекших подписок"""
-    while True:
-        try:
-            async with session_maker() as session:
-                await SubscriptionService.check_and_expire_subscriptions(session, bot)
-            await asyncio.sleep(3600)  # Проверяем каждый час
-        except Exception as e:
-            logging.error(f"Error in subscription check task: {e}")
-            await asyncio.sleep(3600)
+async def load_admins():
+    """Админы из ADMIN_IDS и таблицы admin"""
+    async with session_maker() as session:
+        await admin_registry.reload(session)
+
+
+async def start_metrics():
+    """Локальный endpoint метрик (METRICS_PORT)"""
+    dp['metrics_runner'] = await start_metrics_server()
 
 
 async def on_startup(bot):
     """Функция запуска бота"""
     logging.info("Bot starting...")
     
-    # Получаем информацию о боте
-    bot_info = await bot.get_me()
-    bot.username = bot_info.username
-    logging.info(f"Bot username: @{bot.username}")
-    
+    # Независимые шаги выполняются параллельно, время каждого - в логе и метрике bot_startup_step_seconds
+    startup = StartupOrchestrator()
+    # Удаляем вебхук (поллинг стартует после on_startup)
+    startup.step('delete_webhook', lambda: bot.delete_webhook(drop_pending_updates=True))
+    # Команды бота - только если список изменился
+    startup.step('set_commands', lambda: sync_commands(bot, private))
+    # Получаем информацию о боте один раз: username нужен для deep-link ссылок
+    startup.step('get_me', lambda: bot_identity.resolve(bot))
     # Создаем таблицы в базе данных
     # await drop_db()  # Раскомментировать для пересоздания БД
-    await create_db()
+    startup.step('create_db', create_db)
+    startup.step('load_admins', load_admins, after=('create_db',))
+    startup.step('metrics_server', start_metrics)
+    await startup.run()
+    logging.info(f"Bot username: @{bot_identity.username}")
     
-    # Запускаем задачу проверки подписок
-    asyncio.create_task(check_subscriptions_task())
+    # Дозаполняем invite-ссылки массово созданных free link (если бот перезапускался)
+    FreeLinkBulkService.schedule_invite_links(bot)
+    
+    # Запускаем периодические задачи (проверка подписок и free link)
+    jobs.start()
     
     logging.info("Bot started successfully!")
 
@@ -83,6 +148,26 @@ async def on_startup(bot):
 async def on_shutdown(bot):
     """Функция остановки бота"""
     logging.info("Bot shutting down...")
+    
+    # Поллинг уже остановлен: периодические задачи отменяем, обработку update-ов и
+    # фоновые рассылки ждем не дольше SHUTDOWN_TIMEOUT, остальное прерываем
+    report = await supervisor.shutdown(SHUTDOWN_TIMEOUT)
+    
+    # Дописываем накопленные upsert-ы пользователей
+    if user_upsert_buffer is not None:
+        await user_upsert_buffer.flush()
+    
+    metrics_runner = dp.workflow_data.get('metrics_runner')
+    if metrics_runner:
+        await metrics_runner.cleanup()
+    
+    # Закрываем соединения пула БД
+    await engine.dispose()
+    logging.info(
+        f"Shutdown complete: drained {len(report['drained'])}, "
+        f"interrupted {len(report['interrupted'])} {report['interrupted']}, "
+        f"cancelled {report['cancelled']}"
+    )
 
 
 async def main():
@@ -92,18 +177,10 @@ async def main():
         dp.startup.register(on_startup)
         dp.shutdown.register(on_shutdown)
 
-        # Подключаем middleware для работы с базой данных
-        dp.update.middleware(DataBaseSession(session_pool=session_maker))
+        # Подключаем middleware (метрики и сессия БД)
+        setup_middlewares(dp, bot)
 
-        # Удаляем вебхуки и начинаем поллинг
-        await bot.delete_webhook(drop_pending_updates=True)
-        
-        # Настраиваем команды бота
-        await bot.delete_my_commands(scope=types.BotCommandScopeAllPrivateChats())
-        await bot.set_my_commands(commands=private, scope=types.BotCommandScopeAllPrivateChats())
-        
-        # Schedulerni boshlash (background task)
-        scheduler_task = asyncio.create_task(FreeLinkScheduler.start_scheduler(bot))
+        register_jobs()
         
         logging.info("Starting polling...")
         await dp.start_polling(bot, allowed_updates=ALLOWED_UPDATES)
@@ -0,0 +1,79 @@
+import logging
+import os
+from typing import Iterator, Mapping
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.orm_query import orm_get_admins
+
+
+ROLE_OWNER = 'owner'
+ROLE_ADMIN = 'admin'
+ROLE_SUPPORT = 'support'
+ROLES = (ROLE_OWNER, ROLE_ADMIN, ROLE_SUPPORT)
+
+DEFAULT_ADMIN_IDS = '1210278389'
+
+
+def parse_admin_ids(value: str, default_role: str = ROLE_OWNER) -> dict[int, str]:
+    """'123,456:support' -> {123: 'owner', 456: 'support'}; noma'lum rol - yozuv o'tkazib yuboriladi"""
+    roles = {}
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        user_id, _, role = item.partition(':')
+        role = role.strip().lower() or default_role
+        if role not in ROLES:
+            # default_role ga tushirilmaydi: 'support' dagi xato owner huquqini berib qo'ymasligi uchun
+            logging.error(f"Unknown admin role in ADMIN_IDS: {item!r} (expected one of {', '.join(ROLES)})")
+            continue
+        try:
+            roles[int(user_id)] = role
+        except ValueError:
+            logging.error(f"Invalid admin id in ADMIN_IDS: {item!r}")
+    return roles
+
+
+class AdminRegistry:
+    """Adminlar: frozenset bo'yicha O(1) tekshiruv, restartsiz qayta yuklanadi"""
+
+    def __init__(self, roles: Mapping[int, str] | None = None) -> None:
+        self.ids: frozenset[int] = frozenset()
+        self.roles: dict[int, str] = {}
+        self.set(roles or {})
+
+    def set(self, roles: Mapping[int, str]) -> None:
+        # Yangi obyektlar bilan almashtiramiz - o'qiyotganlar hech qachon yarim yangilangan holatni ko'rmaydi
+        self.roles = dict(roles)
+        self.ids = frozenset(self.roles)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.ids
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted(self.ids))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def role(self, user_id: int) -> str | None:
+        return self.roles.get(user_id)
+
+    def has_role(self, user_id: int, *roles: str) -> bool:
+        return self.roles.get(user_id) in roles
+
+    def reload_from_env(self) -> None:
+        """Faqat ADMIN_IDS dan (baza hali tayyor bo'lmaganda)"""
+        self.set(parse_admin_ids(os.getenv('ADMIN_IDS', DEFAULT_ADMIN_IDS)))
+        logging.info(f"Loaded {len(self.ids)} admin(s) from ADMIN_IDS")
+
+    async def reload(self, session: AsyncSession) -> None:
+        """ADMIN_IDS + admin jadvali; ADMIN_IDS dagi rollar ustun"""
+        roles = await orm_get_admins(session)
+        roles.update(parse_admin_ids(os.getenv('ADMIN_IDS', DEFAULT_ADMIN_IDS)))
+        self.set(roles)
+        logging.info(f"Loaded {len(self.ids)} admin(s) from ADMIN_IDS and database")
+
+
+admin_registry = AdminRegistry()
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, Awaitable, Callable, Dict, List, Optional
+
+from common.tasks import TaskSupervisor, supervisor
+from database.locks import job_lock
+from services.metrics import Gauge, track_sweep
+
+
+class Job:
+    """Davriy vazifa va uning statistikasi"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable],
+        interval: float,
+        jitter: float = 0.1,
+        retry: float = 60,
+        max_backoff: Optional[float] = None,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.retry = retry
+        self.max_backoff = max_backoff if max_backoff is not None else interval
+        self.lock = asyncio.Lock()
+
+        self.created = time.time()
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.skipped = 0
+        self.held_elsewhere = 0
+        self.last_held_elsewhere: Optional[float] = None
+        self.last_started: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.next_run: Optional[float] = None
+
+    def next_delay(self) -> float:
+        """Keyingi ishga tushirishgacha: muvaffaqiyatda interval, xatoda retry * 2^n (max_backoff gacha)"""
+        if self.consecutive_failures:
+            delay = min(self.retry * 2 ** (self.consecutive_failures - 1), self.max_backoff)
+        else:
+            delay = self.interval
+        # Jitter: bir nechta nusxa yoki vazifa bir vaqtda bazaga tushmasligi uchun
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def is_healthy(self, now: Optional[float] = None) -> bool:
+        """Ketma-ket 3 xato yoki 2 intervaldan beri muvaffaqiyatli ishga tushmagan - nosog'lom"""
+        now = now or time.time()
+        if self.consecutive_failures >= 3:
+            return False
+        # Boshqa replika bajargan bo'lsa ham vazifa ishlayapti deb hisoblanadi
+        reference = max(self.last_success or 0, self.last_held_elsewhere or 0) or self.created
+        return now - reference <= self.interval * 2 + self.max_backoff
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, object]:
+        now = now or time.time()
+        return {
+            'healthy': self.is_healthy(now),
+            'running': self.lock.locked(),
+            'interval': self.interval,
+            'runs': self.runs,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'skipped': self.skipped,
+            'held_elsewhere': self.held_elsewhere,
+            'last_started': self.last_started,
+            'last_success': self.last_success,
+            'last_duration': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'last_error': self.last_error,
+            'next_run_in': round(max(self.next_run - now, 0), 1) if self.next_run else None,
+        }
+
+
+@asynccontextmanager
+async def local_lease(name: str):
+    """Bitta nusxa: lock har doim olinadi"""
+    yield True
+
+
+class JobRunner:
+    """Davriy vazifalar: jitter li interval, xatoda exponential backoff, bir vaqtda bitta ishga tushish
+
+    jobs.register('free_links', check_expired, interval=3600)
+    jobs.start()
+
+    lease(name) - replikalararo lock: False qaytarsa, vazifani boshqa replika bajaryapti.
+    """
+
+    def __init__(
+        self,
+        tasks: TaskSupervisor = supervisor,
+        lease: Callable[[str], AsyncContextManager[bool]] = local_lease,
+    ) -> None:
+        self.tasks = tasks
+        self.lease = lease
+        self.jobs: Dict[str, Job] = {}
+
+    def register(self, name: str, func: Callable[[], Awaitable], interval: float, **options) -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Job {name!r} already registered")
+        self.jobs[name] = Job(name, func, interval, **options)
+        return self.jobs[name]
+
+    def start(self) -> None:
+        """Har bir vazifa uchun tsikl (to'xtatishda TaskSupervisor bekor qiladi)"""
+        for job in self.jobs.values():
+            self.tasks.spawn(self._loop(job), name=f"job:{job.name}")
+
+    async def _loop(self, job: Job) -> None:
+        while True:
+            await self.run(job.name)
+            delay = job.next_delay()
+            job.next_run = time.time() + delay
+            await asyncio.sleep(delay)
+
+    async def run(self, name: str) -> bool:
+        """Vazifani bir marta bajarish; oldingi ishga tushirish hali tugamagan bo'lsa - o'tkazib yuboriladi"""
+        job = self.jobs[name]
+        if job.lock.locked():
+            job.skipped += 1
+            logging.warning(f"Job {name} is still running, skipping this run")
+            return False
+
+        async with job.lock:
+            try:
+                async with self.lease(name) as acquired:
+                    if not acquired:
+                        job.held_elsewhere += 1
+                        job.last_held_elsewhere = time.time()
+                        logging.info(f"Job {name} is held by another replica, skipping this run")
+                        return False
+                    job.runs += 1
+                    job.last_started = time.time()
+                    started = time.perf_counter()
+                    try:
+                        with track_sweep(name):
+                            await job.func()
+                    finally:
+                        job.last_duration = time.perf_counter() - started
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Lock olishdagi xatolar (masalan, baza ishlamayapti) ham backoff ga tushadi
+                job.failures += 1
+                job.consecutive_failures += 1
+                job.last_error = f"{type(e).__name__}: {e}"[:300]
+                logging.error(
+                    f"Job {name} failed ({job.consecutive_failures} in a row): {job.last_error}"
+                )
+            else:
+                job.consecutive_failures = 0
+                job.last_success = time.time()
+        return True
+
+    def unhealthy(self) -> List[str]:
+        now = time.time()
+        return [name for name, job in self.jobs.items() if not job.is_healthy(now)]
+
+    def snapshot(self) -> Dict[str, object]:
+        now = time.time()
+        return {
+            'status': 'degraded' if self.unhealthy() else 'ok',
+            'jobs': {name: job.snapshot(now) for name, job in self.jobs.items()},
+        }
+
+
+jobs = JobRunner(lease=job_lock)
+
+
+Gauge(
+    'scheduler_job_consecutive_failures', 'Consecutive failed runs of periodic jobs', ('job',),
+    collector=lambda: {(name,): job.consecutive_failures for name, job in jobs.jobs.items()}
+)
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from services.metrics import Gauge, telegram_api_retries_total
+
+
+# Telegram limitlari: https://core.telegram.org/bots/faq#my-bot-is-hitting-limits-how-do-i-avoid-this
+TG_GLOBAL_RATE = float(os.getenv('TG_GLOBAL_RATE', '30'))          # so'rov/soniya (barcha chatlar)
+TG_CHAT_RATE = float(os.getenv('TG_CHAT_RATE', '1'))              # xabar/soniya (bitta shaxsiy chat)
+TG_CHAT_BURST = int(os.getenv('TG_CHAT_BURST', '3'))              # shaxsiy chatda qisqa "burst"
+TG_GROUP_PER_MINUTE = float(os.getenv('TG_GROUP_PER_MINUTE', '20'))  # xabar/daqiqa (guruh/kanal)
+TG_MAX_RETRIES = int(os.getenv('TG_MAX_RETRIES', '3'))
+
+INTERACTIVE = 0
+BULK = 1
+_LANE_NAMES = {INTERACTIVE: 'interactive', BULK: 'bulk'}
+
+# Joriy task qaysi navbatda yuboradi (broadcast va schedulerlar - BULK)
+_priority: ContextVar[int] = ContextVar('telegram_send_priority', default=INTERACTIVE)
+
+send_queue_depth = Gauge(
+    'telegram_send_queue_depth', 'Requests waiting for the global rate limiter by lane', ('lane',)
+)
+
+
+@contextmanager
+def bulk_priority():
+    """Blok ichidagi (va undan yaratilgan task lardagi) so'rovlarni BULK navbatga o'tkazish"""
+    token = _priority.set(BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Token bucket: rate token/soniya, capacity - maksimal burst"""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Keyingi token gacha kutish vaqti"""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+    def reserve(self) -> float:
+        """Tokenni oldindan band qilish (qarzga), kutish kerak bo'lgan vaqtni qaytaradi"""
+        delay = self.delay()
+        self.tokens -= 1
+        return delay
+
+
+class PriorityRateLimiter:
+    """Global limiter: token bo'shaganda avval INTERACTIVE, keyin BULK navbat xizmat qiladi"""
+
+    def __init__(self, rate: float) -> None:
+        self.bucket = TokenBucket(rate, rate)
+        self._queues: Dict[int, Deque[asyncio.Future]] = {INTERACTIVE: deque(), BULK: deque()}
+        self._pump_task: Optional[asyncio.Task] = None
+
+    async def acquire(self, priority: int) -> None:
+        if not any(self._queues.values()) and self.bucket.delay() == 0:
+            self.bucket.take()
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self._queues[priority]
+        queue.append(waiter)
+        send_queue_depth.set(_LANE_NAMES[priority], value=len(queue))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        await waiter
+
+    def _next_queue(self) -> Optional[Deque[asyncio.Future]]:
+        for priority in (INTERACTIVE, BULK):
+            queue = self._queues[priority]
+            while queue and queue[0].done():  # bekor qilingan kutuvchilar
+                queue.popleft()
+            if queue:
+                return queue
+        return None
+
+    async def _pump(self) -> None:
+        while True:
+            queue = self._next_queue()
+            if queue is None:
+                for priority, name in _LANE_NAMES.items():
+                    send_queue_depth.set(name, value=0)
+                return
+            delay = self.bucket.delay()
+            if delay > 0:
+                # Uyg'ongandan keyin navbatlar qayta tanlanadi - yangi INTERACTIVE so'rov oldinga o'tadi
+                await asyncio.sleep(delay)
+                continue
+            self.bucket.take()
+            queue.popleft().set_result(None)
+            for priority, name in _LANE_NAMES.items():
+                send_queue_depth.set(name, value=len(self._queues[priority]))
+
+
+class TelegramRateLimiter:
+    """Global (30/s), shaxsiy chat (1/s) va guruh (20/min) limitlari"""
+
+    def __init__(
+        self,
+        global_rate: float = TG_GLOBAL_RATE,
+        chat_rate: float = TG_CHAT_RATE,
+        chat_burst: int = TG_CHAT_BURST,
+        group_per_minute: float = TG_GROUP_PER_MINUTE,
+        max_chats: int = 10000
+    ) -> None:
+        self.global_limiter = PriorityRateLimiter(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_per_minute / 60
+        self.max_chats = max_chats
+        self._chats: OrderedDict[object, TokenBucket] = OrderedDict()
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            if is_group:
+                bucket = TokenBucket(self.group_rate, 1)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chats[chat_id] = bucket
+            while len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket
+
+    async def acquire(self, method: TelegramMethod) -> None:
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            # getUpdates, getMe, answerCallbackQuery va h.k. - limitsiz
+            return
+
+        api_method = method.__api_method__
+        if api_method.startswith(('send', 'copy', 'forward')):
+            delay = self._chat_bucket(chat_id).reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        await self.global_limiter.acquire(_priority.get())
+
+
+class RateLimitedSession(AiohttpSession):
+    """Bot API so'rovlarini limitlar va TelegramRetryAfter qayta urinishlari bilan yuboradigan sessiya"""
+
+    def __init__(self, limiter: Optional[TelegramRateLimiter] = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.limiter = limiter or TelegramRateLimiter()
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: Optional[int] = None
+    ) -> TelegramType:
+        attempt = 0
+        while True:
+            await self.limiter.acquire(method)
+            try:
+                return await super().make_request(bot, method, timeout)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > TG_MAX_RETRIES:
+                    raise
+                telegram_api_retries_total.inc(method.__api_method__)
+                logging.warning(
+                    f"Flood control on {method.__api_method__}, retry {attempt} in {e.retry_after}s"
+                )
+                await asyncio.sleep(e.retry_after)
@@ -0,0 +1,149 @@
+import operator
+import os
+from collections import defaultdict
+from typing import Any
+
+from aiogram import Router
+from aiogram.dispatcher.event.bases import UNHANDLED, SkipHandler
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.event.telegram import TelegramEventObserver
+from aiogram.filters.callback_data import CallbackQueryFilter
+from aiogram.types import TelegramObject
+from magic_filter.operations import CallOperation, ComparatorOperation, GetAttributeOperation
+
+from common.admins import admin_registry
+
+
+# 0 - oddiy aiogram dispatch (taqqoslash va muammo bo'lsa o'chirish uchun). aiogram va magic_filter
+# ichki API si ishlatiladi: versiyalar requirements.txt da qotirilgan, tekshiruv - scripts/check_routing.py
+ROUTER_FAST_PATH = os.getenv('ROUTER_FAST_PATH', '1') != '0'
+
+
+class AdminGateRouter(Router):
+    """Admin routerlari uchun darvoza: admin bo'lmaganlar ichki routerlarga umuman kirmaydi
+
+    is_admin bir marta (frozenset bo'yicha) hisoblanadi va handlerlarga ham uzatiladi.
+    """
+
+    async def propagate_event(self, update_type: str, event: TelegramObject, **kwargs: Any) -> Any:
+        user = kwargs.get('event_from_user')
+        if user is None or user.id not in admin_registry.ids:
+            return UNHANDLED
+        kwargs['is_admin'] = True
+        return await super().propagate_event(update_type, event, **kwargs)
+
+
+def _callback_key(handler: HandlerObject) -> tuple[str, str] | None:
+    """Handler ning birinchi filtri bo'yicha kalit: ('exact', data) yoki ('prefix', prefix)"""
+    if not handler.filters:
+        return None
+    first = handler.filters[0]
+    if isinstance(first.callback, CallbackQueryFilter):
+        factory = first.callback.callback_data
+        return 'prefix', f"{factory.__prefix__}{factory.__separator__}"
+
+    # MagicFilter._operations - ichki API: topilmasa handler indekslanmaydi (har doim tekshiriladi)
+    operations = getattr(first.magic, '_operations', ()) if first.magic is not None else ()
+    if not operations or not isinstance(operations[0], GetAttributeOperation) or operations[0].name != 'data':
+        return None
+    # F.data == "..."
+    if (
+        len(operations) == 2 and isinstance(operations[1], ComparatorOperation)
+        and operations[1].comparator is operator.eq and isinstance(operations[1].right, str)
+    ):
+        return 'exact', operations[1].right
+    # F.data.startswith("...")
+    if (
+        len(operations) == 3 and isinstance(operations[1], GetAttributeOperation)
+        and operations[1].name == 'startswith' and isinstance(operations[2], CallOperation)
+        and len(operations[2].args) == 1 and isinstance(operations[2].args[0], str) and not operations[2].kwargs
+    ):
+        return 'prefix', operations[2].args[0]
+    return None
+
+
+class CallbackIndex:
+    """callback_data -> mos kelishi mumkin bo'lgan handlerlar (ro'yxatdan o'tish tartibida)"""
+
+    def __init__(self, handlers: list[HandlerObject]) -> None:
+        self.size = len(handlers)
+        self.exact: dict[str, list[int]] = defaultdict(list)
+        self.prefixes: dict[int, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
+        self.fallback: list[int] = []  # indekslab bo'lmaydigan filtrlar - har doim tekshiriladi
+
+        for position, handler in enumerate(handlers):
+            key = _callback_key(handler)
+            if key is None:
+                self.fallback.append(position)
+            elif key[0] == 'exact':
+                self.exact[key[1]].append(position)
+            else:
+                self.prefixes[len(key[1])][key[1]].append(position)
+        self.prefix_lengths = sorted(self.prefixes)
+
+    def candidates(self, data: str | None) -> list[int]:
+        if data is None:
+            return self.fallback
+        positions = list(self.fallback)
+        positions.extend(self.exact.get(data, ()))
+        # Prefikslar uzunligi bo'yicha guruhlangan: har bir uzunlik - bitta dict lookup
+        for length in self.prefix_lengths:
+            if length > len(data):
+                break
+            positions.extend(self.prefixes[length].get(data[:length], ()))
+        positions.sort()
+        return positions
+
+
+class IndexedCallbackObserver(TelegramEventObserver):
+    """callback_query handlerlarini F.data filtrlari bo'yicha indekslab, faqat mos keladiganlarini tekshiradi"""
+
+    _index: CallbackIndex | None = None
+
+    def index(self) -> CallbackIndex:
+        # Handlerlar import paytida ro'yxatdan o'tadi; yangilari qo'shilsa indeks qayta quriladi
+        if self._index is None or self._index.size != len(self.handlers):
+            self._index = CallbackIndex(self.handlers)
+        return self._index
+
+    async def trigger(self, event: TelegramObject, **kwargs: Any) -> Any:
+        if not ROUTER_FAST_PATH:
+            return await super().trigger(event, **kwargs)
+
+        handlers = self.handlers
+        for position in self.index().candidates(getattr(event, 'data', None)):
+            handler = handlers[position]
+            kwargs['handler'] = handler
+            result, data = await handler.check(event, **kwargs)
+            if result:
+                kwargs.update(data)
+                try:
+                    wrapped_inner = self.outer_middleware.wrap_middlewares(
+                        self._resolve_middlewares(),
+                        handler.call,
+                    )
+                    return await wrapped_inner(event, kwargs)
+                except SkipHandler:
+                    continue
+
+        return UNHANDLED
+
+
+class IndexedRouter(Router):
+    """callback_query uchun IndexedCallbackObserver ishlatadigan Router"""
+
+    def __init__(self, *, name: str | None = None) -> None:
+        super().__init__(name=name)
+        self.callback_query = IndexedCallbackObserver(router=self, event_name='callback_query')
+        self.observers['callback_query'] = self.callback_query
+
+
+def include_routers(dp: Router, admin_routers: list[Router], user_routers: list[Router]) -> None:
+    """Admin routerlari darvoza orqasida (ROUTER_FAST_PATH=0 bo'lsa - avvalgidek to'g'ridan-to'g'ri)"""
+    if ROUTER_FAST_PATH:
+        gate = AdminGateRouter(name='admin_gate')
+        gate.include_routers(*admin_routers)
+        dp.include_router(gate)
+    else:
+        dp.include_routers(*admin_routers)
+    dp.include_routers(*user_routers)
@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.types import BotCommand, BotCommandScopeAllPrivateChats
+
+from services.metrics import startup_step_seconds
+
+
+# Oxirgi o'rnatilgan buyruqlar ro'yxatining hash i (lokal fayl)
+BOT_COMMANDS_STATE = os.getenv('BOT_COMMANDS_STATE', '.bot_commands.hash')
+
+
+class StartupOrchestrator:
+    """Ishga tushirish bosqichlari: bir-biriga bog'liq bo'lmaganlari parallel bajariladi
+
+    orchestrator.step('create_db', create_db)
+    orchestrator.step('admins', load_admins, after=('create_db',))
+    await orchestrator.run()
+    """
+
+    def __init__(self) -> None:
+        self._steps: Dict[str, Tuple[Callable[[], Awaitable], Tuple[str, ...]]] = {}
+        self.durations: Dict[str, float] = {}
+
+    def step(self, name: str, func: Callable[[], Awaitable], after: Iterable[str] = ()) -> None:
+        after = tuple(after)
+        unknown = [dep for dep in after if dep not in self._steps]
+        if unknown:
+            raise ValueError(f"Startup step {name!r} depends on unknown steps {unknown}")
+        self._steps[name] = (func, after)
+
+    async def _run_step(self, name: str, tasks: Dict[str, asyncio.Task]) -> None:
+        func, after = self._steps[name]
+        if after:
+            await asyncio.gather(*(tasks[dep] for dep in after))
+        started = time.perf_counter()
+        try:
+            await func()
+        finally:
+            self.durations[name] = time.perf_counter() - started
+            startup_step_seconds.set(name, value=self.durations[name])
+
+    async def run(self) -> Dict[str, float]:
+        """Barcha bosqichlarni bajarish; birinchi xatolik qayta ko'tariladi, qolganlari bekor qilinadi"""
+        started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        for name in self._steps:
+            tasks[name] = asyncio.create_task(self._run_step(name, tasks), name=f"startup:{name}")
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            total = time.perf_counter() - started
+            startup_step_seconds.set('total', value=total)
+            breakdown = ', '.join(
+                f"{name} {seconds * 1000:.0f}ms"
+                for name, seconds in sorted(self.durations.items(), key=lambda item: -item[1])
+            )
+            logging.info(f"Startup finished in {total * 1000:.0f}ms ({breakdown})")
+        return self.durations
+
+
+def commands_hash(bot_id: int, commands: Iterable[BotCommand], scope) -> str:
+    payload = json.dumps({
+        'bot': bot_id,
+        'scope': scope.type,
+        'commands': [[command.command, command.description] for command in commands],
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def sync_commands(
+    bot: Bot,
+    commands: list[BotCommand],
+    scope=None,
+    state_path: Optional[str] = BOT_COMMANDS_STATE
+) -> bool:
+    """Buyruqlar o'zgargan bo'lsagina set_my_commands (hash lokal faylda saqlanadi)
+
+    set_my_commands ro'yxatni to'liq almashtiradi - oldindan delete_my_commands shart emas.
+    True - buyruqlar yangilandi.
+    """
+    scope = scope or BotCommandScopeAllPrivateChats()
+    digest = commands_hash(bot.id, commands, scope)
+    if state_path:
+        try:
+            with open(state_path, encoding='utf-8') as f:
+                if f.read().strip() == digest:
+                    logging.info("Bot commands unchanged, set_my_commands skipped")
+                    return False
+        except OSError:
+            pass
+
+    await bot.set_my_commands(commands=commands, scope=scope)
+    if state_path:
+        try:
+            with open(state_path, 'w', encoding='utf-8') as f:
+                f.write(digest)
+        except OSError as e:
+            logging.warning(f"Can't save bot commands hash to {state_path}: {e}")
+    return True
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import os
+from typing import Coroutine, Dict, List, Tuple
+
+
+# Deploy paytida ishlanayotgan update va fon vazifalarini kutish muddati (soniya)
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', '8'))
+
+
+class TaskSupervisor:
+    """Fon vazifalarini kuzatish va to'xtatishda ularni muddat ichida yakunlash
+
+    drain=True - to'xtatishda tugashi kutiladi (update lar, invite linklar, xabar yuborish);
+    drain=False - davriy tsikllar, darhol bekor qilinadi (keyingi startda qayta ishga tushadi).
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[asyncio.Task, Tuple[str, bool]] = {}
+        self.closing = False
+
+    def spawn(self, coro: Coroutine, name: str, drain: bool = False) -> asyncio.Task:
+        """asyncio.create_task + kuzatuv (task GC bo'lmaydi, xatolik log ga yoziladi)"""
+        task = asyncio.create_task(coro, name=name)
+        self._tasks[task] = (name, drain)
+        task.add_done_callback(self._done)
+        return task
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._tasks.pop(task, None)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Background task {task.get_name()} failed: {task.exception()!r}")
+
+    def enter(self, task: asyncio.Task, name: str) -> None:
+        """Boshqa joyda yaratilgan task ning bir qismini kuzatish (exit() bilan juft)"""
+        self._tasks[task] = (name, True)
+
+    def exit(self, task: asyncio.Task) -> None:
+        self._tasks.pop(task, None)
+
+    def active(self) -> List[str]:
+        return sorted(name for name, _ in self._tasks.values())
+
+    async def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT) -> Dict[str, List[str]]:
+        """Davriy vazifalarni bekor qilish, qolganlarini timeout gacha kutish, keyin bekor qilish"""
+        self.closing = True
+        current = asyncio.current_task()
+        tasks = {task: value for task, value in self._tasks.items() if task is not current}
+
+        periodic = [task for task, (_, drain) in tasks.items() if not drain]
+        for task in periodic:
+            task.cancel()
+
+        draining = [task for task, (_, drain) in tasks.items() if drain]
+        interrupted = []
+        if draining:
+            logging.info(f"Waiting up to {timeout:.0f}s for {len(draining)} task(s) to finish")
+            _, pending = await asyncio.wait(draining, timeout=timeout)
+            interrupted = [task for task in draining if task in pending]
+            for task in interrupted:
+                task.cancel()
+
+        await asyncio.gather(*periodic, *interrupted, return_exceptions=True)
+        report = {
+            'drained': sorted(tasks[task][0] for task in draining if task not in interrupted),
+            'interrupted': sorted(tasks[task][0] for task in interrupted),
+            'cancelled': sorted(tasks[task][0] for task in periodic),
+        }
+        if report['interrupted']:
+            logging.warning(f"Shutdown deadline reached, interrupted: {', '.join(report['interrupted'])}")
+        return report
+
+
+supervisor = TaskSupervisor()
@@ -1,4 +1,5 @@
 import os
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from database.models import Base
@@ -19,27 +20,63 @@ if not DATABASE_URL:
 is_postgresql = "postgresql" in DATABASE_URL.lower()
 is_sqlite = "sqlite" in DATABASE_URL.lower()
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    return value.lower() not in ('0', 'false', 'no', 'off')
+
+
+# SQL-лог (очень медленно на нагрузке - только для отладки)
+DB_ECHO = _env_bool('DB_ECHO', False)
+# Пул соединений: по умолчанию 10 + 20 для PostgreSQL, 5 + 10 (как в SQLAlchemy) для SQLite
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE') or (10 if is_postgresql else 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW') or (20 if is_postgresql else 10))
+# Сколько секунд ждать свободное соединение, прежде чем TimeoutError
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT') or 30)
+# Пересоздавать соединения старше N секунд (-1 - никогда); меньше idle-таймаута PgBouncer/LB
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE') or (1800 if is_postgresql else -1))
+DB_POOL_PRE_PING = _env_bool('DB_POOL_PRE_PING', is_postgresql)
+# Кэш prepared statements asyncpg на соединение (0 - выключен, нужно для PgBouncer transaction mode)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE') or 500)
+
+
+def engine_options(url: str, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW):
+    """URL и параметры create_async_engine из DB_* переменных (используется также бенчмарком пула)"""
+    options = {'echo': DB_ECHO}
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        options['connect_args'] = {"check_same_thread": False}
+        if url.database in (None, '', ':memory:'):
+            # In-memory SQLite живет в одном соединении (StaticPool) - пул не настраивается
+            return url, options
+
+    options.update(
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    if url.get_driver_name() == 'asyncpg':
+        # Кэш SQLAlchemy (prepared_statement_cache_size) и самого asyncpg (statement_cache_size)
+        # (значение в URL имеет приоритет над DB_STATEMENT_CACHE_SIZE)
+        cache_size = int(url.query.get('prepared_statement_cache_size', DB_STATEMENT_CACHE_SIZE))
+        url = url.update_query_dict({'prepared_statement_cache_size': str(cache_size)})
+        options['connect_args'] = {'statement_cache_size': cache_size}
+    return url, options
+
+
 if is_postgresql:
     print("🐘 Используется PostgreSQL")
-    # PostgreSQL специфичные настройки
-    engine = create_async_engine(
-        DATABASE_URL, 
-        echo=True,
-        pool_size=10,
-        max_overflow=20,
-        pool_pre_ping=True
-    )
 elif is_sqlite:
     print("📁 Используется SQLite")
-    # SQLite специфичные настройки
-    engine = create_async_engine(
-        DATABASE_URL, 
-        echo=True,
-        connect_args={"check_same_thread": False}
-    )
 else:
     print("❓ Неизвестный тип базы данных, используем стандартные настройки")
-    engine = create_async_engine(DATABASE_URL, echo=True)
+
+_url, _options = engine_options(DATABASE_URL)
+engine = create_async_engine(_url, **_options)
 
 # engine = create_async_engine(os.getenv('DB_URL'), echo=True)
 
@@ -0,0 +1,76 @@
+import hashlib
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import text
+
+from database.engine import engine, is_postgresql
+
+
+# Bir nechta replika ishlaganda davriy vazifalarni faqat bittasi bajaradi (0 - o'chirilgan)
+JOB_LOCKS = os.getenv('JOB_LOCKS', '1') not in ('0', 'false', 'no', '')
+# PostgreSQL bo'lmasa - fayl lock lar papkasi (replikalar bitta serverda, SQLite bilan)
+JOB_LOCK_DIR = os.getenv('JOB_LOCK_DIR', '.job_locks')
+
+
+def advisory_key(name: str) -> int:
+    """Vazifa nomidan barqaror bigint kalit (pg_advisory_lock uchun)"""
+    digest = hashlib.blake2b(f"funnel_bot:{name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+@asynccontextmanager
+async def _advisory_lock(name: str) -> AsyncIterator[bool]:
+    """pg_try_advisory_lock: lock ulanishga bog'langan - replika o'lsa PostgreSQL o'zi bo'shatadi"""
+    key = advisory_key(name)
+    async with engine.connect() as conn:
+        acquired = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {'key': key})
+        await conn.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                try:
+                    await conn.scalar(text("SELECT pg_advisory_unlock(:key)"), {'key': key})
+                    await conn.commit()
+                except Exception as e:
+                    # Ulanish pool ga lock bilan qaytmasligi kerak
+                    logging.error(f"Could not release job lock {name}: {e}")
+                    await conn.invalidate()
+
+
+@asynccontextmanager
+async def _file_lock(name: str) -> AsyncIterator[bool]:
+    """flock (LOCK_NB): jarayon tugasa OS o'zi bo'shatadi"""
+    try:
+        import fcntl
+    except ImportError:
+        # Windows: bitta nusxa deb hisoblaymiz
+        yield True
+        return
+
+    os.makedirs(JOB_LOCK_DIR, exist_ok=True)
+    with open(os.path.join(JOB_LOCK_DIR, f"{name}.lock"), 'a') as f:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@asynccontextmanager
+async def job_lock(name: str) -> AsyncIterator[bool]:
+    """Vazifa uchun replikalararo lock: True - shu replika bajaradi, False - boshqasi bajaryapti"""
+    if not JOB_LOCKS:
+        yield True
+        return
+
+    lock = _advisory_lock if is_postgresql else _file_lock
+    async with lock(name) as acquired:
+        yield acquired
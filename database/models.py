@@ -1,19 +1,17 @@
 import os
-from sqlalchemy import DateTime, ForeignKey, Numeric, String, Text, BigInteger, func, Boolean, Integer, JSON
+from sqlalchemy import Date, DateTime, ForeignKey, Numeric, String, Text, BigInteger, func, Boolean, Integer, JSON, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
-# PostgreSQL JSONB support
-try:
-    from sqlalchemy.dialects.postgresql import JSONB
-    database_url = os.getenv("DATABASE_URL", "")
-    if "postgresql" in database_url:
+# PostgreSQL JSONB support (postgresql dialecti faqat PostgreSQL da import qilinadi)
+JSON_TYPE = JSON
+if "postgresql" in os.getenv("DATABASE_URL", ""):
+    try:
+        from sqlalchemy.dialects.postgresql import JSONB
         JSON_TYPE = JSONB
-    else:
-        JSON_TYPE = JSON
-except ImportError:
-    JSON_TYPE = JSON
+    except ImportError:
+        pass
 
 
 class Base(DeclarativeBase):
@@ -110,7 +108,7 @@ class Subscription(Base):
     plan_id: Mapped[int] = mapped_column(ForeignKey('subscription_plan.id'))
     
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
-    expires_at: Mapped[datetime] = mapped_column(DateTime)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)  # sweep va analitika oynasi
     invite_link: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     payment_verified: Mapped[bool] = mapped_column(Boolean, default=False)
     
@@ -135,14 +133,15 @@ class FreeLink(Base):
     
     # Связи
     uses = relationship("FreeLinkUse", back_populates="free_link", cascade="all, delete-orphan")
+    rollups = relationship("FreeLinkDailyRollup", cascade="all, delete-orphan")
 
 
 class FreeLinkUse(Base):
     __tablename__ = 'free_link_use'
     
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    free_link_id: Mapped[int] = mapped_column(ForeignKey('free_link.id'))
-    user_id: Mapped[int] = mapped_column(BigInteger)
+    free_link_id: Mapped[int] = mapped_column(ForeignKey('free_link.id'), index=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, index=True)
     used_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
     expires_at: Mapped[datetime] = mapped_column(DateTime)
     is_expired: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -150,3 +149,38 @@ class FreeLinkUse(Base):
     # Связи
     free_link = relationship("FreeLink", back_populates="uses")
 
+
+
+class SubscriptionDailyRollup(Base):
+    __tablename__ = 'subscription_daily_rollup'
+    
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, unique=True)
+    revenue_usd: Mapped[float] = mapped_column(Numeric(12, 2), default=0)  # shu kuni to'langan obunalar
+    revenue_uzs: Mapped[int] = mapped_column(BigInteger, default=0)
+    new_paid: Mapped[int] = mapped_column(Integer, default=0)  # yangi to'langan obunalar soni
+    active_paying: Mapped[int] = mapped_column(Integer, default=0)  # faol to'lovchi foydalanuvchilar
+    churned: Mapped[int] = mapped_column(Integer, default=0)  # obunasi uzaytirilmay tugaganlar
+    mrr_usd: Mapped[float] = mapped_column(Numeric(12, 2), default=0)  # oylik takroriy daromad
+
+
+class FreeLinkDailyRollup(Base):
+    __tablename__ = 'free_link_daily_rollup'
+    __table_args__ = (UniqueConstraint('free_link_id', 'day'),)
+    
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    free_link_id: Mapped[int] = mapped_column(ForeignKey('free_link.id'), index=True)
+    day: Mapped[date] = mapped_column(Date)
+    redemptions: Mapped[int] = mapped_column(Integer, default=0)  # shu kuni link orqali kirishlar
+    new_users: Mapped[int] = mapped_column(Integer, default=0)  # birinchi marta shu link orqali kelganlar
+    converted: Mapped[int] = mapped_column(Integer, default=0)  # ulardan keyinchalik pullik obuna olganlar
+    revenue_usd: Mapped[float] = mapped_column(Numeric(12, 2), default=0)  # ularning to'langan obunalari
+    revenue_uzs: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class Admin(Base):
+    __tablename__ = 'admin'
+    
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, unique=True)
+    role: Mapped[str] = mapped_column(String(20), default='admin')  # owner / admin / support
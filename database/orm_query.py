@@ -1,15 +1,42 @@
+import asyncio
+import importlib
+import logging
 import math
-from sqlalchemy import select, update, delete, func
+
+from aiogram.exceptions import TelegramAPIError, TelegramNetworkError
+from sqlalchemy import select, update, delete, insert, func, case, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any, AsyncIterator, Callable, Sequence
 
 from database.models import (
     User, Funnel, FunnelStep, FunnelStatistic, 
     SubscriptionPlan, Subscription,
-    FreeLink, FreeLinkUse
+    FreeLink, FreeLinkUse,
+    SubscriptionDailyRollup, FreeLinkDailyRollup, Admin
 )
+from common.cache import TTLCache
+from database.user_cache import UserProfile, get_cached_profile, remember_user
+from common.rate_limit import bulk_priority
+
+
+# Admin ro'yxatlari uchun COUNT natijalari qisqa muddat keshlanadi
+_count_cache = TTLCache(ttl=60)
+_stats_cache = TTLCache(ttl=30)
+
+
+# INSERT ... ON CONFLICT qo'llab-quvvatlovchi dialectlar; modul engine tomonidan allaqachon yuklangan bo'ladi
+# (SQLite da postgresql dialectini import qilishga vaqt sarflanmaydi)
+_UPSERT_DIALECTS = ('postgresql', 'sqlite')
+
+
+def _dialect_insert(session: AsyncSession):
+    """Joriy dialect uchun insert() yoki None (ON CONFLICT qo'llab-quvvatlanmasa)"""
+    name = session.bind.dialect.name
+    if name not in _UPSERT_DIALECTS:
+        return None
+    return importlib.import_module(f'sqlalchemy.dialects.{name}').insert
 
 
 # User operations
@@ -19,19 +46,87 @@ async def orm_add_user(
     full_name: str | None = None,
     phone: str | None = None,
 ):
-    query = select(User).where(User.user_id == user_id)
-    result = await session.execute(query)
-    if result.first() is None:
-        session.add(
-            User(user_id=user_id, full_name=full_name, phone=phone)
-        )
-        await session.commit()
+    dialect_insert = _dialect_insert(session)
+    if dialect_insert is None:
+        query = select(User).where(User.user_id == user_id)
+        result = await session.execute(query)
+        if result.first() is None:
+            session.add(
+                User(user_id=user_id, full_name=full_name, phone=phone)
+            )
+            await session.commit()
+        return
+
+    query = dialect_insert(User).values(
+        user_id=user_id, full_name=full_name, phone=phone
+    ).on_conflict_do_nothing(index_elements=[User.user_id])
+    await session.execute(query)
+    await session.commit()
+
+
+async def orm_upsert_users(session: AsyncSession, users: list[dict]) -> list[User]:
+    """Foydalanuvchilarni bitta INSERT ... ON CONFLICT DO UPDATE ... RETURNING bilan qo'shish/yangilash
+
+    users: [{'user_id': ..., 'full_name': ...}]; mavjud telefon raqam saqlanib qoladi.
+    """
+    # Bir so'rovda bitta qator ikki marta yangilanishi mumkin emas (PostgreSQL)
+    rows = list({row['user_id']: {'phone': None, **row} for row in users}.values())
+    if not rows:
+        return []
+
+    dialect_insert = _dialect_insert(session)
+    if dialect_insert is None:
+        for row in rows:
+            await orm_add_user(session, row['user_id'], row.get('full_name'), row.get('phone'))
+        query = select(User).where(User.user_id.in_([row['user_id'] for row in rows]))
+        users = (await session.execute(query)).scalars().all()
+        for user in users:
+            remember_user(user)
+        return users
+
+    query = dialect_insert(User).values(rows)
+    query = query.on_conflict_do_update(
+        index_elements=[User.user_id],
+        set_={
+            'full_name': func.coalesce(query.excluded.full_name, User.full_name),
+            'phone': func.coalesce(query.excluded.phone, User.phone),
+            'updated': func.now(),
+        }
+    ).returning(User)
+    result = await session.scalars(query, execution_options={'populate_existing': True})
+    users = result.all()
+    await session.commit()
+    for user in users:
+        remember_user(user)
+    return users
+
+
+async def orm_upsert_user(
+    session: AsyncSession,
+    user_id: int,
+    full_name: str | None = None
+) -> User:
+    """/start uchun: foydalanuvchini qo'shish yoki yangilash va qatorini qaytarish"""
+    users = await orm_upsert_users(session, [{'user_id': user_id, 'full_name': full_name}])
+    return users[0]
 
 
 async def orm_get_user(session: AsyncSession, user_id: int) -> User | None:
     query = select(User).where(User.user_id == user_id)
     result = await session.execute(query)
-    return result.scalar_one_or_none()
+    user = result.scalar_one_or_none()
+    if user:
+        remember_user(user)
+    return user
+
+
+async def orm_get_user_profile(session: AsyncSession, user_id: int) -> UserProfile | None:
+    """Telefon tekshiruvi uchun profil: avval keshdan, bo'lmasa bazadan"""
+    profile = get_cached_profile(user_id)
+    if profile is not None:
+        return profile
+    user = await orm_get_user(session, user_id)
+    return remember_user(user) if user else None
 
 
 async def orm_get_user_by_id(session: AsyncSession, user_id: int) -> User | None:
@@ -55,6 +150,30 @@ async def orm_update_user_phone(session: AsyncSession, user_id: int, phone: str)
     if user:
         user.phone = phone
         await session.commit()
+        remember_user(user)
+
+
+async def orm_get_admins(session: AsyncSession) -> dict[int, str]:
+    """Bazadagi adminlar: {user_id: role}"""
+    result = await session.execute(select(Admin.user_id, Admin.role))
+    return {user_id: role for user_id, role in result.all()}
+
+
+async def orm_set_admin(session: AsyncSession, user_id: int, role: str):
+    """Admin qo'shish yoki rolini o'zgartirish"""
+    admin = await session.scalar(select(Admin).where(Admin.user_id == user_id))
+    if admin:
+        admin.role = role
+    else:
+        session.add(Admin(user_id=user_id, role=role))
+    await session.commit()
+
+
+async def orm_remove_admin(session: AsyncSession, user_id: int) -> bool:
+    """Adminni bazadan o'chirish"""
+    result = await session.execute(delete(Admin).where(Admin.user_id == user_id))
+    await session.commit()
+    return result.rowcount > 0
 
 
 async def orm_get_all_users(session: AsyncSession) -> list[User]:
@@ -122,7 +241,6 @@ async def orm_get_funnel_by_id(session: AsyncSession, funnel_id: int) -> Funnel
 async def orm_get_funnel_statistics(session: AsyncSession, funnel_id: int) -> Dict[str, Any]:
     """Получить статистику воронки"""
     try:
-        import logging
         logging.info(f"Getting stats for funnel_id: {funnel_id}")
         
         # Общее количество начавших воронку
@@ -157,7 +275,6 @@ async def orm_get_funnel_statistics(session: AsyncSession, funnel_id: int) -> Di
         logging.info(f"Final stats: {stats}")
         return stats
     except Exception as e:
-        import logging
         logging.error(f"Error in orm_get_funnel_statistics: {e}")
         return {
             'total_started': 0,
@@ -259,7 +376,6 @@ async def orm_update_funnel_step(
     stat = result.scalar_one_or_none()
     
     if not stat:
-        import logging
         logging.error(f"No active funnel statistic found for user {user_id}, funnel {funnel_id}")
         return False
     
@@ -281,7 +397,6 @@ async def orm_update_funnel_step(
             'view_time': 0,
             'completed': False
         }
-        import logging
         logging.info(f"Created new step {step_number} for user {user_id}")
     
     if view_time:
@@ -290,18 +405,15 @@ async def orm_update_funnel_step(
     # Отмечаем шаг как завершенный
     if mark_completed:
         current_stats[step_key]['completed'] = True
-        import logging
         logging.info(f"Marked step {step_number} as completed for user {user_id}")
     
     # ПОЛНОСТЬЮ ЗАМЕНЯЕМ JSON объект
     stat.step_statistics = current_stats
     
     # Принудительно помечаем объект как измененный
-    from sqlalchemy.orm import Session
     session.add(stat)
     await session.commit()
     
-    import logging
     logging.info(f"Updated step_statistics: {current_stats}")
     return True
 
@@ -356,6 +468,10 @@ async def orm_get_active_subscription_plans(session: AsyncSession) -> list[Subsc
     return result.scalars().all()
 
 
+async def orm_get_subscription_plan_by_id(session: AsyncSession, plan_id: int) -> SubscriptionPlan | None:
+    return await session.get(SubscriptionPlan, plan_id)
+
+
 async def orm_create_subscription(
     session: AsyncSession,
     user_id: int,
@@ -371,6 +487,7 @@ async def orm_create_subscription(
     )
     session.add(subscription)
     await session.commit()
+    _stats_cache.clear()
     await session.refresh(subscription)
     return subscription
 
@@ -388,6 +505,7 @@ async def orm_verify_payment(
     
     subscription.payment_verified = True
     await session.commit()
+    _stats_cache.clear()
     return True
 
 
@@ -404,6 +522,115 @@ async def orm_get_user_active_subscriptions(
     return result.unique().scalars().all()
 
 
+def _active_subscriptions_filters(
+    plan_id: int | None = None,
+    expiring_days: int | None = None,
+    unpaid: bool = False
+) -> list:
+    """Aktiv obunalar ro'yxati uchun WHERE shartlari"""
+    conditions = [Subscription.is_active == True]
+    if plan_id is not None:
+        conditions.append(Subscription.plan_id == plan_id)
+    if expiring_days is not None:
+        # Muddati o'tgan, lekin hali sweep qilinmagan obunalar "tugayotgan" emas
+        now = datetime.now()
+        conditions.append(Subscription.expires_at > now)
+        conditions.append(Subscription.expires_at <= now + timedelta(days=expiring_days))
+    if unpaid:
+        conditions.append(Subscription.payment_verified == False)
+    return conditions
+
+
+async def orm_get_active_subscriptions_page(
+    session: AsyncSession,
+    limit: int,
+    after_id: int | None = None,
+    before_id: int | None = None,
+    plan_id: int | None = None,
+    expiring_days: int | None = None,
+    unpaid: bool = False
+) -> list:
+    """Aktiv obunalarni keyset pagination bilan olish (id bo'yicha tartiblangan)"""
+    conditions = _active_subscriptions_filters(plan_id, expiring_days, unpaid)
+    query = select(
+        Subscription.id, Subscription.user_id, SubscriptionPlan.name,
+        SubscriptionPlan.price_usd, Subscription.expires_at, Subscription.payment_verified
+    ).join(SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id).where(*conditions)
+    
+    if before_id is not None:
+        # Oldingi sahifa: teskari tartibda olib, keyin qaytaramiz
+        query = query.where(Subscription.id < before_id).order_by(Subscription.id.desc()).limit(limit)
+        result = await session.execute(query)
+        return list(reversed(result.all()))
+    
+    if after_id is not None:
+        query = query.where(Subscription.id > after_id)
+    query = query.order_by(Subscription.id).limit(limit)
+    result = await session.execute(query)
+    return result.all()
+
+
+async def orm_count_active_subscriptions(
+    session: AsyncSession,
+    plan_id: int | None = None,
+    expiring_days: int | None = None,
+    unpaid: bool = False
+) -> int:
+    """Aktiv obunalar soni (qisqa muddat keshlanadi)"""
+    cache_key = ('active_subscriptions', plan_id, expiring_days, unpaid)
+    count = _count_cache.get(cache_key)
+    if count is None:
+        conditions = _active_subscriptions_filters(plan_id, expiring_days, unpaid)
+        query = select(func.count(Subscription.id)).where(*conditions)
+        count = await session.scalar(query) or 0
+        _count_cache.set(cache_key, count)
+    return count
+
+
+async def orm_get_subscription_stats(session: AsyncSession) -> Dict[str, Any]:
+    """Obunalar statistikasi va tariflar bo'yicha daromad - bitta aggregate so'rov bilan"""
+    stats = _stats_cache.get('subscription_stats')
+    if stats is not None:
+        return stats
+    
+    verified = Subscription.payment_verified == True
+    query = select(
+        SubscriptionPlan.id,
+        SubscriptionPlan.name,
+        func.count(Subscription.id),
+        func.coalesce(func.sum(case((Subscription.is_active == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((verified, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((verified, SubscriptionPlan.price_usd), else_=0)), 0),
+        func.coalesce(func.sum(case((verified, SubscriptionPlan.price_uzs), else_=0)), 0),
+    ).outerjoin(
+        Subscription, Subscription.plan_id == SubscriptionPlan.id
+    ).group_by(SubscriptionPlan.id, SubscriptionPlan.name).order_by(SubscriptionPlan.id)
+    result = await session.execute(query)
+    
+    plans = [
+        {
+            'plan_id': plan_id,
+            'name': name,
+            'total': total,
+            'active': active,
+            'verified': verified_count,
+            'revenue_usd': float(revenue_usd),
+            'revenue_uzs': int(revenue_uzs),
+        }
+        for plan_id, name, total, active, verified_count, revenue_usd, revenue_uzs in result.all()
+    ]
+    stats = {
+        'total': sum(p['total'] for p in plans),
+        'active': sum(p['active'] for p in plans),
+        'verified': sum(p['verified'] for p in plans),
+        'revenue_usd': sum(p['revenue_usd'] for p in plans),
+        'revenue_uzs': sum(p['revenue_uzs'] for p in plans),
+        'plans': plans,
+    }
+    _stats_cache.set('subscription_stats', stats)
+    return stats
+
+
 async def orm_expire_subscription(
     session: AsyncSession,
     subscription_id: int
@@ -417,9 +644,125 @@ async def orm_expire_subscription(
     
     subscription.is_active = False
     await session.commit()
+    _stats_cache.clear()
     return True
 
 
+# Analytics rollup operations
+async def orm_replace_subscription_rollups(session: AsyncSession, rows: list[dict], batch_size: int = 1000):
+    """Kunlik obuna rollup larini to'liq almashtirish (bitta tranzaksiyada)"""
+    await session.execute(delete(SubscriptionDailyRollup))
+    for i in range(0, len(rows), batch_size):
+        await session.execute(insert(SubscriptionDailyRollup), rows[i:i + batch_size])
+    await session.commit()
+
+
+async def orm_upsert_subscription_rollups(session: AsyncSession, rows: list[dict]):
+    """Berilgan kunlarning rollup larini yozish (mavjud kunlar yangilanadi)"""
+    if not rows:
+        return
+    dialect_insert = _dialect_insert(session)
+    if dialect_insert is None:
+        await session.execute(delete(SubscriptionDailyRollup).where(
+            SubscriptionDailyRollup.day.in_([row['day'] for row in rows])
+        ))
+        await session.execute(insert(SubscriptionDailyRollup), rows)
+    else:
+        query = dialect_insert(SubscriptionDailyRollup).values(rows)
+        query = query.on_conflict_do_update(
+            index_elements=[SubscriptionDailyRollup.day],
+            set_={
+                **{name: query.excluded[name] for name in rows[0] if name != 'day'},
+                'updated': func.now(),
+            }
+        )
+        await session.execute(query)
+    await session.commit()
+
+
+async def orm_get_last_subscription_rollup_day(session: AsyncSession) -> date | None:
+    """Rollup jadvalidagi oxirgi kun (bo'sh bo'lsa - None)"""
+    day = await session.scalar(select(func.max(SubscriptionDailyRollup.day)))
+    return date.fromisoformat(day) if isinstance(day, str) else day
+
+
+async def orm_get_subscription_rollups(session: AsyncSession, since: date) -> list[SubscriptionDailyRollup]:
+    """Berilgan kundan boshlab kunlik rollup lar"""
+    query = select(SubscriptionDailyRollup).where(
+        SubscriptionDailyRollup.day >= since
+    ).order_by(SubscriptionDailyRollup.day)
+    result = await session.execute(query)
+    return result.scalars().all()
+
+
+async def orm_replace_free_link_rollups(
+    session: AsyncSession,
+    rows: list[dict],
+    free_link_ids: Optional[Sequence[int]] = None,
+    batch_size: int = 1000
+):
+    """Free link kunlik rollup larini almashtirish (bitta tranzaksiyada)
+
+    free_link_ids berilsa - faqat shu link larning qatorlari, aks holda butun jadval.
+    """
+    query = delete(FreeLinkDailyRollup)
+    if free_link_ids is not None:
+        query = query.where(FreeLinkDailyRollup.free_link_id.in_(free_link_ids))
+    await session.execute(query)
+    for i in range(0, len(rows), batch_size):
+        await session.execute(insert(FreeLinkDailyRollup), rows[i:i + batch_size])
+    await session.commit()
+
+
+async def orm_get_free_link_rollups_refreshed_at(session: AsyncSession) -> Optional[datetime]:
+    """Free link rollup lari oxirgi marta yozilgan vaqt (jadval bo'sh bo'lsa - None)"""
+    return await session.scalar(select(func.max(FreeLinkDailyRollup.updated)))
+
+
+async def orm_get_changed_free_link_ids(session: AsyncSession, since: datetime) -> list[int]:
+    """Berilgan vaqtdan beri kirish bo'lgan yoki foydalanuvchisi to'lov qilgan free link lar"""
+    paid_users = select(Subscription.user_id).where(
+        Subscription.payment_verified == True,
+        or_(Subscription.created >= since, Subscription.updated >= since)
+    )
+    query = select(FreeLinkUse.free_link_id).where(
+        or_(FreeLinkUse.used_at >= since, FreeLinkUse.user_id.in_(paid_users))
+    ).distinct()
+    result = await session.execute(query)
+    return sorted(result.scalars().all())
+
+
+async def orm_get_free_link_rollups(session: AsyncSession, free_link_id: int, since: date) -> list[FreeLinkDailyRollup]:
+    """Free link uchun berilgan kundan boshlab kunlik rollup lar"""
+    query = select(FreeLinkDailyRollup).where(
+        FreeLinkDailyRollup.free_link_id == free_link_id,
+        FreeLinkDailyRollup.day >= since
+    ).order_by(FreeLinkDailyRollup.day)
+    result = await session.execute(query)
+    return result.scalars().all()
+
+
+async def orm_get_free_link_rollup_totals(session: AsyncSession, free_link_id: int) -> dict:
+    """Free link uchun butun davr yig'indilari va oxirgi hisoblangan vaqt"""
+    query = select(
+        func.coalesce(func.sum(FreeLinkDailyRollup.redemptions), 0),
+        func.coalesce(func.sum(FreeLinkDailyRollup.new_users), 0),
+        func.coalesce(func.sum(FreeLinkDailyRollup.converted), 0),
+        func.coalesce(func.sum(FreeLinkDailyRollup.revenue_usd), 0),
+        func.coalesce(func.sum(FreeLinkDailyRollup.revenue_uzs), 0),
+        func.max(FreeLinkDailyRollup.updated),
+    ).where(FreeLinkDailyRollup.free_link_id == free_link_id)
+    redemptions, new_users, converted, revenue_usd, revenue_uzs, refreshed_at = (await session.execute(query)).one()
+    return {
+        'redemptions': int(redemptions),
+        'new_users': int(new_users),
+        'converted': int(converted),
+        'revenue_usd': float(revenue_usd),
+        'revenue_uzs': int(revenue_uzs),
+        'refreshed_at': refreshed_at,
+    }
+
+
 # Broadcasting operations
 async def send_message_to_all_users(
     bot,
@@ -428,11 +771,14 @@ async def send_message_to_all_users(
     photo: str = None,
     video: str = None,
     document: str = None,
-    caption: str = None
+    caption: str = None,
+    on_start: Optional[Callable[[int], None]] = None,
+    on_result: Optional[Callable[[bool], None]] = None
 ):
+    """on_start(jami) va on_result(yuborildimi) - jarayonni kuzatish uchun (masalan, metrikalar)"""
     user_ids = await orm_get_all_users(session)
-    import asyncio
-    from aiogram.exceptions import TelegramAPIError, TelegramNetworkError
+    if on_start:
+        on_start(len(user_ids))
     tasks = []
     for user_id in user_ids:
         async def send(uid):
@@ -446,8 +792,15 @@ async def send_message_to_all_users(
                 elif text:
                     await bot.send_message(uid, text)
             except (TelegramAPIError, TelegramNetworkError):
-                pass  # bloklangan yoki xato bo'lsa, o'tkazib yuboriladi
-        tasks.append(asyncio.create_task(send(user_id)))
+                # bloklangan yoki xato bo'lsa, o'tkazib yuboriladi
+                if on_result:
+                    on_result(False)
+            else:
+                if on_result:
+                    on_result(True)
+        # Task lar BULK navbat kontekstida yaratiladi - interaktiv javoblar oldinda turadi
+        with bulk_priority():
+            tasks.append(asyncio.create_task(send(user_id)))
     await asyncio.gather(*tasks)
 
 
@@ -479,6 +832,65 @@ async def orm_create_free_link(
     return free_link
 
 
+async def orm_bulk_create_free_links(
+    session: AsyncSession,
+    rows: list[dict],
+    batch_size: int = 1000
+) -> list[tuple[int, str, str]]:
+    """Free linklarni batch INSERT ... ON CONFLICT (key) DO NOTHING bilan qo'shish, (id, key, name) qaytaradi
+
+    Band kalitlar o'tkazib yuboriladi - chaqiruvchi yetishmaganlarini qayta generatsiya qiladi.
+    """
+    dialect_insert = _dialect_insert(session)
+    created = []
+    for i in range(0, len(rows), batch_size):
+        chunk = rows[i:i + batch_size]
+        if dialect_insert is None:
+            taken = set((await session.scalars(
+                select(FreeLink.key).where(FreeLink.key.in_([row['key'] for row in chunk]))
+            )).all())
+            free_links = [FreeLink(**row) for row in chunk if row['key'] not in taken]
+            session.add_all(free_links)
+            await session.flush()
+            created += [(free_link.id, free_link.key, free_link.name) for free_link in free_links]
+        else:
+            query = dialect_insert(FreeLink).values(chunk).on_conflict_do_nothing(
+                index_elements=[FreeLink.key]
+            ).returning(FreeLink.id, FreeLink.key, FreeLink.name)
+            created += [tuple(row) for row in (await session.execute(query)).all()]
+    await session.commit()
+    return created
+
+
+async def orm_get_free_links_pending_invite(
+    session: AsyncSession,
+    after_id: int = 0,
+    limit: int = 200
+) -> list[tuple[int, str, str]]:
+    """Kanal invite linki hali yaratilmagan free linklar: (id, key, channel_id)"""
+    query = select(FreeLink.id, FreeLink.key, FreeLink.channel_id).where(
+        FreeLink.channel_invite_link == '',
+        FreeLink.id > after_id
+    ).order_by(FreeLink.id).limit(limit)
+    return [tuple(row) for row in (await session.execute(query)).all()]
+
+
+async def orm_set_free_link_invite_links(session: AsyncSession, invite_links: dict[int, str]):
+    """Free linklarga kanal invite linklarini yozish (bitta executemany)"""
+    if not invite_links:
+        return
+    await session.execute(
+        update(FreeLink),
+        [{'id': free_link_id, 'channel_invite_link': link} for free_link_id, link in invite_links.items()]
+    )
+    await session.commit()
+
+
+async def orm_get_free_link_by_id(session: AsyncSession, free_link_id: int) -> FreeLink | None:
+    """Freelink ni ID bo'yicha olish"""
+    return await session.get(FreeLink, free_link_id)
+
+
 async def orm_get_free_link_by_key(session: AsyncSession, key: str) -> FreeLink | None:
     """Freelink ni kalit bo'yicha olish"""
     query = select(FreeLink).where(
@@ -528,11 +940,10 @@ async def orm_use_free_link(
 
 async def orm_get_expired_free_link_uses(session: AsyncSession) -> list[FreeLinkUse]:
     """Muddati tugagan freelink ishlatishlarini olish"""
-    from datetime import datetime
     query = select(FreeLinkUse).where(
         FreeLinkUse.expires_at <= datetime.now(),
         FreeLinkUse.is_expired == False
-    )
+    ).options(joinedload(FreeLinkUse.free_link))
     result = await session.execute(query)
     return result.scalars().all()
 
@@ -554,6 +965,66 @@ async def orm_get_all_free_links(session: AsyncSession) -> list[FreeLink]:
     return result.scalars().all()
 
 
+def _free_links_filters(status: str | None = None, search: str | None = None) -> list:
+    """Free link ro'yxati filtrlari: active / inactive / exhausted va nom yoki kalit bo'yicha qidiruv"""
+    exhausted = (FreeLink.max_uses != -1) & (FreeLink.current_uses >= FreeLink.max_uses)
+    conditions = []
+    if status == 'active':
+        conditions += [FreeLink.is_active == True, ~exhausted]
+    elif status == 'inactive':
+        conditions.append(FreeLink.is_active == False)
+    elif status == 'exhausted':
+        conditions.append(exhausted)
+    if search:
+        pattern = '%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        conditions.append(or_(FreeLink.name.ilike(pattern, escape='\\'), FreeLink.key.ilike(pattern, escape='\\')))
+    return conditions
+
+
+async def orm_count_free_links(
+    session: AsyncSession,
+    status: str | None = None,
+    search: str | None = None
+) -> int:
+    """Filtr bo'yicha free linklar soni"""
+    query = select(func.count(FreeLink.id)).where(*_free_links_filters(status, search))
+    return await session.scalar(query) or 0
+
+
+async def orm_get_free_links_page(
+    session: AsyncSession,
+    limit: int,
+    offset: int = 0,
+    status: str | None = None,
+    search: str | None = None
+) -> list:
+    """Free linklar sahifasi: (FreeLink, redemptions, active_members) - bitta GROUP BY so'rov
+
+    Avval sahifadagi linklar tanlanadi, keyin faqat ularning FreeLinkUse yozuvlari agregatsiya qilinadi.
+    """
+    page = (
+        select(FreeLink.id)
+        .where(*_free_links_filters(status, search))
+        .order_by(FreeLink.id.desc())
+        .limit(limit)
+        .offset(offset)
+        .subquery()
+    )
+    query = (
+        select(
+            FreeLink,
+            func.count(FreeLinkUse.id).label('redemptions'),
+            func.count(FreeLinkUse.id).filter(FreeLinkUse.is_expired == False).label('active_members'),
+        )
+        .join(page, page.c.id == FreeLink.id)
+        .outerjoin(FreeLinkUse, FreeLinkUse.free_link_id == FreeLink.id)
+        .group_by(FreeLink.id)
+        .order_by(FreeLink.id.desc())
+    )
+    result = await session.execute(query)
+    return result.all()
+
+
 async def orm_delete_free_link(session: AsyncSession, free_link_id: int):
     """Freelink ni o'chirish (deaktivatsiya)"""
     query = select(FreeLink).where(FreeLink.id == free_link_id)
@@ -593,3 +1064,46 @@ async def orm_activate_free_link(session: AsyncSession, free_link_id: int):
         free_link.is_active = True
         await session.commit()
 
+
+
+# ===================== EXPORT OPERATIONS =====================
+
+async def _orm_stream_rows(session: AsyncSession, query, chunk_size: int) -> AsyncIterator[Sequence]:
+    """So'rov natijasini server-side cursor orqali chunk-chunk qaytarish"""
+    result = await session.stream(
+        query.execution_options(yield_per=chunk_size, stream_results=True)
+    )
+    async for partition in result.partitions():
+        yield partition
+
+
+async def orm_stream_users_rows(session: AsyncSession, chunk_size: int = 2000) -> AsyncIterator[Sequence]:
+    """Foydalanuvchilarni eksport uchun streaming"""
+    query = select(
+        User.user_id, User.full_name, User.phone, User.created, User.updated
+    ).order_by(User.id)
+    async for chunk in _orm_stream_rows(session, query, chunk_size):
+        yield chunk
+
+
+async def orm_stream_subscriptions_rows(session: AsyncSession, chunk_size: int = 2000) -> AsyncIterator[Sequence]:
+    """Obunalarni tarif ma'lumotlari bilan eksport uchun streaming"""
+    query = select(
+        Subscription.id, Subscription.user_id, SubscriptionPlan.name,
+        SubscriptionPlan.price_usd, SubscriptionPlan.price_uzs,
+        Subscription.is_active, Subscription.payment_verified,
+        Subscription.expires_at, Subscription.created
+    ).join(SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id).order_by(Subscription.id)
+    async for chunk in _orm_stream_rows(session, query, chunk_size):
+        yield chunk
+
+
+async def orm_stream_funnel_statistics_rows(session: AsyncSession, chunk_size: int = 2000) -> AsyncIterator[Sequence]:
+    """Funnel statistikasini eksport uchun streaming"""
+    query = select(
+        FunnelStatistic.id, FunnelStatistic.user_id, Funnel.key,
+        FunnelStatistic.current_step, FunnelStatistic.completed,
+        FunnelStatistic.started_at, FunnelStatistic.completed_at
+    ).join(Funnel, FunnelStatistic.funnel_id == Funnel.id).order_by(FunnelStatistic.id)
+    async for chunk in _orm_stream_rows(session, query, chunk_size):
+        yield chunk
@@ -0,0 +1,40 @@
+import os
+from typing import NamedTuple, Optional
+
+from common.cache import TTLCache
+from database.models import User
+from services.metrics import Gauge
+
+
+# Telefon tekshiruvi uchun foydalanuvchi profili keshi (LRU + TTL). Bot ichidagi barcha yozishlar
+# (orm_upsert_users, orm_update_user_phone) keshni yangilaydi; boshqa jarayondan o'zgartirish
+# (masalan, cleanup_test_users.py) bu keshga yetib bormaydi - USER_CACHE_TTL dan keyin ko'rinadi
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '50000'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '600'))
+
+
+class UserProfile(NamedTuple):
+    """Kirish nuqtalarida kerak bo'ladigan minimal ma'lumot"""
+    user_id: int
+    has_phone: bool
+    full_name: Optional[str]
+
+
+user_profile_cache = TTLCache(ttl=USER_CACHE_TTL, maxsize=USER_CACHE_SIZE)
+
+
+def remember_user(user: User) -> UserProfile:
+    """Bazadan o'qilgan/yozilgan foydalanuvchini keshga qo'yish"""
+    profile = UserProfile(user.user_id, bool(user.phone), user.full_name)
+    user_profile_cache.set(user.user_id, profile)
+    return profile
+
+
+def get_cached_profile(user_id: int) -> Optional[UserProfile]:
+    return user_profile_cache.get(user_id)
+
+
+Gauge(
+    'bot_user_cache', 'User profile cache state (size, hits, misses, evictions, hit_ratio)', ('stat',),
+    collector=lambda: {(name,): value for name, value in user_profile_cache.stats().items()}
+)
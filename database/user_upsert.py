@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.engine import session_maker
+from database.models import User
+from database.orm_query import orm_upsert_user, orm_upsert_users
+
+
+# /start upsert larini yig'ib yozish: 0 - o'chirilgan (har bir /start o'z so'rovi bilan)
+USER_UPSERT_BATCH_MS = float(os.getenv('USER_UPSERT_BATCH_MS', '0'))
+USER_UPSERT_BATCH_SIZE = int(os.getenv('USER_UPSERT_BATCH_SIZE', '200'))
+
+
+class UserUpsertBuffer:
+    """Micro-batching: delay_ms ichida kelgan upsert larni bitta INSERT ... ON CONFLICT ga birlashtirish"""
+
+    def __init__(self, session_pool: async_sessionmaker, delay_ms: float, max_size: int) -> None:
+        self.session_pool = session_pool
+        self.delay = delay_ms / 1000
+        self.max_size = max_size
+        self._pending: Dict[int, Tuple[dict, List[asyncio.Future]]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set[asyncio.Task] = set()
+
+    async def upsert(self, user_id: int, full_name: Optional[str]) -> User:
+        future = asyncio.get_running_loop().create_future()
+        entry = self._pending.get(user_id)
+        if entry:
+            entry[0]['full_name'] = full_name
+            entry[1].append(future)
+        else:
+            self._pending[user_id] = ({'user_id': user_id, 'full_name': full_name}, [future])
+
+        if len(self._pending) >= self.max_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.delay, self._start_flush)
+        return await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: Dict[int, Tuple[dict, List[asyncio.Future]]]) -> None:
+        try:
+            async with self.session_pool() as session:
+                users = await orm_upsert_users(session, [row for row, _ in batch.values()])
+        except Exception as e:
+            logging.error(f"Error flushing {len(batch)} user upserts: {e}")
+            for _, futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        by_id = {user.user_id: user for user in users}
+        for user_id, (_, futures) in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(by_id.get(user_id))
+
+    async def flush(self) -> None:
+        """Kutilayotgan barcha upsert larni darhol yozish (to'xtatishdan oldin)"""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+user_upsert_buffer = (
+    UserUpsertBuffer(session_maker, USER_UPSERT_BATCH_MS, USER_UPSERT_BATCH_SIZE)
+    if USER_UPSERT_BATCH_MS > 0 else None
+)
+
+
+async def upsert_user(session: AsyncSession, user_id: int, full_name: Optional[str]) -> User:
+    """/start: buffer yoqilgan bo'lsa u orqali, aks holda joriy sessiyada bitta so'rov bilan"""
+    if user_upsert_buffer is not None:
+        return await user_upsert_buffer.upsert(user_id, full_name)
+    return await orm_upsert_user(session, user_id, full_name)
@@ -1,6 +1,7 @@
 from aiogram.filters import Filter
-from aiogram import Bot, types
-import logging
+from aiogram import types
+
+from common.admins import admin_registry
 
 
 class ChatTypeFilter(Filter):
@@ -12,11 +13,13 @@ class ChatTypeFilter(Filter):
     
 
 class IsAdmin(Filter):
-    def __init__(self) -> None:
-        pass
+    """Admin (yoki ko'rsatilgan rollardan biri); oddiy foydalanuvchilar uchun bitta set tekshiruvi"""
+
+    def __init__(self, *roles: str) -> None:
+        self.roles = roles
 
-    async def __call__(self, message: types.Message, bot: Bot) -> bool:
-        user_id = message.from_user.id
-        is_admin = user_id in bot.my_admins_list
-        logging.info(f"IsAdmin filter: user_id={user_id}, admin_list={bot.my_admins_list}, is_admin={is_admin}")
-        return is_admin
\ No newline at end of file
+    async def __call__(self, event: types.TelegramObject) -> bool:
+        user = getattr(event, 'from_user', None)
+        if user is None or user.id not in admin_registry.ids:
+            return False
+        return not self.roles or admin_registry.has_role(user.id, *self.roles)
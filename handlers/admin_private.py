@@ -1,29 +1,52 @@
+import html
 import logging
 import os
 import json
 import re
+import time
 from datetime import datetime
 
 from aiogram.filters import CommandObject, Command, CommandStart
-from aiogram import F, Router, types
-from aiogram.types import Message, CallbackQuery
+from aiogram import F, types
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message, CallbackQuery, FSInputFile, BufferedInputFile, InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from sqlalchemy import select
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from filters.chat_types import ChatTypeFilter, IsAdmin
+from kbds.callbacks import (
+    FunnelCb, FunnelAction, UsersPageCb, UserProfileCb, SubsPageCb, ExportCb,
+    FreeLinkCb, FreeLinkAction, FreeLinkStatus, FreeLinksPageCb, MaxUsersCb, DurationCb
+)
+from common.routing import IndexedRouter
 from kbds.inline import (
     get_admin_menu_kb, get_funnel_creation_kb, get_admin_subscription_kb, 
     get_back_to_admin_menu_kb, get_broadcast_kb, get_users_list_kb, 
     get_user_profile_kb, get_funnels_list_kb, get_funnel_details_kb,
-    get_subscriptions_list_kb, get_subscription_details_kb, get_cancel_add_plan_kb,
+    get_subscriptions_list_kb, get_cancel_add_plan_kb,
     get_funnel_cancel_kb, get_funnel_content_kb,
-    get_free_links_menu_kb, get_free_links_list_kb, get_free_link_info_kb,
+    get_free_links_menu_kb, get_free_links_list_kb, get_free_link_info_kb, get_free_links_search_cancel_kb, get_free_link_analytics_kb,
     get_free_link_cancel_kb, get_max_users_selection_kb, get_duration_selection_kb,
-    get_delete_confirmation_kb
+    get_delete_confirmation_kb, get_export_menu_kb,
+    get_pagination_kb, get_subscriptions_filter_kb, get_revenue_kb
 )
 from services.subscription import SubscriptionService
+from services.export import ExportService, EXPORTS, EXPORT_FORMATS
+from services.analytics import AnalyticsService, FreeLinkAnalyticsService
+from services.metrics import latency_registry, broadcast_started, broadcast_result
+from services.bot_identity import bot_identity
+from services.free_link_bulk import FreeLinkBulkService, FREE_LINK_BULK_MAX
+from common.admins import admin_registry, ROLES, ROLE_ADMIN, ROLE_OWNER
+from common.jobs import jobs
+from common.tasks import supervisor
+from database.orm_query import orm_set_admin, orm_remove_admin
+
+
+# "Qayta hisoblash" tugmalari: analitika shundan tez-tez qayta hisoblanmaydi (soniya)
+ANALYTICS_REFRESH_COOLDOWN = int(os.getenv('ANALYTICS_REFRESH_COOLDOWN', '60'))
 
 
 def parse_duration_to_days(duration_text: str) -> int:
@@ -94,9 +117,14 @@ from database.orm_query import (
     orm_add_funnel_step,
     orm_create_subscription_plan,
     orm_get_active_subscription_plans,
-    orm_create_free_link, orm_get_all_free_links, orm_get_free_link_by_key,
-    orm_delete_free_link, orm_permanent_delete_free_link, orm_deactivate_free_link, orm_activate_free_link
+    orm_get_active_subscriptions_page,
+    orm_count_active_subscriptions,
+    orm_get_subscription_stats,
+    orm_create_free_link, orm_get_free_links_page, orm_count_free_links, orm_get_free_link_by_key, orm_get_free_link_by_id,
+    orm_permanent_delete_free_link, orm_deactivate_free_link,
+    orm_add_user, orm_get_user_by_id, orm_get_funnel_by_id, orm_get_funnel_statistics, orm_delete_funnel
 )
+from database.models import Funnel, FunnelStep, FreeLink
 
 
 class BroadcastStates(StatesGroup):
@@ -128,8 +156,14 @@ class FreeLinkStates(StatesGroup):
     waiting_for_duration_days = State()
 
 
-admin_router = Router()
+class FreeLinkSearchStates(StatesGroup):
+    waiting_for_query = State()
+
+
+admin_router = IndexedRouter(name="admin")
 admin_router.message.filter(ChatTypeFilter(["private"]), IsAdmin())
+# Admin tugmalari faqat adminlar uchun (callback_data ni qo'lda yuborib bo'lmasin)
+admin_router.callback_query.filter(IsAdmin())
 
 
 @admin_router.message(Command("admin"))
@@ -147,7 +181,6 @@ async def admin_start_cmd(message: Message, session: AsyncSession):
     """Admin /start handler"""
     try:
         # Добавляем админа в базу данных
-        from database.orm_query import orm_add_user
         await orm_add_user(
             session=session,
             user_id=message.from_user.id,
@@ -253,65 +286,16 @@ async def show_users_page(message, session: AsyncSession, users: list = None, pa
             text += f"📅 Ro'yxat: {user.created.strftime('%d.%m.%Y')}\n"
             text += f"⏰ Oxirgi: {user.updated.strftime('%d.%m.%Y')}\n\n"
         
-        # Create pagination keyboard
-        from aiogram.types import InlineKeyboardButton
-        from aiogram.utils.keyboard import InlineKeyboardBuilder
-        
-        builder = InlineKeyboardBuilder()
-        
-        # Page numbers navigation (like website pagination)
-        if total_pages > 1:
-            # Show first page if not on first page and there are more than 3 pages
-            if page > 0 and total_pages > 3:
-                builder.add(InlineKeyboardButton(text="1", callback_data="users_page:0"))
-                if page > 2:
-                    builder.add(InlineKeyboardButton(text="...", callback_data="noop"))
-            
-            # Show current page and adjacent pages
-            start_page = max(0, page - 1)
-            end_page = min(total_pages, page + 2)
-            
-            for p in range(start_page, end_page):
-                if p == page:
-                    # Current page (highlighted)
-                    builder.add(InlineKeyboardButton(text=f"• {p + 1} •", callback_data="noop"))
-                else:
-                    builder.add(InlineKeyboardButton(text=str(p + 1), callback_data=f"users_page:{p}"))
-            
-            # Show last page if not on last page and there are more than 3 pages
-            if page < total_pages - 1 and total_pages > 3:
-                if page < total_pages - 3:
-                    builder.add(InlineKeyboardButton(text="...", callback_data="noop"))
-                builder.add(InlineKeyboardButton(text=str(total_pages), callback_data=f"users_page:{total_pages-1}"))
-        
-        # Add a row separator
-        if total_pages > 1:
-            builder.row()
-        
-        # Navigation buttons
-        if page > 0:
-            builder.add(InlineKeyboardButton(
-                text="⬅️ Oldingi",
-                callback_data=f"users_page:{page-1}"
-            ))
-        
-        if page < total_pages - 1:
-            builder.add(InlineKeyboardButton(
-                text="Keyingi ➡️",
-                callback_data=f"users_page:{page+1}"
-            ))
-        
-        # Back button
-        builder.row()
-        builder.add(InlineKeyboardButton(
-            text="🔙 Orqaga",
-            callback_data="back_to_admin_menu"
-        ))
+        keyboard = get_pagination_kb(
+            page,
+            total_pages,
+            page_callback=lambda p: UsersPageCb(page=p).pack()
+        )
         
         if edit:
-            await message.edit_text(text, reply_markup=builder.as_markup())
+            await message.edit_text(text, reply_markup=keyboard)
         else:
-            await message.answer(text, reply_markup=builder.as_markup())
+            await message.answer(text, reply_markup=keyboard)
             
     except Exception as e:
         logging.error(f"Error showing users page: {e}")
@@ -349,7 +333,6 @@ async def funnel_create_start_callback(callback: CallbackQuery, state: FSMContex
 async def funnels_list_callback(callback: CallbackQuery, session: AsyncSession):
     """Funnel ro'yxati"""
     try:
-        from database.orm_query import select, Funnel
         
         query = select(Funnel).where(Funnel.is_active == True)
         result = await session.execute(query)
@@ -369,12 +352,11 @@ async def funnels_list_callback(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("❌ Funnellar ro'yxatini olishda xatolik")
 
 
-@admin_router.callback_query(F.data.startswith("funnel_details:"))
-async def funnel_details_handler(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FunnelCb.filter(F.action == FunnelAction.details))
+async def funnel_details_handler(callback: CallbackQuery, callback_data: FunnelCb, session: AsyncSession):
     """Funnel tafsilotlari"""
     try:
-        funnel_id = int(callback.data.split(":")[1])
-        from database.orm_query import select, Funnel
+        funnel_id = callback_data.funnel_id
         
         query = select(Funnel).where(Funnel.id == funnel_id)
         result = await session.execute(query)
@@ -382,16 +364,13 @@ async def funnel_details_handler(callback: CallbackQuery, session: AsyncSession)
         
         if funnel:
             description = funnel.description or "Yo'q"
-            bot_username = getattr(callback.bot, 'username', 'your_bot')
             text = f"🎯 <b>{funnel.name}</b>\n\n"
             text += f"🔑 Kalit: <code>{funnel.key}</code>\n"
             text += f"📝 Tavsif: {description}\n"
             text += f"📅 Yaratilgan: {funnel.created.strftime('%d.%m.%Y %H:%M')}\n"
-            text += f"🔗 Link: <code>https://t.me/{bot_username}?start={funnel.key}</code>\n"
+            text += f"🔗 Link: <code>{bot_identity.deep_link(funnel.key)}</code>\n"
             
             # Qadamlar soni
-            from database.orm_query import func
-            from database.models import FunnelStep
             steps_query = select(func.count()).select_from(FunnelStep).where(FunnelStep.funnel_id == funnel.id)
             steps_result = await session.execute(steps_query)
             steps_count = steps_result.scalar() or 0
@@ -412,14 +391,13 @@ async def funnel_details_handler(callback: CallbackQuery, session: AsyncSession)
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("funnel_stats:"))
-async def funnel_stats_handler(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FunnelCb.filter(F.action == FunnelAction.stats))
+async def funnel_stats_handler(callback: CallbackQuery, callback_data: FunnelCb, session: AsyncSession):
     """Показать статистику воронки"""
     try:
-        funnel_id = int(callback.data.split(":")[1])
+        funnel_id = callback_data.funnel_id
         
         # Получаем воронку
-        from database.orm_query import orm_get_funnel_by_id, orm_get_funnel_statistics
         funnel = await orm_get_funnel_by_id(session, funnel_id)
         if not funnel:
             await callback.answer("❌ Funnel topilmadi")
@@ -450,14 +428,13 @@ async def funnel_stats_handler(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("funnel_edit:"))
-async def funnel_edit_handler(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FunnelCb.filter(F.action == FunnelAction.edit))
+async def funnel_edit_handler(callback: CallbackQuery, callback_data: FunnelCb, session: AsyncSession):
     """Tahrirlash voronka"""
     try:
-        funnel_id = int(callback.data.split(":")[1])
+        funnel_id = callback_data.funnel_id
         
         # Получаем воронку
-        from database.orm_query import orm_get_funnel_by_id
         funnel = await orm_get_funnel_by_id(session, funnel_id)
         if not funnel:
             await callback.answer("❌ Funnel topilmadi")
@@ -482,31 +459,28 @@ async def funnel_edit_handler(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("funnel_delete:"))
-async def funnel_delete_handler(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FunnelCb.filter(F.action == FunnelAction.delete))
+async def funnel_delete_handler(callback: CallbackQuery, callback_data: FunnelCb, session: AsyncSession):
     """O'chirish voronka"""
     try:
-        funnel_id = int(callback.data.split(":")[1])
+        funnel_id = callback_data.funnel_id
         
         # Получаем воронку
-        from database.orm_query import orm_get_funnel_by_id
         funnel = await orm_get_funnel_by_id(session, funnel_id)
         if not funnel:
             await callback.answer("❌ Funnel topilmadi")
             return
         
         # Создаем клавиатуру подтверждения
-        from aiogram.types import InlineKeyboardButton
-        from aiogram.utils.keyboard import InlineKeyboardBuilder
         
         builder = InlineKeyboardBuilder()
         builder.add(InlineKeyboardButton(
             text="✅ Ha, o'chirish",
-            callback_data=f"confirm_funnel_delete:{funnel_id}"
+            callback_data=FunnelCb(action=FunnelAction.confirm_delete, funnel_id=funnel_id).pack()
         ))
         builder.add(InlineKeyboardButton(
             text="❌ Bekor qilish",
-            callback_data=f"funnel_details:{funnel_id}"
+            callback_data=FunnelCb(action=FunnelAction.details, funnel_id=funnel_id).pack()
         ))
         builder.adjust(1)
         
@@ -527,14 +501,13 @@ async def funnel_delete_handler(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("confirm_funnel_delete:"))
-async def confirm_funnel_delete_handler(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FunnelCb.filter(F.action == FunnelAction.confirm_delete))
+async def confirm_funnel_delete_handler(callback: CallbackQuery, callback_data: FunnelCb, session: AsyncSession):
     """Tasdiqlash voronka o'chirish"""
     try:
-        funnel_id = int(callback.data.split(":")[1])
+        funnel_id = callback_data.funnel_id
         
         # O'chirish funksiyasini chaqirish
-        from database.orm_query import orm_delete_funnel
         success = await orm_delete_funnel(session, funnel_id)
         
         if success:
@@ -563,42 +536,101 @@ async def subscription_plans_menu_callback(callback: CallbackQuery):
     await callback.answer()
 
 
+SUBSCRIPTIONS_PER_PAGE = 15
+
+
+def parse_subscriptions_filter(code: str) -> dict:
+    """Filtr kodini orm parametrlariga aylantirish: all, p<plan_id>, e<kun>, u"""
+    if code.startswith("p") and code[1:].isdigit():
+        return {"plan_id": int(code[1:])}
+    if code.startswith("e") and code[1:].isdigit():
+        return {"expiring_days": int(code[1:])}
+    if code == "u":
+        return {"unpaid": True}
+    return {}
+
+
+async def show_subscriptions_page(
+    message,
+    session: AsyncSession,
+    filter_code: str = "all",
+    after_id: int | None = None,
+    before_id: int | None = None,
+    page: int = 0,
+    edit: bool = False
+):
+    """Aktiv obunalarni sahifa bo'lib ko'rsatish (keyset pagination)"""
+    filters = parse_subscriptions_filter(filter_code)
+    total = await orm_count_active_subscriptions(session, **filters)
+    rows = await orm_get_active_subscriptions_page(
+        session,
+        limit=SUBSCRIPTIONS_PER_PAGE,
+        after_id=after_id,
+        before_id=before_id,
+        **filters
+    )
+    total_pages = max(1, (total + SUBSCRIPTIONS_PER_PAGE - 1) // SUBSCRIPTIONS_PER_PAGE)
+    page = min(max(page, 0), total_pages - 1)
+    
+    if not rows:
+        text = "🚫 Hech qanday aktiv obuna topilmadi."
+    else:
+        text = f"📋 <b>Aktiv obunalar ({total}):</b>\n"
+        text += f"📄 Sahifa: <b>{page + 1}</b> / <b>{total_pages}</b>\n\n"
+        
+        for sub_id, user_id, plan_name, price_usd, expires_at, payment_verified in rows:
+            text += f"🆔 #{sub_id} 👤 User: {user_id}\n"
+            text += f"📋 Tarif: {plan_name} (${price_usd})\n"
+            text += f"⏱ Tugash: {expires_at.strftime('%d.%m.%Y %H:%M')}\n"
+            text += f"✅ To'langan: {'Ha' if payment_verified else 'Yoq'}\n\n"
+    
+    plans = await orm_get_active_subscription_plans(session)
+    builder = get_subscriptions_filter_kb(filter_code, plans)
+    keyboard = get_pagination_kb(
+        page,
+        total_pages,
+        prev_callback=SubsPageCb(code=filter_code, direction="p", cursor=rows[0][0], page=page - 1).pack() if rows and page > 0 else None,
+        next_callback=SubsPageCb(code=filter_code, direction="n", cursor=rows[-1][0], page=page + 1).pack() if rows and page < total_pages - 1 else None,
+        builder=builder
+    )
+    
+    if edit:
+        await message.edit_text(text, reply_markup=keyboard)
+    else:
+        await message.answer(text, reply_markup=keyboard)
+
+
 @admin_router.callback_query(F.data == "admin_subscriptions")
 async def subscriptions_list_callback(callback: CallbackQuery, session: AsyncSession):
     """Список активных подписок"""
     try:
-        from database.orm_query import select, Subscription, User, SubscriptionPlan
-        from sqlalchemy.orm import joinedload
-        
-        query = select(Subscription).where(
-            Subscription.is_active == True
-        ).options(
-            joinedload(Subscription.user),
-            joinedload(Subscription.plan)
-        )
-        
-        result = await session.execute(query)
-        subscriptions = result.unique().scalars().all()
-        
-        if not subscriptions:
-            text = "🚫 Hech qanday aktiv obuna topilmadi."
-        else:
-            text = f"📋 <b>Aktiv obunalar ({len(subscriptions)}):</b>\n\n"
-            
-            for sub in subscriptions:
-                text += f"👤 User: {sub.user_id}\n"
-                text += f"📋 Tarif: {sub.plan.name}\n"
-                text += f"💰 Narx: ${sub.plan.price_usd}\n"
-                text += f"⏱ Tugash: {sub.expires_at.strftime('%d.%m.%Y %H:%M')}\n"
-                text += f"✅ To'langan: {'Ha' if sub.payment_verified else 'Yoq'}\n\n"
-        
-        await callback.message.edit_text(text, reply_markup=get_back_to_admin_menu_kb())
+        await show_subscriptions_page(callback.message, session, edit=True)
         await callback.answer()
     except Exception as e:
         logging.error(f"Error getting subscriptions: {e}")
         await callback.answer("❌ Obunalar ro'yxatini olishda xatolik")
 
 
+@admin_router.callback_query(SubsPageCb.filter())
+async def subscriptions_page_callback(callback: CallbackQuery, callback_data: SubsPageCb, session: AsyncSession):
+    """Aktiv obunalar sahifalari va filtrlari"""
+    try:
+        cursor = callback_data.cursor
+        await show_subscriptions_page(
+            callback.message,
+            session,
+            filter_code=callback_data.code,
+            after_id=cursor if callback_data.direction == "n" else None,
+            before_id=cursor if callback_data.direction == "p" else None,
+            page=callback_data.page,
+            edit=True
+        )
+        await callback.answer()
+    except Exception as e:
+        logging.error(f"Error in subscriptions pagination: {e}")
+        await callback.answer("Xatolik yuz berdi", show_alert=True)
+
+
 @admin_router.callback_query(F.data == "admin_plans_list")
 async def admin_plans_list_callback(callback: CallbackQuery, session: AsyncSession):
     """Тарифлар рўйхати"""
@@ -641,25 +673,20 @@ async def admin_add_plan_callback(callback: CallbackQuery, state: FSMContext):
 async def admin_subscription_stats_callback(callback: CallbackQuery, session: AsyncSession):
     """Обуналар статистикаси"""
     try:
-        from database.orm_query import select, Subscription, SubscriptionPlan, func
+        stats = await orm_get_subscription_stats(session)
         
-        # Жами обуналар сони
-        total_subs = await session.scalar(select(func.count(Subscription.id)))
-        
-        # Фаол обуналар сони  
-        active_subs = await session.scalar(
-            select(func.count(Subscription.id)).where(Subscription.is_active == True)
-        )
+        text = f"📊 <b>Obunalar statistikasi</b>\n\n"
+        text += f"📋 Jami obunalar: <b>{stats['total']}</b>\n"
+        text += f"✅ Faol obunalar: <b>{stats['active']}</b>\n"
+        text += f"💳 To'langan obunalar: <b>{stats['verified']}</b>\n"
+        text += f"💰 Daromad: <b>${stats['revenue_usd']:,.2f}</b> / <b>{stats['revenue_uzs']:,}</b> so'm\n\n"
         
-        # Тўланган обуналар сони
-        paid_subs = await session.scalar(
-            select(func.count(Subscription.id)).where(Subscription.payment_verified == True)
-        )
+        for plan in stats['plans']:
+            text += f"💎 <b>{plan['name']}</b>: {plan['verified']}/{plan['total']} to'langan, "
+            text += f"{plan['active']} faol, ${plan['revenue_usd']:,.2f} / {plan['revenue_uzs']:,} so'm\n"
+        if stats['plans']:
+            text += "\n"
         
-        text = f"📊 <b>Obunalar statistikasi</b>\n\n"
-        text += f"📋 Jami obunalar: <b>{total_subs or 0}</b>\n"
-        text += f"✅ Faol obunalar: <b>{active_subs or 0}</b>\n"
-        text += f"💳 To'langan obunalar: <b>{paid_subs or 0}</b>\n"
         text += f"📅 So'ngi yangilanish: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
         
         await callback.message.edit_text(text, reply_markup=get_back_to_admin_menu_kb())
@@ -669,6 +696,80 @@ async def admin_subscription_stats_callback(callback: CallbackQuery, session: As
         await callback.answer("❌ Statistikani olishda xatolik")
 
 
+async def build_revenue_text(session: AsyncSession) -> str:
+    """Daromad analitikasi matni (rollup jadvalidan)"""
+    summary = await AnalyticsService.get_summary(session, days=30)
+    if not summary['days']:
+        return (
+            "📈 <b>Daromad analitikasi</b>\n\n🚫 Ma'lumot yo'q.\n"
+            "🔄 Hisoblash uchun pastdagi tugmani bosing."
+        )
+    
+    text = "📈 <b>Daromad analitikasi (30 kun)</b>\n\n"
+    text += f"💵 MRR: <b>${summary['mrr_usd']:,.2f}</b>\n"
+    text += f"👥 Faol to'lovchilar: <b>{summary['active_paying']}</b>\n"
+    text += f"💰 Daromad: <b>${summary['revenue_usd']:,.2f}</b> / <b>{summary['revenue_uzs']:,}</b> so'm\n"
+    text += f"📉 Churn: <b>{summary['churned']}</b> ({summary['churn_rate']:.1f}%)\n\n"
+    
+    text += "<b>So'nggi 7 kun:</b>\n<code>"
+    for day in summary['days'][-7:]:
+        text += (
+            f"{day.day.strftime('%d.%m')} ${float(day.revenue_usd):>9,.2f} "
+            f"+{day.new_paid:<3} 👥{day.active_paying:<5} -{day.churned}\n"
+        )
+    text += "</code>\n"
+    if summary['refreshed_at']:
+        text += f"🔄 Hisoblangan: {summary['refreshed_at'].strftime('%d.%m.%Y %H:%M')}"
+    return text
+
+
+@admin_router.callback_query(F.data == "admin_revenue")
+async def admin_revenue_callback(callback: CallbackQuery, session: AsyncSession):
+    """Daromad, MRR va churn analitikasi"""
+    try:
+        text = await build_revenue_text(session)
+        await callback.message.edit_text(text, reply_markup=get_revenue_kb())
+        await callback.answer()
+    except Exception as e:
+        logging.error(f"Error getting revenue analytics: {e}")
+        await callback.answer("❌ Analitikani olishda xatolik")
+
+
+async def refresh_analytics_now() -> str:
+    """'analytics' vazifasini hozir bajarish (vazifa lock i va replikalararo lease orqali)
+
+    Tugma bosilganda javob matnini qaytaradi; yaqinda yangilangan bo'lsa qayta hisoblanmaydi.
+    """
+    job = jobs.jobs['analytics']
+    if job.lock.locked():
+        return "⏳ Hozir yangilanmoqda"
+    if job.last_started and time.time() - job.last_started < ANALYTICS_REFRESH_COOLDOWN:
+        return "✅ Yaqinda yangilangan"
+    if not await jobs.run('analytics'):
+        return "⏳ Hozir yangilanmoqda"
+    if job.consecutive_failures:
+        return "❌ Analitikani yangilashda xatolik"
+    return "✅ Yangilandi"
+
+
+@admin_router.callback_query(F.data == "admin_revenue_refresh")
+async def admin_revenue_refresh_callback(callback: CallbackQuery, session: AsyncSession):
+    """Rollup jadvalini qayta hisoblash"""
+    try:
+        status = await refresh_analytics_now()
+        text = await build_revenue_text(session)
+        await callback.message.edit_text(text, reply_markup=get_revenue_kb())
+        await callback.answer(status)
+    except TelegramBadRequest as e:
+        # Matn o'zgarmagan bo'lsa
+        if "message is not modified" not in str(e):
+            raise
+        await callback.answer(status)
+    except Exception as e:
+        logging.error(f"Error refreshing revenue analytics: {e}")
+        await callback.answer("❌ Analitikani yangilashda xatolik")
+
+
 # ===================== NAVIGATION CALLBACK ХЕНДЛЕРЫ =====================
 
 @admin_router.callback_query(F.data == "back_to_admin_menu")
@@ -744,11 +845,11 @@ async def cancel_broadcast_handler(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@admin_router.callback_query(F.data.startswith("users_page:"))
-async def users_pagination_handler(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(UsersPageCb.filter())
+async def users_pagination_handler(callback: CallbackQuery, callback_data: UsersPageCb, session: AsyncSession):
     """Pagination для списка пользователей"""
     try:
-        page = int(callback.data.split(":")[1])
+        page = callback_data.page
         await show_users_page(callback.message, session, page=page, edit=True)
         await callback.answer()
     except Exception as e:
@@ -762,14 +863,13 @@ async def noop_handler(callback: CallbackQuery):
     await callback.answer()
 
 
-@admin_router.callback_query(F.data.startswith("user_profile:"))
-async def user_profile_handler(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(UserProfileCb.filter())
+async def user_profile_handler(callback: CallbackQuery, callback_data: UserProfileCb, session: AsyncSession):
     """Показ профиля пользователя"""
     try:
-        user_id = int(callback.data.split(":")[1])
+        user_id = callback_data.user_id
         
         # Получаем информацию о пользователе
-        from database.orm_query import orm_get_user_by_id
         user = await orm_get_user_by_id(session, user_id)
         
         if user:
@@ -866,6 +966,8 @@ async def broadcast_send(message: Message, session: AsyncSession, state: FSMCont
     try:
         bot = message.bot
         await message.answer("📤 Xabar yuborilmoqda...")
+        # Jarayon broadcast_messages metrikasida
+        progress = {'on_start': broadcast_started, 'on_result': broadcast_result}
         
         # Определяем тип контента и отправляем
         if message.photo:
@@ -873,24 +975,27 @@ async def broadcast_send(message: Message, session: AsyncSession, state: FSMCont
             await send_message_to_all_users(
                 bot, session, None, 
                 photo=file_id, 
-                caption=message.caption or ""
+                caption=message.caption or "",
+                **progress
             )
         elif message.video:
             file_id = message.video.file_id
             await send_message_to_all_users(
                 bot, session, None, 
                 video=file_id, 
-                caption=message.caption or ""
+                caption=message.caption or "",
+                **progress
             )
         elif message.document:
             file_id = message.document.file_id
             await send_message_to_all_users(
                 bot, session, None, 
                 document=file_id, 
-                caption=message.caption or ""
+                caption=message.caption or "",
+                **progress
             )
         elif message.text:
-            await send_message_to_all_users(bot, session, message.text)
+            await send_message_to_all_users(bot, session, message.text, **progress)
         else:
             await message.answer(
                 "❌ <b>Noto'g'ri format!</b> Matn yoki media yuboring.",
@@ -968,7 +1073,7 @@ async def funnel_create_description(message: Message, state: FSMContext, session
         
         await message.answer(
             f"✅ <b>Funnel '{data['name']}' yaratildi!</b>\n\n"
-            f"🔗 Link: <code>https://t.me/test_ad_project_bot?start={data['key']}</code>\n\n"
+            f"🔗 Link: <code>{bot_identity.deep_link(data['key'])}</code>\n\n"
             f"Endi funnel uchun qadamlarni qo'shing:",
             reply_markup=get_funnel_creation_kb()
         )
@@ -1226,7 +1331,6 @@ async def funnel_button_handler(message: Message, state: FSMContext, session: As
 async def funnels_list(message: Message, session: AsyncSession):
     """Список воронок"""
     try:
-        from database.orm_query import select, Funnel
         
         query = select(Funnel).where(Funnel.is_active == True)
         result = await session.execute(query)
@@ -1239,7 +1343,7 @@ async def funnels_list(message: Message, session: AsyncSession):
             for funnel in funnels:
                 text += f"🎯 <b>{funnel.name}</b>\n"
                 text += f"🔑 Kalit: <code>{funnel.key}</code>\n"
-                text += f"🔗 Link: <code>https://t.me/your_bot?start={funnel.key}</code>\n"
+                text += f"🔗 Link: <code>{bot_identity.deep_link(funnel.key)}</code>\n"
                 text += f"📅 Yaratilgan: {funnel.created.strftime('%d.%m.%Y')}\n\n"
             
             await message.answer(text)
@@ -1262,32 +1366,7 @@ async def subscription_plans_menu(message: Message):
 async def subscriptions_list(message: Message, session: AsyncSession):
     """Список активных подписок"""
     try:
-        from database.orm_query import select, Subscription, User, SubscriptionPlan
-        from sqlalchemy.orm import joinedload
-        
-        query = select(Subscription).where(
-            Subscription.is_active == True
-        ).options(
-            joinedload(Subscription.user),
-            joinedload(Subscription.plan)
-        )
-        
-        result = await session.execute(query)
-        subscriptions = result.unique().scalars().all()
-        
-        if not subscriptions:
-            await message.answer("🚫 Hech qanday aktiv obuna topilmadi.")
-        else:
-            text = f"📋 <b>Aktiv obunalar ({len(subscriptions)}):</b>\n\n"
-            
-            for sub in subscriptions:
-                text += f"👤 User: {sub.user_id}\n"
-                text += f"📋 Tarif: {sub.plan.name}\n"
-                text += f"💰 Narx: ${sub.plan.price_usd}\n"
-                text += f"⏱ Tugash: {sub.expires_at.strftime('%d.%m.%Y %H:%M')}\n"
-                text += f"✅ To'langan: {'Ha' if sub.payment_verified else 'Yoq'}\n\n"
-            
-            await message.answer(text)
+        await show_subscriptions_page(message, session)
     except Exception as e:
         logging.error(f"Error getting subscriptions: {e}")
         await message.answer("❌ Obunalar ro'yxatini olishda xatolik")
@@ -1411,18 +1490,12 @@ async def free_link_key(message: Message, state: FSMContext, session: AsyncSessi
         await message.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("max_users_"))
-async def free_link_max_users_callback(callback: CallbackQuery, state: FSMContext):
+@admin_router.callback_query(MaxUsersCb.filter())
+async def free_link_max_users_callback(callback: CallbackQuery, callback_data: MaxUsersCb, state: FSMContext):
     """Maksimal foydalanuvchilar sonini callback orqali qabul qilish"""
     try:
-        max_users_data = callback.data.split("_")[-1]
-        
-        if max_users_data == "unlimited":
-            max_uses = -1
-            max_uses_text = "Cheksiz"
-        else:
-            max_uses = int(max_users_data)
-            max_uses_text = str(max_uses)
+        max_uses = callback_data.value
+        max_uses_text = "Cheksiz" if max_uses == -1 else str(max_uses)
         
         await state.update_data(max_uses=max_uses)
         
@@ -1439,20 +1512,15 @@ async def free_link_max_users_callback(callback: CallbackQuery, state: FSMContex
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("duration_"))
-async def free_link_duration_callback(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+@admin_router.callback_query(DurationCb.filter())
+async def free_link_duration_callback(callback: CallbackQuery, callback_data: DurationCb, state: FSMContext, session: AsyncSession):
     """Muddat callback orqali qabul qilish va free link yaratish"""
     try:
-        duration_data = callback.data.split("_")
-        
-        if duration_data[-1] == "unlimited":
+        if callback_data.days == -1:
             duration_days = 365000  # ~1000 yil
             duration_text = "Cheksiz"
-        elif duration_data[-1] == "day":
-            duration_days = int(duration_data[1])
-            duration_text = f"{duration_days} kun"
-        elif duration_data[-1] == "days":
-            duration_days = int(duration_data[1])
+        else:
+            duration_days = callback_data.days
             if duration_days == 3:
                 duration_text = "3 kun"
             elif duration_days == 7:
@@ -1518,8 +1586,7 @@ async def free_link_duration_callback(callback: CallbackQuery, state: FSMContext
             created_by=callback.from_user.id
         )
         
-        bot_username = (await callback.bot.get_me()).username
-        link_url = f"https://t.me/{bot_username}?start={data['key']}"
+        link_url = bot_identity.deep_link(data['key'])
         
         max_uses_text = "Cheksiz" if max_uses == -1 else str(max_uses)
         
@@ -1543,38 +1610,200 @@ async def free_link_duration_callback(callback: CallbackQuery, state: FSMContext
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data == "free_links_list")
-async def free_links_list(callback: CallbackQuery, session: AsyncSession):
-    """Free linklar ro'yxati"""
+FREE_LINK_BULK_USAGE = (
+    "📦 <b>Free linklarni ommaviy yaratish</b>\n\n"
+    "<code>/freelinks_bulk &lt;prefix&gt; &lt;soni&gt; [max_foydalanish] [kunlar]</code>\n\n"
+    "• prefix - lotin harflari, raqamlar, _ va - (30 belgigacha)\n"
+    f"• soni - 1 dan {FREE_LINK_BULK_MAX} gacha\n"
+    "• max_foydalanish - har bir link uchun (-1 = cheksiz, standart 1)\n"
+    "• kunlar - kanalda qolish muddati (-1 = cheksiz, standart 7)\n\n"
+    "Misol: <code>/freelinks_bulk promo 500 1 7</code>\n\n"
+    "Deep linklar CSV fayl bo'lib yuboriladi, kanal invite linklari fonda yaratiladi."
+)
+
+
+@admin_router.callback_query(F.data == "free_links_bulk")
+async def free_links_bulk_help(callback: CallbackQuery):
+    """Ommaviy yaratish bo'yicha yo'riqnoma"""
+    await callback.message.edit_text(FREE_LINK_BULK_USAGE, reply_markup=get_free_link_cancel_kb())
+    await callback.answer()
+
+
+@admin_router.message(Command("freelinks_bulk"))
+async def free_links_bulk_command(message: Message, command: CommandObject, session: AsyncSession):
+    """/freelinks_bulk <prefix> <soni> [max_foydalanish] [kunlar] - kampaniya uchun free linklar"""
+    args = (command.args or "").split()
     try:
-        free_links = await orm_get_all_free_links(session)
-        
-        if not free_links:
-            await callback.message.edit_text(
-                "📋 <b>Free linklar ro'yxati</b>\n\n"
-                "❌ Hozircha free linklar mavjud emas.",
-                reply_markup=get_free_links_menu_kb()
+        prefix = args[0]
+        count = int(args[1])
+        max_uses = int(args[2]) if len(args) > 2 else 1
+        duration_days = int(args[3]) if len(args) > 3 else 7
+    except (IndexError, ValueError):
+        await message.answer(FREE_LINK_BULK_USAGE)
+        return
+    
+    if (
+        not re.fullmatch(r"[A-Za-z0-9_-]{1,30}", prefix)
+        or not 1 <= count <= FREE_LINK_BULK_MAX
+        or (max_uses < 1 and max_uses != -1)
+        or (duration_days < 1 and duration_days != -1)
+    ):
+        await message.answer(FREE_LINK_BULK_USAGE)
+        return
+    
+    default_channel_id = os.getenv('DEFAULT_CHANNEL_ID')
+    if not default_channel_id:
+        await message.answer(
+            "❌ <b>Default kanal ID topilmadi!</b>\n\n"
+            "Iltimos .env faylida DEFAULT_CHANNEL_ID ni sozlang."
+        )
+        return
+    
+    try:
+        links = await FreeLinkBulkService.create_campaign(
+            session,
+            prefix=prefix,
+            count=count,
+            max_uses=max_uses,
+            duration_days=365000 if duration_days == -1 else duration_days,
+            channel_id=default_channel_id,
+            created_by=message.from_user.id
+        )
+        FreeLinkBulkService.schedule_invite_links(message.bot)
+        
+        await message.answer_document(
+            BufferedInputFile(
+                FreeLinkBulkService.build_csv(links),
+                filename=f"freelinks_{prefix}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+            ),
+            caption=(
+                f"✅ <b>{len(links)}</b> ta free link yaratildi (<code>{prefix}</code>)\n"
+                "⏳ Kanal invite linklari fonda yaratilmoqda."
             )
-            return
-        
-        await callback.message.edit_text(
-            "📋 <b>Free linklar ro'yxati</b>\n\n"
-            "Free link tanlang:",
-            reply_markup=get_free_links_list_kb(free_links)
         )
+    except Exception as e:
+        logging.error(f"Error in free_links_bulk_command: {e}")
+        await message.answer("❌ Free linklarni yaratishda xatolik")
+
+
+FREE_LINKS_PER_PAGE = 10
+
+
+async def show_free_links_page(
+    message,
+    session: AsyncSession,
+    status: FreeLinkStatus = FreeLinkStatus.all,
+    page: int = 0,
+    search: str | None = None,
+    edit: bool = False
+):
+    """Free linklar sahifasi: filtr, qidiruv va har bir link uchun foydalanishlar / aktiv a'zolar soni"""
+    status_filter = None if status == FreeLinkStatus.all else status.name
+    total = await orm_count_free_links(session, status=status_filter, search=search)
+    total_pages = max(1, (total + FREE_LINKS_PER_PAGE - 1) // FREE_LINKS_PER_PAGE)
+    page = min(max(page, 0), total_pages - 1)
+    rows = await orm_get_free_links_page(
+        session,
+        limit=FREE_LINKS_PER_PAGE,
+        offset=page * FREE_LINKS_PER_PAGE,
+        status=status_filter,
+        search=search
+    )
+    
+    text = "📋 <b>Free linklar ro'yxati</b>\n\n"
+    if search:
+        text += f"🔍 Qidiruv: <code>{html.escape(search)}</code>\n"
+    if not rows:
+        text += "❌ Free linklar topilmadi."
+    else:
+        text += f"📊 Jami: <b>{total}</b> ta | 📄 Sahifa: <b>{page + 1}</b> / <b>{total_pages}</b>\n"
+        text += "<i>(foydalanishlar / limit, 👥 aktiv a'zolar)</i>\n\n"
+        text += "Free link tanlang:"
+    
+    keyboard = get_free_links_list_kb(rows, status, page, total_pages, searching=bool(search))
+    if edit:
+        await message.edit_text(text, reply_markup=keyboard)
+    else:
+        await message.answer(text, reply_markup=keyboard)
+
+
+@admin_router.callback_query(F.data == "free_links_list")
+async def free_links_list(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
+    """Free linklar ro'yxati"""
+    try:
+        if await state.get_state() == FreeLinkSearchStates.waiting_for_query:
+            await state.set_state(None)
+        await state.update_data(free_link_search=None)
+        await show_free_links_page(callback.message, session, edit=True)
+        await callback.answer()
     except Exception as e:
         logging.error(f"Error in free_links_list: {e}")
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("free_link_info_"))
-async def free_link_info(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FreeLinksPageCb.filter())
+async def free_links_page(callback: CallbackQuery, callback_data: FreeLinksPageCb, session: AsyncSession, state: FSMContext):
+    """Free linklar ro'yxati sahifalari va filtrlari"""
+    try:
+        data = await state.get_data()
+        await show_free_links_page(
+            callback.message,
+            session,
+            status=callback_data.status,
+            page=callback_data.page,
+            search=data.get("free_link_search"),
+            edit=True
+        )
+        await callback.answer()
+    except Exception as e:
+        logging.error(f"Error in free_links_page: {e}")
+        await callback.answer("❌ Xatolik yuz berdi")
+
+
+@admin_router.callback_query(F.data == "free_links_search")
+async def free_links_search(callback: CallbackQuery, state: FSMContext):
+    """Free link qidirish (nom yoki kalit bo'yicha)"""
+    await state.set_state(FreeLinkSearchStates.waiting_for_query)
+    await callback.message.edit_text(
+        "🔍 <b>Free link qidirish</b>\n\n"
+        "Link nomi yoki kalitining bir qismini yuboring:",
+        reply_markup=get_free_links_search_cancel_kb()
+    )
+    await callback.answer()
+
+
+@admin_router.message(FreeLinkSearchStates.waiting_for_query, F.text)
+async def free_links_search_query(message: Message, session: AsyncSession, state: FSMContext):
+    """Qidiruv natijalari"""
+    try:
+        search = message.text.strip()[:50]
+        await state.set_state(None)
+        await state.update_data(free_link_search=search or None)
+        await show_free_links_page(message, session, search=search or None)
+    except Exception as e:
+        logging.error(f"Error in free_links_search_query: {e}")
+        await message.answer("❌ Xatolik yuz berdi")
+
+
+@admin_router.callback_query(F.data == "free_links_search_clear")
+async def free_links_search_clear(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
+    """Qidiruvni tozalash"""
+    try:
+        await state.update_data(free_link_search=None)
+        await show_free_links_page(callback.message, session, edit=True)
+        await callback.answer()
+    except Exception as e:
+        logging.error(f"Error in free_links_search_clear: {e}")
+        await callback.answer("❌ Xatolik yuz berdi")
+
+
+@admin_router.callback_query(FreeLinkCb.filter(F.action == FreeLinkAction.info))
+async def free_link_info(callback: CallbackQuery, callback_data: FreeLinkCb, session: AsyncSession):
     """Free link ma'lumotlari"""
     try:
-        free_link_id = int(callback.data.split("_")[-1])
+        free_link_id = callback_data.free_link_id
         
         # Free link ma'lumotlarini olish
-        from database.orm_query import select, FreeLink
         query = select(FreeLink).where(FreeLink.id == free_link_id)
         result = await session.execute(query)
         free_link = result.scalar_one_or_none()
@@ -1584,8 +1813,7 @@ async def free_link_info(callback: CallbackQuery, session: AsyncSession):
             return
         
         status = "🟢 Faol" if free_link.is_active else "🔴 Nofaol"
-        bot_username = (await callback.bot.get_me()).username
-        link_url = f"https://t.me/{bot_username}?start={free_link.key}"
+        link_url = bot_identity.deep_link(free_link.key)
         
         max_uses_display = "Cheksiz" if free_link.max_uses == -1 else str(free_link.max_uses)
         
@@ -1603,21 +1831,93 @@ async def free_link_info(callback: CallbackQuery, session: AsyncSession):
         
         await callback.message.edit_text(
             text,
-            reply_markup=get_free_link_info_kb(free_link_id, free_link.is_active)
+            reply_markup=get_free_link_info_kb(free_link_id, free_link.is_active, qr=bot_identity.qr_available())
         )
     except Exception as e:
         logging.error(f"Error in free_link_info: {e}")
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("toggle_free_link_"))
-async def toggle_free_link_status(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FreeLinkCb.filter(F.action == FreeLinkAction.qr))
+async def free_link_qr(callback: CallbackQuery, callback_data: FreeLinkCb, session: AsyncSession):
+    """Free link uchun QR kod (tarmoqsiz generatsiya)"""
+    try:
+        free_link = await orm_get_free_link_by_id(session, callback_data.free_link_id)
+        if not free_link:
+            await callback.answer("❌ Free link topilmadi")
+            return
+        
+        link_url = bot_identity.deep_link(free_link.key)
+        await callback.message.answer_photo(
+            BufferedInputFile(bot_identity.qr_png(link_url), filename=f"{free_link.key}.png"),
+            caption=f"🎁 <b>{free_link.name}</b>\n<code>{link_url}</code>"
+        )
+        await callback.answer()
+    except RuntimeError as e:
+        await callback.answer(f"❌ {e}", show_alert=True)
+    except Exception as e:
+        logging.error(f"Error in free_link_qr: {e}")
+        await callback.answer("❌ Xatolik yuz berdi")
+
+
+async def build_free_link_analytics_text(session: AsyncSession, free_link) -> str:
+    """Free link kampaniyasi analitikasi matni (rollup jadvalidan)"""
+    summary = await FreeLinkAnalyticsService.get_summary(session, free_link.id, days=14)
+    
+    text = f"📈 <b>{free_link.name}</b> - kampaniya analitikasi\n\n"
+    job = jobs.jobs.get('analytics')
+    if summary['refreshed_at'] is None and job is not None and job.last_success:
+        # Hech bir link ishlatilmagan - jadval bo'sh, lekin hisoblash bajarilgan
+        summary['refreshed_at'] = datetime.fromtimestamp(job.last_success)
+    if summary['refreshed_at'] is None:
+        return text + "🚫 Ma'lumot yo'q.\n🔄 Hisoblash uchun pastdagi tugmani bosing."
+    
+    text += f"🎟 Kirishlar: <b>{summary['redemptions']}</b>\n"
+    text += f"🆕 Yangi foydalanuvchilar: <b>{summary['new_users']}</b>\n"
+    text += f"💳 Pullik obunaga o'tganlar: <b>{summary['converted']}</b> ({summary['conversion_rate']:.1f}%)\n"
+    text += f"💰 Daromad: <b>${summary['revenue_usd']:,.2f}</b> / <b>{summary['revenue_uzs']:,}</b> so'm\n\n"
+    
+    text += "<b>So'nggi 14 kun</b> (kirish / yangi / to'lagan):\n<code>"
+    for day in summary['days']:
+        text += f"{day['day'].strftime('%d.%m')} {day['redemptions']:>5} {day['new_users']:>5} {day['converted']:>4}\n"
+    text += "</code>\n"
+    text += f"🔄 Hisoblangan: {summary['refreshed_at'].strftime('%d.%m.%Y %H:%M')}"
+    return text
+
+
+@admin_router.callback_query(FreeLinkCb.filter(F.action.in_({FreeLinkAction.analytics, FreeLinkAction.refresh_analytics})))
+async def free_link_analytics(callback: CallbackQuery, callback_data: FreeLinkCb, session: AsyncSession):
+    """Free link orqali kirishlar, konversiya va daromad"""
+    try:
+        free_link = await orm_get_free_link_by_id(session, callback_data.free_link_id)
+        if not free_link:
+            await callback.answer("❌ Free link topilmadi")
+            return
+        
+        status = None
+        if callback_data.action == FreeLinkAction.refresh_analytics:
+            status = await refresh_analytics_now()
+        
+        text = await build_free_link_analytics_text(session, free_link)
+        await callback.message.edit_text(text, reply_markup=get_free_link_analytics_kb(free_link.id))
+        await callback.answer(status)
+    except TelegramBadRequest as e:
+        # Matn o'zgarmagan bo'lsa
+        if "message is not modified" not in str(e):
+            raise
+        await callback.answer(status)
+    except Exception as e:
+        logging.error(f"Error in free_link_analytics: {e}")
+        await callback.answer("❌ Analitikani olishda xatolik")
+
+
+@admin_router.callback_query(FreeLinkCb.filter(F.action == FreeLinkAction.toggle))
+async def toggle_free_link_status(callback: CallbackQuery, callback_data: FreeLinkCb, session: AsyncSession):
     """Free link holatini o'zgartirish (faol/nofaol)"""
     try:
-        free_link_id = int(callback.data.split("_")[-1])
+        free_link_id = callback_data.free_link_id
         
         # Free link ma'lumotlarini olish
-        from database.orm_query import select, FreeLink
         query = select(FreeLink).where(FreeLink.id == free_link_id)
         result = await session.execute(query)
         free_link = result.scalar_one_or_none()
@@ -1635,8 +1935,7 @@ async def toggle_free_link_status(callback: CallbackQuery, session: AsyncSession
         
         # Ma'lumotlarni yangilash
         status = "🟢 Faol" if free_link.is_active else "🔴 Nofaol"
-        bot_username = (await callback.bot.get_me()).username
-        link_url = f"https://t.me/{bot_username}?start={free_link.key}"
+        link_url = bot_identity.deep_link(free_link.key)
         
         max_uses_display = "Cheksiz" if free_link.max_uses == -1 else str(free_link.max_uses)
         
@@ -1654,7 +1953,7 @@ async def toggle_free_link_status(callback: CallbackQuery, session: AsyncSession
         
         await callback.message.edit_text(
             text,
-            reply_markup=get_free_link_info_kb(free_link_id, free_link.is_active)
+            reply_markup=get_free_link_info_kb(free_link_id, free_link.is_active, qr=bot_identity.qr_available())
         )
         
     except Exception as e:
@@ -1662,14 +1961,13 @@ async def toggle_free_link_status(callback: CallbackQuery, session: AsyncSession
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("deactivate_free_link_"))
-async def deactivate_free_link_request(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FreeLinkCb.filter(F.action == FreeLinkAction.deactivate))
+async def deactivate_free_link_request(callback: CallbackQuery, callback_data: FreeLinkCb, session: AsyncSession):
     """Free link deaktivatsiya qilish so'rovi"""
     try:
-        free_link_id = int(callback.data.split("_")[-1])
+        free_link_id = callback_data.free_link_id
         
         # Free link ma'lumotlarini olish
-        from database.orm_query import select, FreeLink
         query = select(FreeLink).where(FreeLink.id == free_link_id)
         result = await session.execute(query)
         free_link = result.scalar_one_or_none()
@@ -1694,14 +1992,13 @@ async def deactivate_free_link_request(callback: CallbackQuery, session: AsyncSe
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("permanent_delete_free_link_"))
-async def permanent_delete_free_link_request(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FreeLinkCb.filter(F.action == FreeLinkAction.delete))
+async def permanent_delete_free_link_request(callback: CallbackQuery, callback_data: FreeLinkCb, session: AsyncSession):
     """Free link butunlay o'chirish so'rovi"""
     try:
-        free_link_id = int(callback.data.split("_")[-1])
+        free_link_id = callback_data.free_link_id
         
         # Free link ma'lumotlarini olish
-        from database.orm_query import select, FreeLink
         query = select(FreeLink).where(FreeLink.id == free_link_id)
         result = await session.execute(query)
         free_link = result.scalar_one_or_none()
@@ -1729,14 +2026,13 @@ async def permanent_delete_free_link_request(callback: CallbackQuery, session: A
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("confirm_deactivate_"))
-async def confirm_deactivate_free_link(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FreeLinkCb.filter(F.action == FreeLinkAction.confirm_deactivate))
+async def confirm_deactivate_free_link(callback: CallbackQuery, callback_data: FreeLinkCb, session: AsyncSession):
     """Free link deaktivatsiya qilishni tasdiqlash"""
     try:
-        free_link_id = int(callback.data.split("_")[-1])
+        free_link_id = callback_data.free_link_id
         
         # Free link ma'lumotlarini olish va deaktivatsiya qilish
-        from database.orm_query import select, FreeLink
         query = select(FreeLink).where(FreeLink.id == free_link_id)
         result = await session.execute(query)
         free_link = result.scalar_one_or_none()
@@ -1763,11 +2059,11 @@ async def confirm_deactivate_free_link(callback: CallbackQuery, session: AsyncSe
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("confirm_permanent_delete_"))
-async def confirm_permanent_delete_free_link(callback: CallbackQuery, session: AsyncSession):
+@admin_router.callback_query(FreeLinkCb.filter(F.action == FreeLinkAction.confirm_delete))
+async def confirm_permanent_delete_free_link(callback: CallbackQuery, callback_data: FreeLinkCb, session: AsyncSession):
     """Free link butunlay o'chirishni tasdiqlash"""
     try:
-        free_link_id = int(callback.data.split("_")[-1])
+        free_link_id = callback_data.free_link_id
         
         # Free link o'chirish
         await orm_permanent_delete_free_link(session, free_link_id)
@@ -1785,138 +2081,227 @@ async def confirm_permanent_delete_free_link(callback: CallbackQuery, session: A
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-# Eski delete_free_link funksiyasini yangilaymiz (eski callback uchun)
-@admin_router.callback_query(F.data.startswith("toggle_status_"))
-async def toggle_free_link_status(callback: CallbackQuery, session: AsyncSession):
-    """Free link statusini o'zgartirish"""
+# Free link state uchun cancel handler
+@admin_router.message(
+    F.text.in_(["❌ Bekor qilish", "/cancel"]), 
+    FreeLinkStates()
+)
+async def cancel_free_link_creation(message: Message, state: FSMContext):
+    """Free link yaratishni bekor qilish"""
+    await state.clear()
+    await message.answer(
+        "❌ <b>Free link yaratish bekor qilindi</b>",
+        reply_markup=get_free_links_menu_kb()
+    )
+
+
+# ===================== EXPORT HANDLERS =====================
+
+async def send_export(message: Message, session: AsyncSession, kind: str, fmt: str):
+    """Eksport faylini tayyorlash va hujjat sifatida yuborish"""
+    path = None
     try:
-        free_link_id = int(callback.data.split("_")[-1])
-        
-        # Free link ma'lumotlarini olish
-        from database.orm_query import select, FreeLink
-        query = select(FreeLink).where(FreeLink.id == free_link_id)
-        result = await session.execute(query)
-        free_link = result.scalar_one_or_none()
-        
-        if not free_link:
-            await callback.answer("❌ Free link topilmadi")
-            return
-        
-        # Statusni o'zgartirish
-        if free_link.is_active:
-            await orm_deactivate_free_link(session, free_link_id)
-            new_status = "deaktivatsiya qilindi"
-            status_emoji = "🔴"
-        else:
-            await orm_activate_free_link(session, free_link_id)
-            new_status = "faollashtirildi"
-            status_emoji = "🟢"
-        
-        # Yangilangan ma'lumotlarni ko'rsatish
-        status_text = f"{status_emoji} {'Faol' if not free_link.is_active else 'Faol emas'}"
-        max_uses_text = "Cheksiz" if free_link.max_uses == -1 else str(free_link.max_uses)
-        
-        await callback.message.edit_text(
-            f"📋 <b>Free Link Ma'lumotlari</b>\n\n"
-            f"📝 <b>Nom:</b> {free_link.name}\n"
-            f"🔑 <b>Kalit:</b> <code>{free_link.key}</code>\n"
-            f"📊 <b>Status:</b> {status_text}\n"
-            f"👥 <b>Maksimal foydalanuvchilar:</b> {max_uses_text}\n"
-            f"📈 <b>Hozirgi foydalanuvchilar:</b> {free_link.current_uses}\n"
-            f"📅 <b>Yaratilgan sana:</b> {free_link.created_at.strftime('%d.%m.%Y %H:%M')}\n\n"
-            f"🔗 <b>Freelink URL:</b>\n"
-            f"<code>https://t.me/{(await callback.bot.get_me()).username}?start={free_link.key}</code>",
-            reply_markup=get_free_link_info_kb(free_link.id, not free_link.is_active)
+        await message.answer("⏳ Eksport tayyorlanmoqda...")
+        path, rows = await ExportService.export_to_file(session, kind, fmt)
+        await message.answer_document(
+            FSInputFile(path, filename=ExportService.build_filename(kind, fmt)),
+            caption=f"📤 <b>{kind}</b>: {rows} ta qator"
         )
-        await callback.answer(f"✅ Free link {new_status}")
-        
+    except RuntimeError as e:
+        await message.answer(f"❌ {e}", reply_markup=get_back_to_admin_menu_kb())
     except Exception as e:
-        logging.error(f"Error in toggle_free_link_status: {e}")
-        await callback.answer("❌ Xatolik yuz berdi")
+        logging.error(f"Error exporting {kind}: {e}")
+        await message.answer("❌ Eksport qilishda xatolik", reply_markup=get_back_to_admin_menu_kb())
+    finally:
+        if path and os.path.exists(path):
+            os.remove(path)
 
 
-@admin_router.callback_query(F.data.startswith("cancel_delete_"))
-async def cancel_delete_free_link(callback: CallbackQuery, session: AsyncSession):
-    """Free link o'chirishni bekor qilish"""
-    try:
-        free_link_id = int(callback.data.split("_")[-1])
-        
-        # Free link ma'lumotlarini olish
-        from database.orm_query import select, FreeLink
-        query = select(FreeLink).where(FreeLink.id == free_link_id)
-        result = await session.execute(query)
-        free_link = result.scalar_one_or_none()
-        
-        if not free_link:
-            await callback.answer("❌ Free link topilmadi")
-            return
-        
-        # Freelink ma'lumotlarini ko'rsatish
-        status_text = "🟢 Faol" if free_link.is_active else "🔴 Faol emas"
-        max_uses_text = "Cheksiz" if free_link.max_uses == -1 else str(free_link.max_uses)
-        
-        await callback.message.edit_text(
-            f"📋 <b>Free Link Ma'lumotlari</b>\n\n"
-            f"📝 <b>Nom:</b> {free_link.name}\n"
-            f"🔑 <b>Kalit:</b> <code>{free_link.key}</code>\n"
-            f"📊 <b>Status:</b> {status_text}\n"
-            f"👥 <b>Maksimal foydalanuvchilar:</b> {max_uses_text}\n"
-            f"📈 <b>Hozirgi foydalanuvchilar:</b> {free_link.current_uses}\n"
-            f"📅 <b>Yaratilgan sana:</b> {free_link.created_at.strftime('%d.%m.%Y %H:%M')}\n\n"
-            f"🔗 <b>Freelink URL:</b>\n"
-            f"<code>https://t.me/{(await callback.bot.get_me()).username}?start={free_link.key}</code>",
-            reply_markup=get_free_link_info_kb(free_link.id, free_link.is_active)
+@admin_router.callback_query(F.data == "admin_export")
+async def admin_export_menu(callback: CallbackQuery):
+    """Eksport menyusi"""
+    await callback.message.edit_text(
+        "📤 <b>Ma'lumotlarni eksport qilish</b>\n\n"
+        "Qaysi jadvalni yuklab olmoqchisiz?",
+        reply_markup=get_export_menu_kb(parquet=ExportService.parquet_available())
+    )
+    await callback.answer()
+
+
+@admin_router.callback_query(ExportCb.filter())
+async def admin_export_callback(callback: CallbackQuery, callback_data: ExportCb, session: AsyncSession):
+    """Tanlangan jadvalni eksport qilish"""
+    kind, fmt = callback_data.kind, callback_data.fmt
+    await callback.answer()
+    await send_export(callback.message, session, kind, fmt)
+
+
+@admin_router.message(Command("export"))
+async def admin_export_command(message: Message, command: CommandObject, session: AsyncSession):
+    """/export <users|subscriptions|funnel_stats> [csv|parquet]"""
+    args = (command.args or "").split()
+    kind = args[0] if args else "users"
+    fmt = args[1] if len(args) > 1 else "csv"
+    
+    if kind not in EXPORTS or fmt not in EXPORT_FORMATS:
+        await message.answer(
+            "❌ Foydalanish: /export &lt;" + "|".join(EXPORTS) + "&gt; [" + "|".join(EXPORT_FORMATS) + "]"
         )
-        await callback.answer("❌ O'chirish bekor qilindi")
-        
+        return
+    
+    await send_export(message, session, kind, fmt)
+
+
+# ===================== LATENCY ХЕНДЛЕРЫ =====================
+
+@admin_router.message(Command("latency"))
+async def admin_latency_command(message: Message, command: CommandObject):
+    """/latency [reset] - handlerlar bo'yicha javob vaqti (p50/p95/p99)"""
+    if (command.args or "").strip() == "reset":
+        latency_registry.reset()
+        await message.answer("✅ Latency statistikasi tozalandi")
+        return
+    
+    handlers = latency_registry.top(15)
+    if not handlers:
+        await message.answer("🚫 Hali statistika yo'q")
+        return
+    
+    text = "⏱ <b>Handlerlar latency (ms)</b>\n\n<code>"
+    for name, stats in handlers:
+        total = stats.total
+        text += (
+            f"{name[:28]}\n"
+            f"  n={total.count} p50={total.percentile(50):.1f} "
+            f"p95={total.percentile(95):.1f} p99={total.percentile(99):.1f}\n"
+            f"  db p95={stats.db.percentile(95):.1f} api p95={stats.api.percentile(95):.1f}"
+            f"{f' err={stats.errors}' if stats.errors else ''}\n"
+        )
+    text += "</code>"
+    await message.answer(text)
+
+
+# ===================== HEALTH ХЕНДЛЕРЫ =====================
+
+def _ago(timestamp) -> str:
+    """Unix vaqtdan beri o'tgan vaqt (qisqa)"""
+    if not timestamp:
+        return "hali yo'q"
+    seconds = int(datetime.now().timestamp() - timestamp)
+    if seconds < 120:
+        return f"{seconds}s oldin"
+    if seconds < 7200:
+        return f"{seconds // 60}m oldin"
+    return f"{seconds // 3600}h oldin"
+
+
+def build_health_text() -> str:
+    """Davriy vazifalar holati (/health)"""
+    report = jobs.snapshot()
+    status = "✅ Hammasi joyida" if report['status'] == 'ok' else "⚠️ Muammo bor"
+    text = f"🩺 <b>Bot holati:</b> {status}\n\n"
+    for name, job in report['jobs'].items():
+        icon = "⏳" if job['running'] else ("✅" if job['healthy'] else "❌")
+        failures = f"xato: {job['failures']}"
+        if job['consecutive_failures']:
+            failures += f" (ketma-ket {job['consecutive_failures']})"
+        text += (
+            f"{icon} <b>{name}</b>\n"
+            f"  Oxirgi muvaffaqiyat: {_ago(job['last_success'])}\n"
+            f"  Davomiyligi: {job['last_duration'] or 0:.1f}s | ishga tushgan: {job['runs']} | {failures}\n"
+        )
+        if job['next_run_in'] is not None:
+            text += f"  Keyingisi: {int(job['next_run_in']) // 60}m dan keyin\n"
+        if job['skipped']:
+            text += f"  O'tkazib yuborilgan: {job['skipped']}\n"
+        if job['held_elsewhere']:
+            text += f"  Boshqa replikada bajarilgan: {job['held_elsewhere']}\n"
+        if job['last_error'] and job['consecutive_failures']:
+            text += f"  Xato: <code>{html.escape(job['last_error'][:200])}</code>\n"
+    text += f"\n🔄 Fon vazifalari: {len(supervisor.active())} ta"
+    return text
+
+
+@admin_router.message(Command("health"))
+async def admin_health_command(message: Message):
+    """/health - davriy vazifalar holati (oxirgi ishga tushish, davomiylik, xatolar)"""
+    await message.answer(build_health_text())
+
+
+@admin_router.message(Command("job_run"), IsAdmin(ROLE_OWNER))
+async def admin_job_run_command(message: Message, command: CommandObject):
+    """/job_run <name> - davriy vazifani hozir ishga tushirish (faqat owner)"""
+    name = (command.args or "").strip()
+    if name not in jobs.jobs:
+        await message.answer(f"❗ Foydalanish: /job_run &lt;{'|'.join(jobs.jobs)}&gt;")
+        return
+    if jobs.jobs[name].lock.locked():
+        await message.answer(f"⏳ <b>{name}</b> hozir ishlayapti")
+        return
+
+    supervisor.spawn(jobs.run(name), name=f"job_run:{name}")
+    await message.answer(f"🚀 <b>{name}</b> ishga tushirildi. Natija: /health")
+
+
+@admin_router.message(Command("admins"))
+async def admin_list_command(message: Message):
+    """/admins - adminlar ro'yxati va rollari"""
+    text = "👮 <b>Adminlar</b>\n\n"
+    for user_id in admin_registry:
+        text += f"<code>{user_id}</code> - {admin_registry.role(user_id)}\n"
+    text += f"\nRollar: {', '.join(ROLES)}"
+    await message.answer(text)
+
+
+@admin_router.message(Command("admins_reload"), IsAdmin(ROLE_OWNER))
+async def admin_reload_command(message: Message, session: AsyncSession):
+    """/admins_reload - ADMIN_IDS va bazadan qayta yuklash"""
+    try:
+        await admin_registry.reload(session)
+        await message.answer(f"✅ Adminlar qayta yuklandi: {len(admin_registry)} ta")
     except Exception as e:
-        logging.error(f"Error in cancel_delete_free_link: {e}")
-        await callback.answer("❌ Xatolik yuz berdi")
+        logging.error(f"Error reloading admins: {e}")
+        await message.answer("❌ Xatolik yuz berdi")
 
 
-@admin_router.callback_query(F.data.startswith("delete_free_link_"))
-async def delete_free_link(callback: CallbackQuery, session: AsyncSession):
-    """Free link o'chirish"""
+@admin_router.message(Command("admin_add"), IsAdmin(ROLE_OWNER))
+async def admin_add_command(message: Message, command: CommandObject, session: AsyncSession):
+    """/admin_add <user_id> [role] - admin qo'shish (faqat owner)"""
+    args = (command.args or "").split()
+    role = args[1] if len(args) > 1 else ROLE_ADMIN
+    if not args or not args[0].isdigit() or role not in ROLES:
+        await message.answer(f"❗ Foydalanish: /admin_add &lt;user_id&gt; [{'|'.join(ROLES)}]")
+        return
+    
     try:
-        free_link_id = int(callback.data.split("_")[-1])
-        
-        await orm_delete_free_link(session, free_link_id)
-        
-        await callback.answer("✅ Free link o'chirildi")
-        
-        # Ro'yxatga qaytish
-        free_links = await orm_get_all_free_links(session)
-        
-        if not free_links:
-            await callback.message.edit_text(
-                "📋 <b>Free linklar ro'yxati</b>\n\n"
-                "❌ Hozircha free linklar mavjud emas.",
-                reply_markup=get_free_links_menu_kb()
-            )
-            return
-        
-        await callback.message.edit_text(
-            "📋 <b>Free linklar ro'yxati</b>\n\n"
-            "Free link tanlang:",
-            reply_markup=get_free_links_list_kb(free_links)
-        )
+        await orm_set_admin(session, int(args[0]), role)
+        await admin_registry.reload(session)
+        await message.answer(f"✅ <code>{args[0]}</code> admin qilindi ({role})")
     except Exception as e:
-        logging.error(f"Error in delete_free_link: {e}")
-        await callback.answer("❌ Xatolik yuz berdi")
+        logging.error(f"Error adding admin: {e}")
+        await message.answer("❌ Xatolik yuz berdi")
 
 
-# Free link state uchun cancel handler
-@admin_router.message(
-    F.text.in_(["❌ Bekor qilish", "/cancel"]), 
-    FreeLinkStates()
-)
-async def cancel_free_link_creation(message: Message, state: FSMContext):
-    """Free link yaratishni bekor qilish"""
-    await state.clear()
-    await message.answer(
-        "❌ <b>Free link yaratish bekor qilindi</b>",
-        reply_markup=get_free_links_menu_kb()
-    )
+@admin_router.message(Command("admin_remove"), IsAdmin(ROLE_OWNER))
+async def admin_remove_command(message: Message, command: CommandObject, session: AsyncSession):
+    """/admin_remove <user_id> - adminni o'chirish (ADMIN_IDS dagilar o'chmaydi)"""
+    user_id = (command.args or "").strip()
+    if not user_id.isdigit():
+        await message.answer("❗ Foydalanish: /admin_remove &lt;user_id&gt;")
+        return
+    
+    try:
+        removed = await orm_remove_admin(session, int(user_id))
+        await admin_registry.reload(session)
+        if int(user_id) in admin_registry:
+            await message.answer("⚠️ Bu admin ADMIN_IDS da ko'rsatilgan, uni .env dan o'chiring")
+        elif removed:
+            await message.answer(f"✅ <code>{user_id}</code> adminlikdan olindi")
+        else:
+            await message.answer("🚫 Bunday admin topilmadi")
+    except Exception as e:
+        logging.error(f"Error removing admin: {e}")
+        await message.answer("❌ Xatolik yuz berdi")
 
 
 # Возврат в главное меню для всех остальных сообщений (ENG OXIRIDA BO'LISHI KERAK!)
@@ -1928,4 +2313,4 @@ async def admin_unknown_message(message: Message):
         "🤔 Noma'lum buyruq.\n\n"
         "Admin paneliga qaytish uchun /admin ni bosing:",
         reply_markup=get_admin_menu_kb()
-    )
\ No newline at end of file
+    )
\ No newline at end of file
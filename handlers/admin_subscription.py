@@ -1,5 +1,5 @@
 import logging
-from aiogram import Router, F, types
+from aiogram import F, types
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -7,10 +7,12 @@ from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from filters.chat_types import ChatTypeFilter, IsAdmin
+from common.routing import IndexedRouter
 from kbds.reply import admin_kb
 from database.orm_query import (
     orm_create_subscription_plan,
-    orm_get_active_subscription_plans
+    orm_get_active_subscription_plans,
+    orm_get_subscription_stats
 )
 
 
@@ -22,8 +24,9 @@ class SubscriptionPlanStates(StatesGroup):
     waiting_for_channel_id = State()
 
 
-admin_subscription_router = Router()
+admin_subscription_router = IndexedRouter(name="admin_subscription")
 admin_subscription_router.message.filter(ChatTypeFilter(["private"]), IsAdmin())
+admin_subscription_router.callback_query.filter(IsAdmin())
 
 
 @admin_subscription_router.callback_query(F.data == "admin_plans_list")
@@ -174,26 +177,10 @@ async def admin_plan_channel_id(message: Message, state: FSMContext, session: As
 async def admin_subscription_stats(callback: CallbackQuery, session: AsyncSession):
     """Статистика по подпискам"""
     try:
-        from database.orm_query import select, Subscription, func
-        
-        # Общее количество подписок
-        total_query = select(func.count()).select_from(Subscription)
-        total_result = await session.execute(total_query)
-        total_subs = total_result.scalar() or 0
-        
-        # Активные подписки
-        active_query = select(func.count()).select_from(Subscription).where(
-            Subscription.is_active == True
-        )
-        active_result = await session.execute(active_query)
-        active_subs = active_result.scalar() or 0
-        
-        # Подтвержденные платежи
-        verified_query = select(func.count()).select_from(Subscription).where(
-            Subscription.payment_verified == True
-        )
-        verified_result = await session.execute(verified_query)
-        verified_subs = verified_result.scalar() or 0
+        stats = await orm_get_subscription_stats(session)
+        total_subs = stats['total']
+        active_subs = stats['active']
+        verified_subs = stats['verified']
         
         text = f"📊 <b>Obuna statistikasi</b>\n\n"
         text += f"📋 Jami obunalar: {total_subs}\n"
@@ -201,6 +188,8 @@ async def admin_subscription_stats(callback: CallbackQuery, session: AsyncSessio
         text += f"💳 To'langan obunalar: {verified_subs}\n"
         text += f"⏳ To'lanmagan: {total_subs - verified_subs}\n"
         
+        text += f"💰 Daromad: ${stats['revenue_usd']:,.2f} / {stats['revenue_uzs']:,} so'm\n"
+        
         if total_subs > 0:
             text += f"\n📈 Konversiya: {(verified_subs / total_subs * 100):.1f}%"
         
@@ -1,12 +1,15 @@
 import logging
 from aiogram.filters import CommandStart, Command
-from aiogram import Router, F, types
-from aiogram.types import Message, CallbackQuery
+from aiogram import F, types
+from aiogram.types import Message, CallbackQuery, InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from filters.chat_types import ChatTypeFilter
+from common.routing import IndexedRouter
+from kbds.callbacks import FunnelNextCb, PlanCb, PayCb
 from kbds.inline import (
     get_main_menu_kb, get_back_to_menu_kb, get_premium_menu_kb, 
     get_subscription_plans_kb, get_back_to_premium_menu_kb
@@ -16,12 +19,13 @@ from services.funnel import FunnelService
 from services.free_link import FreeLinkService
 from services.subscription import SubscriptionService
 from database.orm_query import (
-    orm_add_user, orm_get_active_subscription_plans, orm_get_user, 
+    orm_get_active_subscription_plans,
     orm_update_user_phone, orm_get_free_link_by_key
 )
+from database.user_upsert import upsert_user
 
 
-user_private_router = Router()
+user_private_router = IndexedRouter(name="user_private")
 user_private_router.message.filter(ChatTypeFilter(["private"]))
 
 
@@ -33,12 +37,8 @@ class UserStates(StatesGroup):
 async def start_cmd(message: Message, session: AsyncSession, state: FSMContext):
     """Команда /start"""
     try:
-        # Добавляем пользователя в базу данных
-        await orm_add_user(
-            session=session,
-            user_id=message.from_user.id,
-            full_name=message.from_user.full_name,
-        )
+        # Добавляем/обновляем пользователя одним INSERT ... ON CONFLICT и получаем его строку
+        user = await upsert_user(session, message.from_user.id, message.from_user.full_name)
         
         # Проверяем, не админ ли это (админы попадают в admin_private.py)
         logging.info(f"User {message.from_user.id} used /start command")
@@ -59,7 +59,6 @@ async def start_cmd(message: Message, session: AsyncSession, state: FSMContext):
                 return
         
         # Проверяем есть ли у пользователя telefon raqam
-        user = await orm_get_user(session, message.from_user.id)
         if not user or not user.phone:
             # Telefon raqam yo'q - so'raymiz
             await message.answer(
@@ -251,8 +250,6 @@ async def premium_plans_handler(callback: CallbackQuery, session: AsyncSession):
                 "Keyinroq qaytib ko'ring."
             )
             # Faqat orqaga qaytish tugmasi
-            from aiogram.types import InlineKeyboardButton
-            from aiogram.utils.keyboard import InlineKeyboardBuilder
             
             builder = InlineKeyboardBuilder()
             builder.add(InlineKeyboardButton(
@@ -377,11 +374,11 @@ async def back_to_menu_handler(callback: CallbackQuery):
 
 # ===================== FUNNEL ХЕНДЛЕРЫ =====================
 
-@user_private_router.callback_query(F.data.startswith("funnel_next:"))
-async def funnel_next_step_handler(callback: CallbackQuery, session: AsyncSession):
+@user_private_router.callback_query(FunnelNextCb.filter())
+async def funnel_next_step_handler(callback: CallbackQuery, callback_data: FunnelNextCb, session: AsyncSession):
     """Обработка перехода к следующему шагу воронки"""
     try:
-        step_number = int(callback.data.split(":")[1])
+        step_number = callback_data.step
         await FunnelService.next_funnel_step(callback, session, step_number)
     except Exception as e:
         logging.error(f"Error in funnel next step: {e}")
@@ -390,22 +387,22 @@ async def funnel_next_step_handler(callback: CallbackQuery, session: AsyncSessio
 
 # ===================== SUBSCRIPTION ХЕНДЛЕРЫ =====================
 
-@user_private_router.callback_query(F.data.startswith("plan:"))
-async def select_plan_handler(callback: CallbackQuery, session: AsyncSession):
+@user_private_router.callback_query(PlanCb.filter())
+async def select_plan_handler(callback: CallbackQuery, callback_data: PlanCb, session: AsyncSession):
     """Обработка выбора плана подписки"""
     try:
-        plan_id = int(callback.data.split(":")[1])
+        plan_id = callback_data.plan_id
         await SubscriptionService.select_plan(callback, session, plan_id)
     except Exception as e:
         logging.error(f"Error selecting plan: {e}")
         await callback.answer("❌ Xatolik yuz berdi")
 
 
-@user_private_router.callback_query(F.data.startswith("pay:"))
-async def payment_handler(callback: CallbackQuery, session: AsyncSession):
+@user_private_router.callback_query(PayCb.filter())
+async def payment_handler(callback: CallbackQuery, callback_data: PayCb, session: AsyncSession):
     """Обработка платежа"""
     try:
-        subscription_id = int(callback.data.split(":")[1])
+        subscription_id = callback_data.subscription_id
         await SubscriptionService.process_payment(callback, session, subscription_id)
     except Exception as e:
         logging.error(f"Error processing payment: {e}")
@@ -0,0 +1,148 @@
+from enum import Enum
+from typing import Annotated
+
+from aiogram.filters.callback_data import CallbackData
+from pydantic import Field
+
+
+# Telegram callback_data uchun limit (baytlarda)
+CALLBACK_DATA_LIMIT = 64
+_INT_WIDTH = len(str(-2 ** 63))
+
+
+# ===================== FOYDALANUVCHI =====================
+# Yuborilgan xabarlardagi tugmalar ishlashda davom etishi uchun eski format saqlangan
+
+class FunnelNextCb(CallbackData, prefix="funnel_next"):
+    step: int
+
+
+class PlanCb(CallbackData, prefix="plan"):
+    plan_id: int
+
+
+class PayCb(CallbackData, prefix="pay"):
+    subscription_id: int
+
+
+# ===================== ADMIN =====================
+
+class FunnelAction(str, Enum):
+    details = "d"
+    stats = "s"
+    edit = "e"
+    delete = "x"
+    confirm_delete = "X"
+
+
+class FunnelCb(CallbackData, prefix="f"):
+    action: FunnelAction
+    funnel_id: int
+
+
+class UsersPageCb(CallbackData, prefix="up"):
+    page: int
+
+
+class UserProfileCb(CallbackData, prefix="u"):
+    user_id: int
+
+
+class SubsPageCb(CallbackData, prefix="subs"):
+    """Aktiv obunalar: filtr (all, e7, u, p<plan_id>), yo'nalish (n/p), keyset kursor va sahifa"""
+    code: Annotated[str, Field(max_length=21)]
+    direction: Annotated[str, Field(pattern="^[np]$", max_length=1)]
+    cursor: Annotated[int, Field(ge=0, lt=10 ** 15)]
+    page: Annotated[int, Field(ge=0, lt=10 ** 6)]
+
+
+class ExportCb(CallbackData, prefix="export"):
+    kind: Annotated[str, Field(max_length=20)]
+    fmt: Annotated[str, Field(max_length=10)]
+
+
+class FreeLinkAction(str, Enum):
+    info = "i"
+    toggle = "t"
+    deactivate = "d"
+    confirm_deactivate = "D"
+    delete = "x"
+    confirm_delete = "X"
+    qr = "q"
+    analytics = "a"
+    refresh_analytics = "r"
+
+
+class FreeLinkCb(CallbackData, prefix="fl"):
+    action: FreeLinkAction
+    free_link_id: int
+
+
+class FreeLinkStatus(str, Enum):
+    all = "a"
+    active = "on"
+    inactive = "off"
+    exhausted = "full"
+
+
+class FreeLinksPageCb(CallbackData, prefix="fls"):
+    status: FreeLinkStatus
+    page: Annotated[int, Field(ge=0, lt=10 ** 6)]
+
+
+class MaxUsersCb(CallbackData, prefix="mu"):
+    value: int  # -1 - cheksiz
+
+
+class DurationCb(CallbackData, prefix="dur"):
+    days: int  # -1 - cheksiz
+
+
+CALLBACK_FACTORIES = (
+    FunnelNextCb, PlanCb, PayCb,
+    FunnelCb, UsersPageCb, UserProfileCb, SubsPageCb, ExportCb,
+    FreeLinkCb, FreeLinksPageCb, MaxUsersCb, DurationCb,
+)
+
+
+def max_packed_size(factory: type[CallbackData]) -> int:
+    """pack() natijasining eng katta mumkin bo'lgan hajmi (baytlarda)"""
+    size = len(factory.__prefix__.encode())
+    for name, field in factory.model_fields.items():
+        annotation = field.annotation
+        if isinstance(annotation, type) and issubclass(annotation, Enum):
+            width = max(len(str(member.value).encode()) for member in annotation)
+        elif annotation is bool:
+            width = 1
+        elif annotation is int:
+            # Field(ge=..., lt=...) chegaralari berilsa - ular bo'yicha
+            bounds = [
+                getattr(item, attr) for item in field.metadata
+                for attr in ('ge', 'gt', 'le', 'lt') if getattr(item, attr, None) is not None
+            ]
+            width = max(len(str(bound)) for bound in bounds) if len(bounds) >= 2 else _INT_WIDTH
+        else:
+            max_lengths = [item.max_length for item in field.metadata if hasattr(item, 'max_length')]
+            if not max_lengths:
+                raise ValueError(f"{factory.__name__}.{name}: max_length ko'rsatilmagan")
+            # Satr maydonlariga faqat ASCII kodlar yoziladi
+            width = max_lengths[0]
+        size += len(factory.__separator__) + width
+    return size
+
+
+def check_callback_factories(factories=CALLBACK_FACTORIES) -> None:
+    """Prefikslar takrorlanmasligi va 64 bayt limitiga sig'ishini import paytida tekshirish"""
+    prefixes = {}
+    for factory in factories:
+        if factory.__prefix__ in prefixes:
+            raise ValueError(
+                f"Callback prefix {factory.__prefix__!r} used by {prefixes[factory.__prefix__]} and {factory.__name__}"
+            )
+        prefixes[factory.__prefix__] = factory.__name__
+        size = max_packed_size(factory)
+        if size > CALLBACK_DATA_LIMIT:
+            raise ValueError(f"{factory.__name__} may pack to {size} bytes (limit {CALLBACK_DATA_LIMIT})")
+
+
+check_callback_factories()
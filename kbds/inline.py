@@ -1,6 +1,10 @@
 from aiogram.types import InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from database.models import SubscriptionPlan
+from kbds.callbacks import (
+    FunnelNextCb, PlanCb, PayCb, FunnelCb, FunnelAction, UsersPageCb, UserProfileCb,
+    SubsPageCb, ExportCb, FreeLinkCb, FreeLinkAction, FreeLinkStatus, FreeLinksPageCb, MaxUsersCb, DurationCb
+)
 
 
 # ===================== ОСНОВНЫЕ МЕНЮ =====================
@@ -77,10 +81,67 @@ def get_admin_menu_kb():
         callback_data="admin_free_links"
     ))
     
+    builder.add(InlineKeyboardButton(
+        text="📤 Eksport",
+        callback_data="admin_export"
+    ))
+    
+    builder.add(InlineKeyboardButton(
+        text="📈 Daromad",
+        callback_data="admin_revenue"
+    ))
+    
     builder.adjust(2)  # По две кнопки в ряд
     return builder.as_markup()
 
 
+def get_revenue_kb():
+    """Daromad analitikasi klaviaturasi"""
+    builder = InlineKeyboardBuilder()
+    
+    builder.add(InlineKeyboardButton(
+        text="🔄 Qayta hisoblash",
+        callback_data="admin_revenue_refresh"
+    ))
+    
+    builder.add(InlineKeyboardButton(
+        text="🔙 Admin menyuga qaytish",
+        callback_data="back_to_admin_menu"
+    ))
+    
+    builder.adjust(1)
+    return builder.as_markup()
+
+
+def get_export_menu_kb(parquet: bool = False):
+    """Eksport turini tanlash klaviaturasi (parquet=True - pyarrow o'rnatilgan, Parquet tugmalari ham)"""
+    builder = InlineKeyboardBuilder()
+    
+    exports = (
+        ("users", "👥 Foydalanuvchilar"),
+        ("subscriptions", "📋 Obunalar"),
+        ("funnel_stats", "📊 Funnel statistikasi"),
+    )
+    for kind, title in exports:
+        buttons = [InlineKeyboardButton(
+            text=f"{title} (CSV)",
+            callback_data=ExportCb(kind=kind, fmt="csv").pack()
+        )]
+        if parquet:
+            buttons.append(InlineKeyboardButton(
+                text="Parquet",
+                callback_data=ExportCb(kind=kind, fmt="parquet").pack()
+            ))
+        builder.row(*buttons)
+    
+    builder.row(InlineKeyboardButton(
+        text="🔙 Admin menyuga qaytish",
+        callback_data="back_to_admin_menu"
+    ))
+    
+    return builder.as_markup()
+
+
 def get_broadcast_kb():
     """Broadcast uchun keyboard"""
     builder = InlineKeyboardBuilder()
@@ -176,7 +237,7 @@ def get_funnel_next_step_kb(step_number: int, total_steps: int, button_text: str
     if step_number < total_steps:
         builder.add(InlineKeyboardButton(
             text=button_text,
-            callback_data=f"funnel_next:{step_number + 1}"
+            callback_data=FunnelNextCb(step=step_number + 1).pack()
         ))
     
     return builder.as_markup()
@@ -192,7 +253,7 @@ def get_subscription_plans_kb(plans: list[SubscriptionPlan]):
     for plan in plans:
         builder.add(InlineKeyboardButton(
             text=f"{plan.name} - ${plan.price_usd}",
-            callback_data=f"plan:{plan.id}"
+            callback_data=PlanCb(plan_id=plan.id).pack()
         ))
     
     # Кнопка возврата
@@ -211,7 +272,7 @@ def get_payment_kb(subscription_id: int, price_usd: float, price_uzs: int):
     
     builder.add(InlineKeyboardButton(
         text=f"💳 To'lash ${price_usd} / {price_uzs:,} so'm",
-        callback_data=f"pay:{subscription_id}"
+        callback_data=PayCb(subscription_id=subscription_id).pack()
     ))
     
     builder.add(InlineKeyboardButton(
@@ -233,12 +294,7 @@ def get_payment_verification_kb(subscription_id: int):
     """Клавиатура для подтверждения оплаты"""
     builder = InlineKeyboardBuilder()
     
-    builder.add(InlineKeyboardButton(
-        text="✅ To'lovni tasdiqlash",
-        callback_data=f"verify_payment:{subscription_id}"
-    ))
-    
-    # Кнопка возврата к планам
+    # To'lovni admin /verify_payment bilan tasdiqlaydi - foydalanuvchiga faqat qaytish tugmasi
     builder.add(InlineKeyboardButton(
         text="🔙 Tariflarga qaytish",
         callback_data="menu_premium"
@@ -370,7 +426,7 @@ def get_users_list_kb(users, page=0, per_page=10):
         
         builder.add(InlineKeyboardButton(
             text=f"👤 {user_name}",
-            callback_data=f"user_profile:{user_id}"
+            callback_data=UserProfileCb(user_id=user_id).pack()
         ))
     
     # Pagination tugmalari
@@ -378,13 +434,13 @@ def get_users_list_kb(users, page=0, per_page=10):
     if page > 0:
         nav_buttons.append(InlineKeyboardButton(
             text="⬅️ Oldingi",
-            callback_data=f"users_page:{page-1}"
+            callback_data=UsersPageCb(page=page - 1).pack()
         ))
     
     if end_idx < len(users):
         nav_buttons.append(InlineKeyboardButton(
             text="Keyingi ➡️",
-            callback_data=f"users_page:{page+1}"
+            callback_data=UsersPageCb(page=page + 1).pack()
         ))
     
     if nav_buttons:
@@ -400,24 +456,98 @@ def get_users_list_kb(users, page=0, per_page=10):
     return builder.as_markup()
 
 
-def get_user_profile_kb(user_id):
-    """Foydalanuvchi profili uchun keyboard"""
-    builder = InlineKeyboardBuilder()
+def get_pagination_kb(
+    page: int,
+    total_pages: int,
+    page_callback=None,
+    prev_callback: str | None = None,
+    next_callback: str | None = None,
+    back_callback: str = "back_to_admin_menu",
+    builder: InlineKeyboardBuilder | None = None
+):
+    """Sahifalash klaviaturasi: sahifa raqamlari, Oldingi/Keyingi va Orqaga tugmalari
+    
+    page_callback(p) berilsa raqamli sahifalar ko'rsatiladi (offset pagination).
+    Keyset pagination uchun faqat prev_callback/next_callback beriladi.
+    """
+    if builder is None:
+        builder = InlineKeyboardBuilder()
+    
+    if prev_callback is None and page_callback and page > 0:
+        prev_callback = page_callback(page - 1)
+    if next_callback is None and page_callback and page < total_pages - 1:
+        next_callback = page_callback(page + 1)
+    
+    # Page numbers navigation (like website pagination)
+    if total_pages > 1:
+        numbers = []
+        if page_callback:
+            # Show first page if not on first page and there are more than 3 pages
+            if page > 0 and total_pages > 3:
+                numbers.append(InlineKeyboardButton(text="1", callback_data=page_callback(0)))
+                if page > 2:
+                    numbers.append(InlineKeyboardButton(text="...", callback_data="noop"))
+            
+            # Show current page and adjacent pages
+            for p in range(max(0, page - 1), min(total_pages, page + 2)):
+                if p == page:
+                    numbers.append(InlineKeyboardButton(text=f"• {p + 1} •", callback_data="noop"))
+                else:
+                    numbers.append(InlineKeyboardButton(text=str(p + 1), callback_data=page_callback(p)))
+            
+            # Show last page if not on last page and there are more than 3 pages
+            if page < total_pages - 1 and total_pages > 3:
+                if page < total_pages - 3:
+                    numbers.append(InlineKeyboardButton(text="...", callback_data="noop"))
+                numbers.append(InlineKeyboardButton(
+                    text=str(total_pages), callback_data=page_callback(total_pages - 1)
+                ))
+        else:
+            numbers.append(InlineKeyboardButton(
+                text=f"• {page + 1} / {total_pages} •", callback_data="noop"
+            ))
+        builder.row(*numbers)
     
-    builder.add(InlineKeyboardButton(
-        text="📊 Statistika",
-        callback_data=f"user_stats:{user_id}"
-    ))
+    # Navigation buttons
+    nav_buttons = []
+    if prev_callback:
+        nav_buttons.append(InlineKeyboardButton(text="⬅️ Oldingi", callback_data=prev_callback))
+    if next_callback:
+        nav_buttons.append(InlineKeyboardButton(text="Keyingi ➡️", callback_data=next_callback))
+    if nav_buttons:
+        builder.row(*nav_buttons)
     
-    builder.add(InlineKeyboardButton(
-        text="📝 Xabar yuborish",
-        callback_data=f"send_message:{user_id}"
-    ))
+    # Back button
+    builder.row(InlineKeyboardButton(text="🔙 Orqaga", callback_data=back_callback))
+    return builder.as_markup()
+
+
+def get_subscriptions_filter_kb(current_filter: str, plans) -> InlineKeyboardBuilder:
+    """Aktiv obunalar ro'yxati uchun filtr tugmalari (builder qaytaradi)"""
+    builder = InlineKeyboardBuilder()
     
-    builder.add(InlineKeyboardButton(
-        text="🚫 Bloklash",
-        callback_data=f"block_user:{user_id}"
-    ))
+    filters = [
+        ("all", "📋 Hammasi"),
+        ("e7", "⏳ 7 kunda tugaydi"),
+        ("u", "💳 To'lanmagan"),
+    ]
+    filters += [(f"p{plan.id}", f"💎 {plan.name}") for plan in plans]
+    
+    buttons = [
+        InlineKeyboardButton(
+            text=f"✅ {text}" if code == current_filter else text,
+            callback_data=SubsPageCb(code=code, direction="n", cursor=0, page=0).pack()
+        )
+        for code, text in filters
+    ]
+    for i in range(0, len(buttons), 3):
+        builder.row(*buttons[i:i + 3])
+    return builder
+
+
+def get_user_profile_kb(user_id):
+    """Foydalanuvchi profili uchun keyboard"""
+    builder = InlineKeyboardBuilder()
     
     builder.add(InlineKeyboardButton(
         text="🔙 Foydalanuvchilarga",
@@ -435,7 +565,7 @@ def get_funnels_list_kb(funnels):
     for funnel in funnels:
         builder.add(InlineKeyboardButton(
             text=f"🎯 {funnel.name}",
-            callback_data=f"funnel_details:{funnel.id}"
+            callback_data=FunnelCb(action=FunnelAction.details, funnel_id=funnel.id).pack()
         ))
     
     builder.add(InlineKeyboardButton(
@@ -458,17 +588,17 @@ def get_funnel_details_kb(funnel_id):
     
     builder.add(InlineKeyboardButton(
         text="📊 Statistika",
-        callback_data=f"funnel_stats:{funnel_id}"
+        callback_data=FunnelCb(action=FunnelAction.stats, funnel_id=funnel_id).pack()
     ))
     
     builder.add(InlineKeyboardButton(
         text="✏️ Tahrirlash",
-        callback_data=f"funnel_edit:{funnel_id}"
+        callback_data=FunnelCb(action=FunnelAction.edit, funnel_id=funnel_id).pack()
     ))
     
     builder.add(InlineKeyboardButton(
         text="🗑 O'chirish",
-        callback_data=f"funnel_delete:{funnel_id}"
+        callback_data=FunnelCb(action=FunnelAction.delete, funnel_id=funnel_id).pack()
     ))
     
     builder.add(InlineKeyboardButton(
@@ -484,12 +614,7 @@ def get_subscriptions_list_kb(plans):
     """Obunalar ro'yxati uchun keyboard"""
     builder = InlineKeyboardBuilder()
     
-    for plan in plans:
-        builder.add(InlineKeyboardButton(
-            text=f"💎 {plan.name} - ${plan.price_usd}",
-            callback_data=f"subscription_details:{plan.id}"
-        ))
-    
+    # Tariflar matnda ko'rsatiladi (alohida tarif sahifasi yo'q)
     builder.add(InlineKeyboardButton(
         text="➕ Yangi tarif yaratish",
         callback_data="admin_add_plan"
@@ -504,34 +629,6 @@ def get_subscriptions_list_kb(plans):
     return builder.as_markup()
 
 
-def get_subscription_details_kb(plan_id):
-    """Obuna tafsilotlari uchun keyboard"""
-    builder = InlineKeyboardBuilder()
-    
-    builder.add(InlineKeyboardButton(
-        text="📊 Statistika",
-        callback_data=f"subscription_stats:{plan_id}"
-    ))
-    
-    builder.add(InlineKeyboardButton(
-        text="✏️ Tahrirlash",
-        callback_data=f"subscription_edit:{plan_id}"
-    ))
-    
-    builder.add(InlineKeyboardButton(
-        text="🗑 O'chirish",
-        callback_data=f"subscription_delete:{plan_id}"
-    ))
-    
-    builder.add(InlineKeyboardButton(
-        text="🔙 Obunalar ro'yxati",
-        callback_data="admin_subscriptions"
-    ))
-    
-    builder.adjust(1)
-    return builder.as_markup()
-
-
 def get_premium_menu_kb():
     """Premium obuna menyusi"""
     builder = InlineKeyboardBuilder()
@@ -576,6 +673,11 @@ def get_free_links_menu_kb():
         callback_data="free_links_list"
     ))
     
+    builder.add(InlineKeyboardButton(
+        text="📦 Ommaviy yaratish",
+        callback_data="free_links_bulk"
+    ))
+    
     builder.add(InlineKeyboardButton(
         text="🔙 Orqaga",
         callback_data="back_to_admin_menu"
@@ -585,52 +687,92 @@ def get_free_links_menu_kb():
     return builder.as_markup()
 
 
-def get_free_links_list_kb(free_links):
-    """Free linklar ro'yxati klaviaturasi"""
+FREE_LINK_STATUS_LABELS = {
+    FreeLinkStatus.all: "Hammasi",
+    FreeLinkStatus.active: "🟢 Faol",
+    FreeLinkStatus.exhausted: "🟡 Tugagan",
+    FreeLinkStatus.inactive: "🔴 Nofaol",
+}
+
+
+def get_free_links_list_kb(rows, status: FreeLinkStatus = FreeLinkStatus.all, page: int = 0,
+                           total_pages: int = 1, searching: bool = False):
+    """Free linklar ro'yxati klaviaturasi: filtrlar, linklar (foydalanishlar va aktiv a'zolar), qidiruv va sahifalar"""
     builder = InlineKeyboardBuilder()
     
-    for link in free_links:
-        status = "🟢" if link.is_active else "🔴"
-        builder.add(InlineKeyboardButton(
-            text=f"{status} {link.name} ({link.current_uses}/{link.max_uses})",
-            callback_data=f"free_link_info_{link.id}"
+    filter_buttons = [
+        InlineKeyboardButton(
+            text=f"✅ {label}" if code == status else label,
+            callback_data=FreeLinksPageCb(status=code, page=0).pack()
+        )
+        for code, label in FREE_LINK_STATUS_LABELS.items()
+    ]
+    builder.row(*filter_buttons)
+    
+    for link, redemptions, active_members in rows:
+        if not link.is_active:
+            icon = "🔴"
+        elif link.max_uses != -1 and link.current_uses >= link.max_uses:
+            icon = "🟡"
+        else:
+            icon = "🟢"
+        max_uses = "∞" if link.max_uses == -1 else link.max_uses
+        builder.row(InlineKeyboardButton(
+            text=f"{icon} {link.name} ({redemptions}/{max_uses}) 👥 {active_members}",
+            callback_data=FreeLinkCb(action=FreeLinkAction.info, free_link_id=link.id).pack()
         ))
     
-    builder.add(InlineKeyboardButton(
-        text="🔙 Orqaga",
-        callback_data="admin_free_links"
-    ))
+    if searching:
+        builder.row(InlineKeyboardButton(text="❌ Qidiruvni tozalash", callback_data="free_links_search_clear"))
+    else:
+        builder.row(InlineKeyboardButton(text="🔍 Qidirish", callback_data="free_links_search"))
     
-    builder.adjust(1)
-    return builder.as_markup()
+    return get_pagination_kb(
+        page,
+        total_pages,
+        page_callback=lambda p: FreeLinksPageCb(status=status, page=p).pack(),
+        back_callback="admin_free_links",
+        builder=builder
+    )
 
 
-def get_free_link_info_kb(free_link_id, is_active=True):
-    """Free link ma'lumotlari klaviaturasi"""
+def get_free_link_info_kb(free_link_id, is_active=True, qr=True):
+    """Free link ma'lumotlari klaviaturasi (qr=False - segno o'rnatilmagan, QR tugmasi yo'q)"""
     builder = InlineKeyboardBuilder()
     
     # Status boshqarish tugmasi
     if is_active:
         builder.add(InlineKeyboardButton(
             text="🔴 Faolsizlashtirish",
-            callback_data=f"toggle_free_link_{free_link_id}"
+            callback_data=FreeLinkCb(action=FreeLinkAction.toggle, free_link_id=free_link_id).pack()
         ))
     else:
         builder.add(InlineKeyboardButton(
             text="🟢 Faollashtirish",
-            callback_data=f"toggle_free_link_{free_link_id}"
+            callback_data=FreeLinkCb(action=FreeLinkAction.toggle, free_link_id=free_link_id).pack()
         ))
     
     # Yumshoq o'chirish (faolsizlashtirish)
     builder.add(InlineKeyboardButton(
         text="🚫 Deaktivatsiya",
-        callback_data=f"deactivate_free_link_{free_link_id}"
+        callback_data=FreeLinkCb(action=FreeLinkAction.deactivate, free_link_id=free_link_id).pack()
     ))
     
     # Qattiq o'chirish (butunlay olib tashlash)
     builder.add(InlineKeyboardButton(
         text="🗑️ Butunlay o'chirish",
-        callback_data=f"permanent_delete_free_link_{free_link_id}"
+        callback_data=FreeLinkCb(action=FreeLinkAction.delete, free_link_id=free_link_id).pack()
+    ))
+    
+    if qr:
+        builder.add(InlineKeyboardButton(
+            text="📷 QR kod",
+            callback_data=FreeLinkCb(action=FreeLinkAction.qr, free_link_id=free_link_id).pack()
+        ))
+    
+    builder.add(InlineKeyboardButton(
+        text="📈 Analitika",
+        callback_data=FreeLinkCb(action=FreeLinkAction.analytics, free_link_id=free_link_id).pack()
     ))
     
     builder.add(InlineKeyboardButton(
@@ -638,7 +780,25 @@ def get_free_link_info_kb(free_link_id, is_active=True):
         callback_data="free_links_list"
     ))
     
-    builder.adjust(1, 2, 1)
+    builder.adjust(*((1, 2, 1, 2, 1) if qr else (1, 2, 1, 1)))
+    return builder.as_markup()
+
+
+def get_free_link_analytics_kb(free_link_id):
+    """Free link analitikasi klaviaturasi"""
+    builder = InlineKeyboardBuilder()
+    
+    builder.add(InlineKeyboardButton(
+        text="🔄 Qayta hisoblash",
+        callback_data=FreeLinkCb(action=FreeLinkAction.refresh_analytics, free_link_id=free_link_id).pack()
+    ))
+    
+    builder.add(InlineKeyboardButton(
+        text="🔙 Orqaga",
+        callback_data=FreeLinkCb(action=FreeLinkAction.info, free_link_id=free_link_id).pack()
+    ))
+    
+    builder.adjust(1)
     return builder.as_markup()
 
 
@@ -654,6 +814,18 @@ def get_free_link_cancel_kb():
     return builder.as_markup()
 
 
+def get_free_links_search_cancel_kb():
+    """Free link qidiruvini bekor qilish"""
+    builder = InlineKeyboardBuilder()
+    
+    builder.add(InlineKeyboardButton(
+        text="❌ Bekor qilish",
+        callback_data="free_links_list"
+    ))
+    
+    return builder.as_markup()
+
+
 def get_freelink_access_kb(channel_invite_link):
     """Freelink orqali kirgan foydalanuvchi uchun kanal tugmasi"""
     builder = InlineKeyboardBuilder()
@@ -672,18 +844,18 @@ def get_max_users_selection_kb():
     builder = InlineKeyboardBuilder()
     
     # Birinchi qator - kichik raqamlar
-    builder.add(InlineKeyboardButton(text="1", callback_data="max_users_1"))
-    builder.add(InlineKeyboardButton(text="5", callback_data="max_users_5"))
-    builder.add(InlineKeyboardButton(text="10", callback_data="max_users_10"))
+    builder.add(InlineKeyboardButton(text="1", callback_data=MaxUsersCb(value=1).pack()))
+    builder.add(InlineKeyboardButton(text="5", callback_data=MaxUsersCb(value=5).pack()))
+    builder.add(InlineKeyboardButton(text="10", callback_data=MaxUsersCb(value=10).pack()))
     
     # Ikkinchi qator - o'rta raqamlar
-    builder.add(InlineKeyboardButton(text="25", callback_data="max_users_25"))
-    builder.add(InlineKeyboardButton(text="50", callback_data="max_users_50"))
-    builder.add(InlineKeyboardButton(text="100", callback_data="max_users_100"))
+    builder.add(InlineKeyboardButton(text="25", callback_data=MaxUsersCb(value=25).pack()))
+    builder.add(InlineKeyboardButton(text="50", callback_data=MaxUsersCb(value=50).pack()))
+    builder.add(InlineKeyboardButton(text="100", callback_data=MaxUsersCb(value=100).pack()))
     
     # Uchinchi qator - katta raqamlar va cheksiz
-    builder.add(InlineKeyboardButton(text="500", callback_data="max_users_500"))
-    builder.add(InlineKeyboardButton(text="♾️ Cheksiz", callback_data="max_users_unlimited"))
+    builder.add(InlineKeyboardButton(text="500", callback_data=MaxUsersCb(value=500).pack()))
+    builder.add(InlineKeyboardButton(text="♾️ Cheksiz", callback_data=MaxUsersCb(value=-1).pack()))
     
     # Bekor qilish tugmasi
     builder.add(InlineKeyboardButton(text="❌ Bekor qilish", callback_data="admin_free_links"))
@@ -697,19 +869,19 @@ def get_duration_selection_kb():
     builder = InlineKeyboardBuilder()
     
     # Birinchi qator - kunlar
-    builder.add(InlineKeyboardButton(text="1 kun", callback_data="duration_1_day"))
-    builder.add(InlineKeyboardButton(text="3 kun", callback_data="duration_3_days"))
-    builder.add(InlineKeyboardButton(text="7 kun", callback_data="duration_7_days"))
+    builder.add(InlineKeyboardButton(text="1 kun", callback_data=DurationCb(days=1).pack()))
+    builder.add(InlineKeyboardButton(text="3 kun", callback_data=DurationCb(days=3).pack()))
+    builder.add(InlineKeyboardButton(text="7 kun", callback_data=DurationCb(days=7).pack()))
     
     # Ikkinchi qator - haftalar
-    builder.add(InlineKeyboardButton(text="2 hafta", callback_data="duration_14_days"))
-    builder.add(InlineKeyboardButton(text="1 oy", callback_data="duration_30_days"))
-    builder.add(InlineKeyboardButton(text="3 oy", callback_data="duration_90_days"))
+    builder.add(InlineKeyboardButton(text="2 hafta", callback_data=DurationCb(days=14).pack()))
+    builder.add(InlineKeyboardButton(text="1 oy", callback_data=DurationCb(days=30).pack()))
+    builder.add(InlineKeyboardButton(text="3 oy", callback_data=DurationCb(days=90).pack()))
     
     # Uchinchi qator - uzoq muddat
-    builder.add(InlineKeyboardButton(text="6 oy", callback_data="duration_180_days"))
-    builder.add(InlineKeyboardButton(text="1 yil", callback_data="duration_365_days"))
-    builder.add(InlineKeyboardButton(text="♾️ Cheksiz", callback_data="duration_unlimited"))
+    builder.add(InlineKeyboardButton(text="6 oy", callback_data=DurationCb(days=180).pack()))
+    builder.add(InlineKeyboardButton(text="1 yil", callback_data=DurationCb(days=365).pack()))
+    builder.add(InlineKeyboardButton(text="♾️ Cheksiz", callback_data=DurationCb(days=-1).pack()))
     
     # Bekor qilish tugmasi
     builder.add(InlineKeyboardButton(text="❌ Bekor qilish", callback_data="admin_free_links"))
@@ -725,20 +897,20 @@ def get_delete_confirmation_kb(free_link_id, delete_type="permanent"):
     if delete_type == "permanent":
         builder.add(InlineKeyboardButton(
             text="✅ Ha, butunlay o'chirish",
-            callback_data=f"confirm_permanent_delete_{free_link_id}"
+            callback_data=FreeLinkCb(action=FreeLinkAction.confirm_delete, free_link_id=free_link_id).pack()
         ))
         builder.add(InlineKeyboardButton(
             text="❌ Yo'q, bekor qilish",
-            callback_data=f"free_link_info_{free_link_id}"
+            callback_data=FreeLinkCb(action=FreeLinkAction.info, free_link_id=free_link_id).pack()
         ))
     else:  # deactivate
         builder.add(InlineKeyboardButton(
             text="✅ Ha, deaktivatsiya qilish",
-            callback_data=f"confirm_deactivate_{free_link_id}"
+            callback_data=FreeLinkCb(action=FreeLinkAction.confirm_deactivate, free_link_id=free_link_id).pack()
         ))
         builder.add(InlineKeyboardButton(
             text="❌ Yo'q, bekor qilish",
-            callback_data=f"free_link_info_{free_link_id}"
+            callback_data=FreeLinkCb(action=FreeLinkAction.info, free_link_id=free_link_id).pack()
         ))
     
     builder.adjust(1, 1)
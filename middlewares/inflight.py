@@ -0,0 +1,30 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from common.tasks import TaskSupervisor, supervisor
+
+
+class InFlightMiddleware(BaseMiddleware):
+    """Ishlanayotgan update larni kuzatish - to'xtatishda ular tugashi kutiladi (outer middleware)
+
+    Polling har bir update ni alohida task da ishlaydi (handle_as_tasks=True).
+    """
+
+    def __init__(self, tasks: TaskSupervisor = supervisor):
+        self.tasks = tasks
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        task = asyncio.current_task()
+        self.tasks.enter(task, f"update:{getattr(event, 'update_id', '?')}")
+        try:
+            return await handler(event, data)
+        finally:
+            self.tasks.exit(task)
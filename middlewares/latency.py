@@ -0,0 +1,119 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import TelegramObject
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from services.metrics import (
+    LatencyRegistry,
+    latency_registry,
+    updates_total,
+    telegram_api_requests_total,
+    telegram_api_errors_total
+)
+
+
+class UpdateTiming:
+    """Bitta update davomida to'planadigan vaqtlar"""
+
+    __slots__ = ('handler', 'db', 'api')
+
+    def __init__(self) -> None:
+        self.handler: Optional[str] = None
+        self.db = 0.0
+        self.api = 0.0
+
+
+_current_timing: ContextVar[Optional[UpdateTiming]] = ContextVar('update_timing', default=None)
+
+
+class LatencyMiddleware(BaseMiddleware):
+    """Har bir update ni handler nomi bo'yicha o'lchash (outer middleware)"""
+
+    def __init__(self, registry: LatencyRegistry = latency_registry):
+        self.registry = registry
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        updates_total.inc(getattr(event, 'event_type', 'unknown'))
+        timing = UpdateTiming()
+        token = _current_timing.set(timing)
+        started = time.perf_counter()
+        error = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            error = True
+            raise
+        finally:
+            total_ms = (time.perf_counter() - started) * 1000
+            _current_timing.reset(token)
+            self.registry.record(
+                timing.handler or 'unhandled', total_ms, timing.db * 1000, timing.api * 1000, error
+            )
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Tanlangan handler nomini joriy update vaqtlariga yozish (inner middleware)"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        timing = _current_timing.get()
+        handler_object = data.get('handler')
+        if timing is not None and handler_object is not None:
+            timing.handler = getattr(handler_object.callback, '__name__', 'unknown')
+        return await handler(event, data)
+
+
+class ApiTimingMiddleware(BaseRequestMiddleware):
+    """Telegram Bot API so'rovlari vaqtini joriy update ga qo'shish"""
+
+    async def __call__(self, make_request, bot, method):
+        api_method = getattr(method, '__api_method__', type(method).__name__)
+        telegram_api_requests_total.inc(api_method)
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            telegram_api_errors_total.inc(api_method, type(e).__name__)
+            raise
+        finally:
+            timing = _current_timing.get()
+            if timing is not None:
+                timing.api += time.perf_counter() - started
+
+
+def setup_db_timing(engine: AsyncEngine) -> None:
+    """SQL so'rovlari vaqtini joriy update ga qo'shish uchun engine eventlari"""
+
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        timing = _current_timing.get()
+        if timing is not None:
+            timing.db += time.perf_counter() - started
+
+    @event.listens_for(engine.sync_engine, 'handle_error')
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_started'):
+            connection.info['query_started'].pop()
+
+    logging.info("DB timing listeners installed")
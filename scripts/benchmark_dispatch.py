@@ -0,0 +1,139 @@
+"""
+Бенчмарк накладных расходов диспетчеризации: время от feed_update до выбора хендлера
+(сам хендлер не вызывается), для ROUTER_FAST_PATH=0 (прежняя линейная проверка фильтров)
+и ROUTER_FAST_PATH=1 (AdminGateRouter + индекс callback_data)
+
+    python scripts/benchmark_dispatch.py --iterations 2000
+
+Каждый вариант запускается в отдельном процессе; заодно проверяется, что оба варианта
+выбирают одни и те же хендлеры.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Добавляем корневую папку в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+ADMIN_ID = 1_000
+USER_ID = 700_000_001
+
+# (название, отправитель, тип апдейта, текст или callback_data)
+SCENARIOS = [
+    ('user /start', USER_ID, 'message', '/start'),
+    ('user text', USER_ID, 'message', 'salom'),
+    ('user funnel_next', USER_ID, 'callback', 'funnel_next:2'),
+    ('user plan', USER_ID, 'callback', 'plan:1'),
+    ('user menu_help', USER_ID, 'callback', 'menu_help'),
+    ('user unknown callback', USER_ID, 'callback', 'something_else'),
+    ('user forged admin_stats', USER_ID, 'callback', 'admin_stats'),
+    ('admin /admin', ADMIN_ID, 'message', '/admin'),
+    ('admin admin_stats', ADMIN_ID, 'callback', 'admin_stats'),
+    ('admin users_page', ADMIN_ID, 'callback', 'up:2'),
+    ('admin free_link_info', ADMIN_ID, 'callback', 'fl:i:7'),
+    ('admin forged free_link', ADMIN_ID, 'callback', 'fl:q:7'),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Per-update dispatch overhead benchmark")
+    parser.add_argument('--iterations', type=int, default=1000, help="Апдейтов на сценарий")
+    parser.add_argument('--worker', choices=['0', '1'], help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def build_update(update_id: int, user_id: int, kind: str, payload: str) -> dict:
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'Bench'}
+    message = {
+        'message_id': update_id, 'date': int(datetime.now().timestamp()),
+        'chat': {'id': user_id, 'type': 'private', 'first_name': 'Bench'}, 'from': user, 'text': payload,
+    }
+    if kind == 'message':
+        if payload.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(payload.split()[0])}]
+        return {'update_id': update_id, 'message': message}
+    return {
+        'update_id': update_id,
+        'callback_query': {'id': str(update_id), 'from': user, 'chat_instance': '1', 'data': payload,
+                           'message': {**message, 'text': 'previous'}},
+    }
+
+
+async def run_worker(iterations: int) -> dict:
+    from aiogram.types import Update
+
+    import app
+
+    resolved = {}
+
+    async def capture(handler, event, data):
+        # Вместо вызова хендлера запоминаем, какой был выбран
+        return data['handler'].callback.__name__
+
+    app.dp.message.middleware(capture)
+    app.dp.callback_query.middleware(capture)
+
+    results = {}
+    update_id = 0
+    for name, user_id, kind, payload in SCENARIOS:
+        updates = []
+        for _ in range(iterations):
+            update_id += 1
+            raw = build_update(update_id, user_id, kind, payload)
+            updates.append(Update.model_validate(raw, context={'bot': app.bot}))
+
+        resolved[name] = await app.dp.feed_update(app.bot, updates[0])
+        started = time.perf_counter()
+        for update in updates:
+            await app.dp.feed_update(app.bot, update)
+        results[name] = (time.perf_counter() - started) / iterations * 1e6
+
+    await app.bot.session.close()
+    return {'us_per_update': results, 'handlers': {k: str(v) for k, v in resolved.items()}}
+
+
+def run_variant(fast_path: str, iterations: int) -> dict:
+    env = {
+        **os.environ,
+        'ROUTER_FAST_PATH': fast_path,
+        'ADMIN_IDS': str(ADMIN_ID),
+        'TOKEN': os.environ.get('TOKEN', '123456:BENCH-TOKEN'),
+        'METRICS_PORT': '0',
+        'DATABASE_URL': f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}",
+    }
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', fast_path, '--iterations', str(iterations)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    args = parse_args()
+    if args.worker is not None:
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(asyncio.run(run_worker(args.iterations))))
+        return
+
+    legacy = run_variant('0', args.iterations)
+    fast = run_variant('1', args.iterations)
+
+    print(f"🚦 Dispatch overhead, {args.iterations} updates per scenario (µs/update)")
+    print(f"{'scenario':<28}{'legacy':>10}{'fast':>10}{'speedup':>10}  handler")
+    for name, *_ in SCENARIOS:
+        old, new = legacy['us_per_update'][name], fast['us_per_update'][name]
+        handler = fast['handlers'][name]
+        mark = '' if handler == legacy['handlers'][name] else f"  ⚠️ legacy: {legacy['handlers'][name]}"
+        print(f"{name:<28}{old:>10.1f}{new:>10.1f}{old / new:>9.1f}x  {handler}{mark}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Микро-бенчмарк фильтра IsAdmin: старый вариант (поиск в list + logging.info на каждый вызов)
+против AdminRegistry (frozenset, без логирования)
+
+    python scripts/benchmark_filters.py --admins 50 --calls 200000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Добавляем корневую папку в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="IsAdmin filter micro-benchmark")
+    parser.add_argument('--admins', type=int, default=10, help="Количество админов")
+    parser.add_argument('--calls', type=int, default=100_000, help="Вызовов фильтра на вариант")
+    parser.add_argument('--admin-share', type=float, default=0.01, help="Доля сообщений от админов")
+    return parser.parse_args()
+
+
+class LegacyIsAdmin:
+    """Прежняя реализация filters.chat_types.IsAdmin"""
+
+    async def __call__(self, message, bot) -> bool:
+        user_id = message.from_user.id
+        is_admin = user_id in bot.my_admins_list
+        logging.info(f"IsAdmin filter: user_id={user_id}, admin_list={bot.my_admins_list}, is_admin={is_admin}")
+        return is_admin
+
+
+async def measure(name, call, events) -> float:
+    started = time.perf_counter()
+    for event in events:
+        await call(event)
+    elapsed = time.perf_counter() - started
+    print(f"  {name:<28}{elapsed / len(events) * 1e9:>10.0f} ns/call")
+    return elapsed
+
+
+async def main():
+    args = parse_args()
+    os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+
+    from common.admins import admin_registry
+    from filters.chat_types import IsAdmin
+
+    # Как в app.py: INFO в stderr; перенаправляем в /dev/null, чтобы мерить форматирование, а не терминал
+    logging.basicConfig(level=logging.INFO, stream=open(os.devnull, 'w'))
+
+    admin_ids = list(range(1_000, 1_000 + args.admins))
+    admin_registry.set({user_id: 'owner' for user_id in admin_ids})
+    bot = SimpleNamespace(my_admins_list=admin_ids)
+
+    every = max(1, int(1 / args.admin_share)) if args.admin_share else 0
+    events = [
+        SimpleNamespace(from_user=SimpleNamespace(
+            id=admin_ids[i % len(admin_ids)] if every and i % every == 0 else 10_000_000 + i
+        ))
+        for i in range(args.calls)
+    ]
+
+    legacy, current = LegacyIsAdmin(), IsAdmin()
+    print(f"🔐 IsAdmin: {args.admins} admins, {args.calls:,} calls, admin share {args.admin_share}")
+    old = await measure('list + logging.info', lambda event: legacy(event, bot), events)
+    new = await measure('AdminRegistry (frozenset)', current, events)
+    await measure("AdminRegistry + role", IsAdmin('owner'), events)
+    print(f"\n⚡ {old / new:.1f}x faster")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+"""
+Время холодного старта: python -X importtime -c "import app" в отдельных процессах
+
+    python scripts/benchmark_importtime.py --runs 5
+    python scripts/benchmark_importtime.py --budget-ms 150 --json importtime.json
+    python scripts/benchmark_importtime.py --compare importtime.json --threshold 20
+
+Бюджет (--budget-ms) считается по собственному (self) времени модулей проекта -
+сторонние пакеты (aiogram, sqlalchemy, pydantic) от нас не зависят и сильно шумят.
+Скрипт завершается с кодом 1, если медиана превысила бюджет или (--compare) выросла больше порога.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Пакеты проекта (всё остальное - сторонние)
+FIRST_PARTY = {'app', 'handlers', 'services', 'common', 'kbds', 'database', 'middlewares', 'filters'}
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import time benchmark")
+    parser.add_argument('--module', default='app', help="Импортируемый модуль")
+    parser.add_argument('--runs', type=int, default=5, help="Количество запусков (берется медиана)")
+    parser.add_argument('--budget-ms', type=float, default=150.0, help="Бюджет self-времени модулей проекта, мс")
+    parser.add_argument('--top', type=int, default=15, help="Сколько модулей показывать")
+    parser.add_argument('--json', default='importtime_report.json', help="Куда сохранить отчет")
+    parser.add_argument('--compare', help="Прошлый отчет для сравнения")
+    parser.add_argument('--threshold', type=float, default=20.0, help="Допустимый рост, %%")
+    return parser.parse_args()
+
+
+def run_once(module: str) -> list[tuple[str, int, float, float]]:
+    """Один запуск: [(module, depth, self_ms, cumulative_ms)]"""
+    env = {
+        **os.environ,
+        # app.py создает Bot при импорте - нужен синтаксически корректный токен
+        'TOKEN': os.environ.get('TOKEN') or '123456:benchmark',
+        'DATABASE_URL': os.environ.get('DATABASE_URL') or 'sqlite+aiosqlite:///:memory:',
+        'METRICS_PORT': '0',
+    }
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, len(indent) // 2, int(self_us) / 1000, int(cumulative_us) / 1000))
+    return modules
+
+
+def summarize(modules: list[tuple[str, int, float, float]], module: str) -> dict:
+    first_party = {}
+    third_party = defaultdict(float)
+    total = 0.0
+    for name, depth, self_ms, cumulative_ms in modules:
+        if name.split('.')[0] in FIRST_PARTY:
+            first_party[name] = self_ms
+        if name == module:
+            total = cumulative_ms
+
+    # Сторонние пакеты: cumulative время модулей, импортированных напрямую из модулей проекта.
+    # importtime печатает модуль после его зависимостей, поэтому идем с конца (родитель раньше детей)
+    stack: list[tuple[int, str]] = []
+    for name, depth, self_ms, cumulative_ms in reversed(modules):
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        parent = stack[-1][1] if stack else None
+        package = name.split('.')[0]
+        if package not in FIRST_PARTY and parent is not None and parent.split('.')[0] in FIRST_PARTY:
+            third_party[package] += cumulative_ms
+        stack.append((depth, name))
+    return {
+        'total_ms': total,
+        'first_party_ms': sum(first_party.values()),
+        'first_party': first_party,
+        'third_party': dict(third_party),
+    }
+
+
+def median_report(runs: list[dict]) -> dict:
+    def median_of(key: str) -> dict:
+        names = set().union(*(run[key] for run in runs))
+        return {name: statistics.median(run[key].get(name, 0.0) for run in runs) for name in names}
+
+    return {
+        'total_ms': statistics.median(run['total_ms'] for run in runs),
+        'first_party_ms': statistics.median(run['first_party_ms'] for run in runs),
+        'first_party': median_of('first_party'),
+        'third_party': median_of('third_party'),
+    }
+
+
+def print_report(report: dict, top: int) -> None:
+    print(f"\n{'total import':<44}{report['total_ms']:>10.1f} ms")
+    print(f"{'first-party self':<44}{report['first_party_ms']:>10.1f} ms")
+
+    print(f"\n{'first-party module (self)':<44}{'ms':>10}")
+    for name, ms in sorted(report['first_party'].items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<42}{ms:>10.1f}")
+
+    print(f"\n{'third-party package (cumulative)':<44}{'ms':>10}")
+    for name, ms in sorted(report['third_party'].items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<42}{ms:>10.1f}")
+
+
+def compare_reports(current: dict, baseline: dict, threshold: float) -> bool:
+    """Печатает изменения, возвращает True если есть регрессии"""
+    regressed = False
+    print(f"\n{'metric':<44}{'base':>10}{'now':>10}{'delta':>9}")
+    for key in ('total_ms', 'first_party_ms'):
+        base, now = baseline.get(key), current[key]
+        if not base:
+            continue
+        delta = (now - base) / base * 100
+        mark = ''
+        # Общее время зависит от сторонних пакетов и диска - регрессией считаем только код проекта
+        if key == 'first_party_ms' and delta > threshold:
+            mark = '  ❌'
+            regressed = True
+        print(f"{key:<44}{base:>10.1f}{now:>10.1f}{delta:>8.1f}%{mark}")
+    return regressed
+
+
+def main():
+    args = parse_args()
+
+    print(f"🚀 python -X importtime -c 'import {args.module}' x{args.runs}")
+    # Первый запуск прогревает __pycache__ и кэш ФС и в статистику не входит
+    run_once(args.module)
+    runs = [summarize(run_once(args.module), args.module) for _ in range(args.runs)]
+    report = median_report(runs)
+    report['meta'] = {
+        'module': args.module,
+        'runs': args.runs,
+        'python': platform.python_version(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+    }
+    print_report(report, args.top)
+
+    failed = False
+    if report['first_party_ms'] > args.budget_ms:
+        print(f"\n❌ First-party import time {report['first_party_ms']:.1f} ms > budget {args.budget_ms:.0f} ms")
+        failed = True
+    else:
+        print(f"\n✅ First-party import time within budget ({args.budget_ms:.0f} ms)")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            failed = compare_reports(report, json.load(f), args.threshold) or failed
+
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Report saved to {args.json}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Бенчмарк горячих путей database/orm_query.py и сервисов на заполненной базе
+
+    python scripts/benchmark_orm.py --scale 0.01 --json benchmark.json
+    python scripts/benchmark_orm.py --database-url postgresql+asyncpg://... --scale 1 --skip-seed
+    python scripts/benchmark_orm.py --compare benchmark.json --threshold 20
+
+--scale 1 = 1M пользователей, 10M funnel_statistic, 500k подписок, 200k free_link_use
+(заполнение - scripts/seed_data.py).
+--compare сравнивает p50 с прошлым отчетом и завершается с кодом 1 при регрессии.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Добавляем корневую папку в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.seed_data import FULL_VOLUMES, USER_ID_BASE, seed_database
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ORM hot path benchmark")
+    parser.add_argument('--database-url', help="По умолчанию - временная SQLite база")
+    parser.add_argument('--scale', type=float, default=0.01, help="Доля от полного объема данных")
+    parser.add_argument('--iterations', type=int, default=50, help="Повторов для точечных запросов")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-seed', action='store_true', help="Не заполнять базу (уже заполнена)")
+    parser.add_argument('--only', help="Запустить только бенчмарки, содержащие подстроку")
+    parser.add_argument('--json', default='benchmark_report.json', help="Файл отчета")
+    parser.add_argument('--compare', help="Прошлый отчет для сравнения")
+    parser.add_argument('--threshold', type=float, default=20.0, help="Допустимый рост p50, %%")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Переменные окружения должны быть заданы до импорта database.engine"""
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='benchmark_'), 'benchmark.db')
+        os.environ['DATABASE_URL'] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ.setdefault('TOKEN', '123456:BENCHMARK-TOKEN')
+
+
+# ===================== BENCHMARKS =====================
+
+class Context:
+    """Выборки идентификаторов для точечных запросов"""
+
+    async def load(self, session_maker, seed: int):
+        from sqlalchemy import select, func
+        from database.models import User, FunnelStatistic, Subscription, Funnel, SubscriptionPlan, FreeLink
+
+        self.rng = random.Random(seed)
+        async with session_maker() as session:
+            self.user_ids = (await session.execute(
+                select(User.user_id).order_by(User.id).limit(5000)
+            )).scalars().all()
+            self.open_stats = (await session.execute(
+                select(FunnelStatistic.user_id, FunnelStatistic.funnel_id)
+                .where(FunnelStatistic.completed == False).limit(5000)
+            )).all()
+            self.subscription_ids = (await session.execute(select(Subscription.id).limit(5000))).scalars().all()
+            self.funnel_ids = (await session.execute(select(Funnel.id))).scalars().all()
+            self.funnel_keys = (await session.execute(select(Funnel.key))).scalars().all()
+            self.plan_ids = (await session.execute(select(SubscriptionPlan.id))).scalars().all()
+            self.free_link_ids = (await session.execute(select(FreeLink.id))).scalars().all()
+            self.max_user_id = (await session.execute(select(func.max(User.user_id)))).scalar() or USER_ID_BASE
+        self.new_user_id = self.max_user_id + 1
+
+    def user_id(self):
+        return self.rng.choice(self.user_ids)
+
+    def next_new_user_id(self):
+        self.new_user_id += 1
+        return self.new_user_id
+
+
+def build_benchmarks(ctx: Context, bot):
+    """name -> (coroutine function(session), iterations или None = --iterations)"""
+    from aiogram.types import Message
+    from database import orm_query as q
+    from services.analytics import AnalyticsService, FreeLinkAnalyticsService
+    from services.export import ExportService
+    from services.funnel import FunnelService
+    from services.scheduler import FreeLinkScheduler
+    from services.subscription import SubscriptionService
+
+    def message_for(user_id):
+        return Message.model_validate({
+            'message_id': 1, 'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private', 'first_name': 'Bench'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Bench'},
+            'text': '/start',
+        }, context={'bot': bot})
+
+    async def export_users(session):
+        path, _ = await ExportService.export_to_file(session, 'users', 'csv')
+        os.remove(path)
+
+    async def start_funnel(session):
+        user_id = ctx.user_id()
+        await FunnelService._start_funnel_process(message_for(user_id), session, ctx.rng.choice(ctx.funnel_keys))
+
+    def open_stat():
+        return ctx.rng.choice(ctx.open_stats)
+
+    return {
+        # Users
+        'orm_get_user': (lambda s: q.orm_get_user(s, ctx.user_id()), None),
+        'orm_get_user_profile': (lambda s: q.orm_get_user_profile(s, ctx.user_id()), None),
+        'orm_add_user.existing': (lambda s: q.orm_add_user(s, ctx.user_id(), 'Bench'), None),
+        'orm_add_user.new': (lambda s: q.orm_add_user(s, ctx.next_new_user_id(), 'Bench'), None),
+        'orm_update_user_phone': (lambda s: q.orm_update_user_phone(s, ctx.user_id(), '+998900000000'), None),
+        'orm_get_users_count': (lambda s: q.orm_get_users_count(s), None),
+        'orm_get_all_users': (lambda s: q.orm_get_all_users(s), 1),
+        'orm_get_user_funnel_stats': (lambda s: q.orm_get_user_funnel_stats(s, ctx.user_id()), None),
+        # Funnels
+        'orm_get_funnel_by_key': (lambda s: q.orm_get_funnel_by_key(s, ctx.rng.choice(ctx.funnel_keys)), None),
+        'orm_get_funnel_statistics': (lambda s: q.orm_get_funnel_statistics(s, ctx.rng.choice(ctx.funnel_ids)), 5),
+        'orm_start_funnel_statistic': (lambda s: q.orm_start_funnel_statistic(s, *open_stat()), None),
+        'orm_update_funnel_step': (lambda s: q.orm_update_funnel_step(s, *open_stat(), 1), None),
+        # Subscriptions
+        'orm_get_active_subscription_plans': (lambda s: q.orm_get_active_subscription_plans(s), None),
+        'orm_get_subscription_plan_by_id': (
+            lambda s: q.orm_get_subscription_plan_by_id(s, ctx.rng.choice(ctx.plan_ids)), None
+        ),
+        'orm_create_subscription': (lambda s: q.orm_create_subscription(
+            s, ctx.user_id(), ctx.rng.choice(ctx.plan_ids), datetime.now() + timedelta(days=30)
+        ), None),
+        'orm_verify_payment': (lambda s: q.orm_verify_payment(s, ctx.rng.choice(ctx.subscription_ids)), None),
+        'orm_get_user_active_subscriptions': (
+            lambda s: q.orm_get_user_active_subscriptions(s, ctx.user_id()), None
+        ),
+        'orm_get_active_subscriptions_page': (lambda s: q.orm_get_active_subscriptions_page(s, 15), None),
+        'orm_count_active_subscriptions': (lambda s: q.orm_count_active_subscriptions(s), 10),
+        'orm_get_subscription_stats': (lambda s: q.orm_get_subscription_stats(s), 5),
+        # Free links
+        'orm_check_free_link_usage': (
+            lambda s: q.orm_check_free_link_usage(s, ctx.rng.choice(ctx.free_link_ids), ctx.user_id()), None
+        ),
+        'orm_use_free_link': (lambda s: q.orm_use_free_link(
+            s, ctx.rng.choice(ctx.free_link_ids), ctx.user_id(), datetime.now() + timedelta(days=7)
+        ), None),
+        'orm_get_expired_free_link_uses': (lambda s: q.orm_get_expired_free_link_uses(s), 3),
+        'orm_get_all_free_links': (lambda s: q.orm_get_all_free_links(s), 10),
+        'orm_get_free_links_page': (lambda s: q.orm_get_free_links_page(s, limit=10, status='active'), 10),
+        # Services
+        'FunnelService.start_funnel': (start_funnel, None),
+        'AnalyticsService.refresh_daily_rollups': (lambda s: AnalyticsService.refresh_daily_rollups(s), 1),
+        'AnalyticsService.get_summary': (lambda s: AnalyticsService.get_summary(s), 10),
+        'FreeLinkAnalyticsService.refresh_daily_rollups': (lambda s: FreeLinkAnalyticsService.refresh_daily_rollups(s), 1),
+        'ExportService.export_users_csv': (export_users, 1),
+        'SubscriptionService.check_and_expire_subscriptions': (
+            lambda s: SubscriptionService.check_and_expire_subscriptions(s, bot), 1
+        ),
+        'FreeLinkScheduler.check_expired_free_links': (
+            lambda s: FreeLinkScheduler.check_expired_free_links(bot), 1
+        ),
+    }
+
+
+async def run_benchmarks(session_maker, benchmarks: dict, default_iterations: int, only: str = None) -> dict:
+    from database import orm_query
+    from services.metrics import Histogram
+
+    results = {}
+    for name, (fn, iterations) in benchmarks.items():
+        if only and only not in name:
+            continue
+        histogram = Histogram()
+        errors = 0
+        for _ in range(iterations or default_iterations):
+            # Кэши сбрасываем, чтобы мерить запросы к базе
+            orm_query._count_cache.clear()
+            orm_query._stats_cache.clear()
+            async with session_maker() as session:
+                started = time.perf_counter()
+                try:
+                    await fn(session)
+                except Exception as e:
+                    errors += 1
+                    logging.warning(f"{name} failed: {e}")
+                histogram.record((time.perf_counter() - started) * 1000)
+        results[name] = {**histogram.summary(), 'errors': errors}
+        print(f"  {name:<52}{results[name]['p50']:>10.2f}{results[name]['p95']:>10.2f}"
+              f"{results[name]['max']:>10.2f}  ms")
+    return results
+
+
+def compare_reports(current: dict, baseline: dict, threshold: float) -> bool:
+    """Печатает изменения p50, возвращает True если есть регрессии"""
+    regressed = False
+    print(f"\n{'benchmark':<52}{'base p50':>10}{'now p50':>10}{'delta':>9}")
+    for name, row in current['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base or not base['p50']:
+            continue
+        delta = (row['p50'] - base['p50']) / base['p50'] * 100
+        mark = ''
+        if delta > threshold:
+            mark = '  ❌'
+            regressed = True
+        print(f"{name:<52}{base['p50']:>10.2f}{row['p50']:>10.2f}{delta:>8.1f}%{mark}")
+    return regressed
+
+
+async def main():
+    args = parse_args()
+    configure_environment(args)
+
+    import sqlalchemy
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from database.engine import create_db, engine, session_maker
+    from scripts.mock_telegram import MockTelegramServer
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+    engine.echo = False
+
+    volumes = {name: max(1, int(count * args.scale)) for name, count in FULL_VOLUMES.items()}
+    seed_seconds = None
+    if not args.skip_seed:
+        print(f"🌱 Seeding {volumes} ...")
+        await create_db()
+        started = time.perf_counter()
+        await seed_database(engine, volumes, args.seed)
+        seed_seconds = round(time.perf_counter() - started, 2)
+        print(f"✅ Seeded in {seed_seconds}s")
+
+    mock = MockTelegramServer()
+    runner, api_url = await mock.start()
+    bot = Bot(token=os.environ['TOKEN'], session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)))
+
+    ctx = Context()
+    await ctx.load(session_maker, args.seed)
+
+    print(f"\n{'benchmark':<54}{'p50':>10}{'p95':>10}{'max':>10}")
+    results = await run_benchmarks(session_maker, build_benchmarks(ctx, bot), args.iterations, args.only)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'dialect': engine.dialect.name,
+            'scale': args.scale,
+            'volumes': volumes,
+            'seed': args.seed,
+            'seed_seconds': seed_seconds,
+            'iterations': args.iterations,
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+        },
+        'benchmarks': results,
+    }
+
+    regressed = False
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressed = compare_reports(report, json.load(f), args.threshold)
+
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Report saved to {args.json}")
+
+    await bot.session.close()
+    await runner.cleanup()
+    await engine.dispose()
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
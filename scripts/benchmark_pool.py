@@ -0,0 +1,172 @@
+"""
+Пропускная способность при разных размерах пула соединений (синтетическая нагрузка хендлеров)
+
+    python scripts/benchmark_pool.py --pool-sizes 2,5,10,20 --concurrency 100 --duration 5
+    python scripts/benchmark_pool.py --database-url postgresql+asyncpg://... --api-ms 30 --json pool.json
+
+Каждый виртуальный хендлер повторяет то, что делает DataBaseSession + типичный хендлер:
+сессия -> SELECT пользователя -> вызов Bot API (--api-ms, соединение остается занятым) ->
+upsert -> commit. Параметры engine берутся из DB_* переменных (database.engine.engine_options),
+размер пула и overflow задаются аргументами. По умолчанию - временная SQLite база.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Добавляем корневую папку в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+USER_ID_BASE = 800_000_000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Connection pool size benchmark")
+    parser.add_argument('--database-url', help="По умолчанию - временная SQLite база")
+    parser.add_argument('--pool-sizes', default='2,5,10,20', help="Размеры пула через запятую")
+    parser.add_argument('--max-overflow', type=int, default=0, help="Overflow для каждого прогона")
+    parser.add_argument('--concurrency', type=int, default=100, help="Одновременных хендлеров")
+    parser.add_argument('--duration', type=float, default=5.0, help="Секунд на каждый размер пула")
+    parser.add_argument('--api-ms', type=float, default=20.0, help="Имитация вызова Bot API внутри сессии")
+    parser.add_argument('--users', type=int, default=10_000, help="Пользователей в базе")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', default='pool_report.json', help="Файл отчета")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Переменные окружения должны быть заданы до импорта database.engine"""
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='benchmark_pool_'), 'benchmark.db')
+        os.environ['DATABASE_URL'] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ.setdefault('TOKEN', '123456:BENCHMARK-TOKEN')
+    os.environ['DB_ECHO'] = '0'
+
+
+async def seed_users(session_maker, count: int):
+    from database.orm_query import orm_upsert_users
+
+    async with session_maker() as session:
+        for start in range(0, count, 1000):
+            await orm_upsert_users(session, [
+                {'user_id': USER_ID_BASE + i, 'full_name': f"Pool User {i}"}
+                for i in range(start, min(start + 1000, count))
+            ])
+
+
+async def handler(session_maker, rng: random.Random, api_seconds: float, users: int):
+    """Один апдейт: чтение, "Bot API" с открытой транзакцией, запись"""
+    from database.orm_query import orm_get_user, orm_upsert_user
+
+    user_id = USER_ID_BASE + rng.randrange(users)
+    async with session_maker() as session:
+        user = await orm_get_user(session, user_id)
+        await asyncio.sleep(api_seconds * rng.uniform(0.5, 1.5))
+        await orm_upsert_user(session, user_id, user.full_name if user else None)
+
+
+async def run_pool_size(url: str, pool_size: int, args) -> dict:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from database.engine import engine_options
+    from services.metrics import Histogram
+
+    engine_url, options = engine_options(url, pool_size=pool_size, max_overflow=args.max_overflow)
+    engine = create_async_engine(engine_url, **options)
+    session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    histogram = Histogram()
+    errors = {}
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(index: int):
+        rng = random.Random(args.seed + index)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                await handler(session_maker, rng, args.api_ms / 1000, args.users)
+            except Exception as e:
+                name = type(e).__name__
+                errors[name] = errors.get(name, 0) + 1
+                continue
+            histogram.record((time.perf_counter() - started) * 1000)
+
+    # Прогрев: соединения открываются до замера
+    await asyncio.gather(*(handler(session_maker, random.Random(i), 0, args.users) for i in range(pool_size)))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    return {
+        'pool_size': pool_size,
+        'max_overflow': args.max_overflow,
+        'throughput': round(histogram.count / elapsed, 1),
+        **histogram.summary(),
+        'errors': errors,
+    }
+
+
+async def main():
+    args = parse_args()
+    configure_environment(args)
+
+    import sqlalchemy
+    from database.engine import create_db, engine, session_maker, DATABASE_URL
+
+    logging.basicConfig(level=logging.WARNING)
+    print(f"🌱 Seeding {args.users} users ...")
+    await create_db()
+    await seed_users(session_maker, args.users)
+    dialect = engine.dialect.name
+    await engine.dispose()
+
+    pool_sizes = [int(size) for size in args.pool_sizes.split(',') if size.strip()]
+    print(f"\n🚀 concurrency={args.concurrency}, api={args.api_ms:.0f}ms, {args.duration:.0f}s per pool size")
+    print(f"\n{'pool':>6}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}  errors")
+    results = []
+    for pool_size in pool_sizes:
+        row = await run_pool_size(DATABASE_URL, pool_size, args)
+        results.append(row)
+        errors = ', '.join(f"{name}={count}" for name, count in row['errors'].items()) or '-'
+        print(f"{pool_size:>6}{row['throughput']:>10.1f}{row['p50']:>10.1f}{row['p95']:>10.1f}{row['p99']:>10.1f}  {errors}")
+
+    best = max(results, key=lambda row: row['throughput'])
+    # Минимальный пул, дающий >= 95% лучшей пропускной способности
+    enough = min(
+        (row for row in results if row['throughput'] >= best['throughput'] * 0.95),
+        key=lambda row: row['pool_size']
+    )
+    print(f"\n✅ Best: pool_size={best['pool_size']} ({best['throughput']} req/s); "
+          f"≥95% of it from pool_size={enough['pool_size']}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'dialect': dialect,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'api_ms': args.api_ms,
+            'users': args.users,
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+        },
+        'results': results,
+        'recommended_pool_size': enough['pool_size'],
+    }
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Report saved to {args.json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,159 @@
+"""
+Проверка, что ROUTER_FAST_PATH=1 и ROUTER_FAST_PATH=0 выбирают одни и те же хендлеры
+
+    python scripts/check_routing.py
+
+common/routing.py опирается на внутренности aiogram (TelegramEventObserver.trigger, middleware)
+и magic_filter (MagicFilter._operations) - запускать после обновления этих пакетов.
+Набор апдейтов строится из зарегистрированных хендлеров: точные callback_data и префиксы
+F.data, все значения CallbackData фабрик (enum x примеры полей), испорченные данные и команды;
+каждый апдейт отправляется от админа и от обычного пользователя. Оба варианта запускаются
+в отдельных процессах (роутеры - синглтоны модулей). Код выхода 1 - есть расхождения.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from enum import Enum
+
+# Добавляем корневую папку в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.benchmark_dispatch import ADMIN_ID, USER_ID, build_update
+
+
+# Примеры значений для полей CallbackData (невалидные комбинации отбрасываются валидацией)
+SAMPLE_INTS = (0, 7)
+SAMPLE_STRINGS = ('n', 'all', 'users')
+# Заведомо не подходящие данные: пустые, неизвестные, обрезанные
+NOISE = ('', 'something_else', 'fl', 'fl:', 'fl:zz:1', 'f:d:abc', 'up:', 'admin_', 'x' * 64)
+
+
+def _field_samples(annotation) -> tuple:
+    annotation = getattr(annotation, '__origin__', annotation)  # Annotated[...] -> тип
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return tuple(annotation)
+    if annotation is int:
+        return SAMPLE_INTS
+    return SAMPLE_STRINGS
+
+
+def _factory_samples(factory) -> list[str]:
+    fields = factory.model_fields
+    packed = []
+    for values in itertools.product(*(_field_samples(field.annotation) for field in fields.values())):
+        try:
+            packed.append(factory(**dict(zip(fields, values))).pack())
+        except (ValueError, TypeError):
+            continue
+    return packed
+
+
+def callback_corpus(routers) -> list[str]:
+    from aiogram.filters.callback_data import CallbackQueryFilter
+    from common.routing import _callback_key
+
+    corpus = set(NOISE)
+    for router in routers:
+        for handler in router.callback_query.handlers:
+            key = _callback_key(handler)
+            if key is not None:
+                kind, value = key
+                corpus.add(value)
+                if kind == 'prefix':
+                    corpus.update((value + '1', value + 'abc'))
+            for handler_filter in handler.filters or ():
+                if isinstance(handler_filter.callback, CallbackQueryFilter):
+                    corpus.update(_factory_samples(handler_filter.callback.callback_data))
+    return sorted(corpus)
+
+
+def message_corpus(routers) -> list[str]:
+    from aiogram.filters import Command
+
+    corpus = {'salom', '/unknown'}
+    for router in routers:
+        for handler in router.message.handlers:
+            for handler_filter in handler.filters or ():
+                if isinstance(handler_filter.callback, Command):
+                    corpus.update(f"/{command}" for command in handler_filter.callback.commands
+                                  if isinstance(command, str))
+    return sorted(corpus)
+
+
+async def run_worker() -> dict:
+    from aiogram.types import Update
+
+    import app
+
+    async def capture(handler, event, data):
+        # Вместо вызова хендлера запоминаем, какой был выбран
+        return data['handler'].callback.__name__
+
+    app.dp.message.middleware(capture)
+    app.dp.callback_query.middleware(capture)
+
+    routers = [app.admin_router, app.admin_subscription_router, app.user_private_router]
+    scenarios = [('callback', payload) for payload in callback_corpus(routers)]
+    scenarios += [('message', payload) for payload in message_corpus(routers)]
+
+    resolved = {}
+    for update_id, (user_id, (kind, payload)) in enumerate(
+        itertools.product((ADMIN_ID, USER_ID), scenarios), start=1
+    ):
+        update = Update.model_validate(build_update(update_id, user_id, kind, payload), context={'bot': app.bot})
+        role = 'admin' if user_id == ADMIN_ID else 'user'
+        resolved[f"{role} {kind} {payload!r}"] = str(await app.dp.feed_update(app.bot, update))
+
+    await app.bot.session.close()
+    return resolved
+
+
+def run_variant(fast_path: str) -> dict:
+    env = {
+        **os.environ,
+        'ROUTER_FAST_PATH': fast_path,
+        'ADMIN_IDS': str(ADMIN_ID),
+        'TOKEN': os.environ.get('TOKEN', '123456:CHECK-TOKEN'),
+        'METRICS_PORT': '0',
+        'DATABASE_URL': f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'check.db')}",
+    }
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker'],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ROUTER_FAST_PATH routing equivalence check")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(asyncio.run(run_worker())))
+        return
+
+    legacy = run_variant('0')
+    fast = run_variant('1')
+    mismatches = [
+        (name, legacy.get(name), fast.get(name))
+        for name in sorted(set(legacy) | set(fast))
+        if legacy.get(name) != fast.get(name)
+    ]
+    for name, old, new in mismatches:
+        print(f"⚠️ {name}: legacy={old} fast={new}")
+    if mismatches:
+        print(f"\n❌ {len(mismatches)} of {len(legacy)} updates are routed differently")
+        sys.exit(1)
+    handled = sum(handler != 'UNHANDLED' for handler in fast.values())
+    print(f"✅ {len(fast)} updates ({handled} handled): ROUTER_FAST_PATH=0 and =1 pick the same handlers")
+
+
+if __name__ == "__main__":
+    main()
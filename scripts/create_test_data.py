@@ -1,5 +1,7 @@
 """
 Скрипт для создания тестовых данных в базе данных
+
+Для больших объемов (нагрузочные тесты, бенчмарки) - scripts/seed_data.py
 """
 import asyncio
 import sys
@@ -9,9 +11,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.engine import session_maker
+from database.models import FunnelStep
 from database.orm_query import (
     orm_create_funnel,
-    orm_add_funnel_step,
     orm_create_subscription_plan
 )
 
@@ -57,9 +59,10 @@ async def create_test_funnel():
                 }
             ]
             
-            for step_data in steps_data:
-                step = await orm_add_funnel_step(session, funnel.id, **step_data)
-                print(f"  ✅ Qadam {step.step_number} qo'shildi")
+            # Все шаги одной транзакцией вместо коммита на каждый шаг
+            session.add_all([FunnelStep(funnel_id=funnel.id, **step_data) for step_data in steps_data])
+            await session.commit()
+            print(f"  ✅ {len(steps_data)} ta qadam qo'shildi")
             
             print(f"\n🔗 Funnel linki: https://t.me/your_bot?start={funnel.key}")
             
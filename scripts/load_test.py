@@ -0,0 +1,262 @@
+"""
+Нагрузочный тест бота: N виртуальных пользователей проходят сценарии
+/start <funnel_key> -> funnel_next:<n> ... -> plan:<id> через app.dp,
+а все вызовы Bot API уходят в локальный mock сервер (scripts/mock_telegram.py).
+
+    python scripts/load_test.py --users 500 --concurrency 50 --latency-ms 40
+
+По умолчанию используется временная SQLite база; для PostgreSQL передайте --database-url.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+# Добавляем корневую папку в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.mock_telegram import MockTelegramServer
+
+
+FUNNEL_KEY = 'load_test'
+USER_ID_BASE = 700_000_000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end load test against app.dp")
+    parser.add_argument('--users', type=int, default=200, help="Количество виртуальных пользователей")
+    parser.add_argument('--concurrency', type=int, default=50, help="Одновременно активных пользователей")
+    parser.add_argument('--steps', type=int, default=3, help="Шагов в тестовой воронке")
+    parser.add_argument('--flows', default='start,funnel,plan', help="Сценарии через запятую")
+    parser.add_argument('--latency-ms', type=float, default=30.0, help="Задержка mock Bot API")
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--rate-429', type=float, default=0.0, help="Доля ответов 429 от mock API")
+    parser.add_argument('--rate-limit', action='store_true', help="Использовать RateLimitedSession (как в проде)")
+    parser.add_argument('--api-url', help="Внешний mock сервер вместо встроенного")
+    parser.add_argument('--database-url', help="По умолчанию - временная SQLite база")
+    parser.add_argument('--json', help="Сохранить отчет в JSON файл")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Переменные окружения должны быть заданы до импорта app"""
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='load_test_'), 'load_test.db')
+        os.environ['DATABASE_URL'] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ.setdefault('TOKEN', '123456:LOAD-TEST-TOKEN')
+    os.environ['METRICS_PORT'] = '0'
+
+
+class FlowStats:
+    """Задержки по сценариям"""
+
+    def __init__(self):
+        from services.metrics import Histogram
+        self.histograms = defaultdict(Histogram)
+        self.errors = defaultdict(int)
+
+    def record(self, flow: str, started: float, error: bool = False):
+        self.histograms[flow].record((time.perf_counter() - started) * 1000)
+        if error:
+            self.errors[flow] += 1
+
+
+async def seed(session_maker, steps: int):
+    """Тестовая воронка и тариф"""
+    from database.orm_query import orm_create_funnel, orm_add_funnel_step, orm_create_subscription_plan
+
+    async with session_maker() as session:
+        funnel = await orm_create_funnel(session, name="Load test", key=FUNNEL_KEY)
+        for step_number in range(1, steps + 1):
+            await orm_add_funnel_step(
+                session, funnel.id, step_number, 'text',
+                content_data=f"Load test step {step_number}", button_text="Keyingi ➡️"
+            )
+        plan = await orm_create_subscription_plan(
+            session, name="Load test plan", duration_days=30, price_usd=10, price_uzs=125000,
+            channel_id=-1001234567890
+        )
+        return plan.id
+
+
+async def seed_users(session_maker, users: int):
+    """Пользователи с телефонами, чтобы воронка запускалась сразу"""
+    from sqlalchemy import insert
+    from database.models import User
+
+    rows = [
+        {'user_id': USER_ID_BASE + i, 'full_name': f"Load user {i}", 'phone': f"+99890{i:07d}"}
+        for i in range(users)
+    ]
+    async with session_maker() as session:
+        for i in range(0, len(rows), 1000):
+            await session.execute(insert(User), rows[i:i + 1000])
+        await session.commit()
+
+
+class VirtualUser:
+    """Генерирует апдейты одного пользователя"""
+
+    def __init__(self, index: int):
+        self.user_id = USER_ID_BASE + index
+        self.user = {'id': self.user_id, 'is_bot': False, 'first_name': f"Load{index}"}
+        self.chat = {'id': self.user_id, 'type': 'private', 'first_name': f"Load{index}"}
+        self.counter = 0
+
+    def _next_id(self) -> int:
+        self.counter += 1
+        return self.user_id * 100 + self.counter
+
+    def message(self, text: str) -> dict:
+        update_id = self._next_id()
+        return {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id, 'date': int(datetime.now().timestamp()),
+                'chat': self.chat, 'from': self.user, 'text': text,
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+                if text.startswith('/') else None,
+            },
+        }
+
+    def callback(self, data: str) -> dict:
+        update_id = self._next_id()
+        return {
+            'update_id': update_id,
+            'callback_query': {
+                'id': str(update_id), 'from': self.user, 'chat_instance': str(self.user_id), 'data': data,
+                'message': {
+                    'message_id': update_id, 'date': int(datetime.now().timestamp()),
+                    'chat': self.chat, 'text': 'previous step',
+                },
+            },
+        }
+
+
+async def run_user(index, args, plan_id, dp, bot, stats: FlowStats, semaphore):
+    from aiogram.types import Update
+
+    flows = args.flows.split(',')
+    user = VirtualUser(index)
+
+    async def feed(flow, raw):
+        started = time.perf_counter()
+        try:
+            await dp.feed_update(bot, Update.model_validate(raw, context={'bot': bot}))
+            stats.record(flow, started)
+        except Exception as e:
+            logging.warning(f"{flow} failed for {user.user_id}: {e}")
+            stats.record(flow, started, error=True)
+
+    async with semaphore:
+        if 'start' in flows:
+            await feed('start', user.message(f"/start {FUNNEL_KEY}"))
+        if 'funnel' in flows:
+            for step in range(1, args.steps + 1):
+                await feed('funnel_next', user.callback(f"funnel_next:{step}"))
+        if 'plan' in flows:
+            await feed('plan', user.callback(f"plan:{plan_id}"))
+
+
+def build_report(args, stats: FlowStats, elapsed: float, mock_stats: dict) -> dict:
+    from services.metrics import latency_registry
+
+    flows = {}
+    for flow, histogram in stats.histograms.items():
+        flows[flow] = {
+            **histogram.summary(),
+            'errors': stats.errors[flow],
+            'throughput_per_s': round(histogram.count / elapsed, 2),
+        }
+    total = sum(h.count for h in stats.histograms.values())
+    return {
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'rate_limited': args.rate_limit,
+        'mock_latency_ms': args.latency_ms,
+        'elapsed_s': round(elapsed, 3),
+        'updates_per_s': round(total / elapsed, 2) if elapsed else 0,
+        'flows': flows,
+        'handlers': latency_registry.snapshot()['handlers'],
+        'telegram_api': mock_stats,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n📊 {report['users']} users, concurrency {report['concurrency']}, "
+          f"{report['elapsed_s']}s, {report['updates_per_s']} updates/s")
+    print(f"{'flow':<14}{'count':>8}{'err':>6}{'ops/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for flow, row in report['flows'].items():
+        print(f"{flow:<14}{row['count']:>8}{row['errors']:>6}{row['throughput_per_s']:>10}"
+              f"{row['p50']:>10}{row['p95']:>10}{row['p99']:>10}{row['max']:>10}")
+    print("\n⏱ handlers (ms): total p95 / db p95 / api p95")
+    for name, row in report['handlers'].items():
+        print(f"  {name:<32}{row['total_ms']['p95']:>10}{row['db_ms']['p95']:>10}{row['api_ms']['p95']:>10}")
+    api = report['telegram_api']
+    if api:
+        print(f"\n📡 Bot API: {api['total_calls']} calls, {api['throttled']} throttled (429)")
+
+
+async def main():
+    args = parse_args()
+    configure_environment(args)
+
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    import app
+    from common.rate_limit import RateLimitedSession
+    from database.engine import create_db, engine, session_maker
+
+    logging.getLogger().setLevel(logging.WARNING)
+    engine.echo = False
+
+    mock = None
+    runner = None
+    api_url = args.api_url
+    if not api_url:
+        mock = MockTelegramServer(args.latency_ms, args.jitter_ms, args.rate_429)
+        runner, api_url = await mock.start()
+
+    session_class = RateLimitedSession if args.rate_limit else AiohttpSession
+    await app.bot.session.close()
+    app.bot.session = session_class(api=TelegramAPIServer.from_base(api_url))
+    app.setup_middlewares(app.dp, app.bot)
+
+    await create_db()
+    plan_id = await seed(session_maker, args.steps)
+    await seed_users(session_maker, args.users)
+    if mock:
+        mock.reset()
+
+    stats = FlowStats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_user(i, args, plan_id, app.dp, app.bot, stats, semaphore) for i in range(args.users)
+    ))
+    elapsed = time.perf_counter() - started
+
+    report = build_report(args, stats, elapsed, mock.stats() if mock else {})
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Report saved to {args.json}")
+
+    await app.bot.session.close()
+    if runner:
+        await runner.cleanup()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
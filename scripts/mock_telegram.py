@@ -0,0 +1,186 @@
+"""
+Локальный mock Telegram Bot API сервера для нагрузочных тестов
+
+Запуск отдельно:
+    python scripts/mock_telegram.py --port 8081 --latency-ms 40 --rate-429 0.01
+
+Бот подключается через TelegramAPIServer.from_base("http://127.0.0.1:8081").
+GET /_stats - количество вызовов по методам, GET /_reset - сброс.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+
+BOT_ID = 123456
+
+
+class MockTelegramServer:
+    """Записывает вызовы Bot API и отвечает правдоподобными объектами"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_429: float = 0.0,
+        retry_after: int = 1,
+        seed: Optional[int] = None
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self._message_ids = itertools.count(1)
+        self.started_at = time.monotonic()
+
+    # ---------- ответы ----------
+
+    def _chat(self, chat_id) -> Dict[str, Any]:
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            return {'id': -1000000000000, 'type': 'channel', 'title': str(chat_id)}
+        if chat_id < 0:
+            return {'id': chat_id, 'type': 'supergroup', 'title': 'Mock group'}
+        return {'id': chat_id, 'type': 'private', 'first_name': 'Mock'}
+
+    def _message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        message = {
+            'message_id': int(params.get('message_id') or next(self._message_ids)),
+            'date': int(time.time()),
+            'chat': self._chat(params.get('chat_id')),
+            'from': self._bot_user(),
+        }
+        if 'text' in params:
+            message['text'] = params['text']
+        if 'caption' in params:
+            message['caption'] = params['caption']
+        if 'reply_markup' in params:
+            markup = json.loads(params['reply_markup'])
+            if 'inline_keyboard' in markup:
+                message['reply_markup'] = markup
+        return message
+
+    def _bot_user(self) -> Dict[str, Any]:
+        return {'id': BOT_ID, 'is_bot': True, 'first_name': 'Mock bot', 'username': 'mock_funnel_bot'}
+
+    def build_result(self, method: str, params: Dict[str, Any]) -> Any:
+        name = method.lower()
+        if name == 'getme':
+            return {**self._bot_user(), 'can_join_groups': True, 'can_read_all_group_messages': False,
+                    'supports_inline_queries': False}
+        if name == 'getupdates':
+            return []
+        if name == 'getchat':
+            return {**self._chat(params.get('chat_id')), 'accent_color_id': 0, 'max_reaction_count': 11}
+        if name == 'getchatmember':
+            return {'status': 'member', 'user': {'id': int(params.get('user_id', 0)), 'is_bot': False,
+                                                 'first_name': 'Mock'}}
+        if name in ('createchatinvitelink', 'editchatinvitelink', 'revokechatinvitelink'):
+            return {'invite_link': f"https://t.me/+mock{next(self._message_ids)}", 'creator': self._bot_user(),
+                    'creates_join_request': False, 'is_primary': False, 'is_revoked': name.startswith('revoke'),
+                    'member_limit': int(params.get('member_limit', 1) or 1)}
+        if name == 'copymessage':
+            return {'message_id': next(self._message_ids)}
+        if name.startswith('send') or name.startswith('edit') or name == 'forwardmessage':
+            return self._message(params)
+        return True
+
+    # ---------- HTTP ----------
+
+    async def handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        params = dict(await request.post())
+        self.calls[method] += 1
+
+        delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        if self.rate_429 and method.lower() != 'getupdates' and self.random.random() < self.rate_429:
+            self.throttled[method] += 1
+            return web.json_response({
+                'ok': False,
+                'error_code': 429,
+                'description': f"Too Many Requests: retry after {self.retry_after}",
+                'parameters': {'retry_after': self.retry_after},
+            }, status=429)
+
+        return web.json_response({'ok': True, 'result': self.build_result(method, params)})
+
+    def stats(self) -> Dict[str, Any]:
+        total = sum(self.calls.values())
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'total_calls': total,
+            'calls_per_second': round(total / elapsed, 2) if elapsed else 0,
+            'throttled': sum(self.throttled.values()),
+            'by_method': dict(self.calls.most_common()),
+        }
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.throttled.clear()
+        self.started_at = time.monotonic()
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+    async def handle_reset(self, request: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response({'ok': True})
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get('/_stats', self.handle_stats)
+        app.router.add_get('/_reset', self.handle_reset)
+        app.router.add_post('/bot{token}/{method}', self.handle_method)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> tuple[web.AppRunner, str]:
+        """Сервер в текущем event loop; возвращает (runner, base_url)"""
+        runner = web.AppRunner(self.create_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://{host}:{port}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mock Telegram Bot API server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=30.0, help="Базовая задержка ответа")
+    parser.add_argument('--jitter-ms', type=float, default=20.0, help="Случайная добавка к задержке")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="Доля ответов 429 (0..1)")
+    parser.add_argument('--retry-after', type=int, default=1)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    server = MockTelegramServer(args.latency_ms, args.jitter_ms, args.rate_429, args.retry_after)
+    runner, url = await server.start(args.host, args.port)
+    print(f"✅ Mock Bot API: {url} (stats: {url}/_stats)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Mock server stopped")
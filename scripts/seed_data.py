@@ -0,0 +1,360 @@
+"""
+Быстрое заполнение базы тестовыми данными для нагрузочных тестов и бенчмарков
+
+    python scripts/seed_data.py --scale 0.1
+    python scripts/seed_data.py --users 1000000 --funnel-stats 10000000 --workers 8
+    DATABASE_URL=postgresql+asyncpg://... python scripts/seed_data.py --scale 1
+
+Данные детерминированы: каждый чанк использует свой генератор random.Random(seed:table:chunk),
+поэтому результат не зависит от количества воркеров. На PostgreSQL используется COPY
+(asyncpg copy_records_to_table), на остальных базах - многострочные INSERT ... VALUES пачками.
+
+Скрипт рассчитан на пустую базу: ключи (funnel_N, free_N, user_id от USER_ID_BASE) фиксированы,
+поэтому при наличии данных в заполняемых таблицах он завершается с ошибкой. Внешние ключи
+берутся из id, которые база выдала справочным таблицам (последовательности могли быть сдвинуты).
+Воркеры (--workers) - корутины в одном процессе: параллельны только запросы к базе,
+генерация строк идет в одном потоке.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Добавляем корневую папку в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+FULL_VOLUMES = {
+    'users': 1_000_000,
+    'funnel_statistics': 10_000_000,
+    'subscriptions': 500_000,
+    'free_link_uses': 200_000,
+}
+FUNNELS = 20
+FUNNEL_STEPS = 5
+PLANS = 4
+FREE_LINKS = 100
+USER_ID_BASE = 100_000_000
+CHUNK_ROWS = 50_000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk seeding of test data")
+    parser.add_argument('--scale', type=float, default=0.01, help="Доля от полного объема (1 = 1M пользователей)")
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--funnel-stats', type=int)
+    parser.add_argument('--subscriptions', type=int)
+    parser.add_argument('--free-link-uses', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, help=(
+        "Одновременных запросов к базе: корутины в одном процессе, генерация строк не параллелится "
+        "(по умолчанию: 4 для PostgreSQL, 1 для SQLite)"
+    ))
+    parser.add_argument('--batch-size', type=int, default=1000, help="Строк в одном INSERT ... VALUES")
+    parser.add_argument('--no-copy', action='store_true', help="Не использовать COPY на PostgreSQL")
+    parser.add_argument('--create-tables', action='store_true', help="Создать таблицы перед заполнением")
+    return parser.parse_args()
+
+
+def volumes_from_args(args) -> dict:
+    volumes = {name: max(1, int(count * args.scale)) for name, count in FULL_VOLUMES.items()}
+    overrides = {
+        'users': args.users,
+        'funnel_statistics': args.funnel_stats,
+        'subscriptions': args.subscriptions,
+        'free_link_uses': args.free_link_uses,
+    }
+    volumes.update({name: value for name, value in overrides.items() if value is not None})
+    return volumes
+
+
+# ===================== ГЕНЕРАТОРЫ =====================
+
+def _chunk_rng(seed: int, table: str, chunk: int) -> random.Random:
+    return random.Random(f"{seed}:{table}:{chunk}")
+
+
+def gen_users(rng, start, end, volumes, ids, now):
+    for i in range(start, end):
+        created = now - timedelta(days=rng.randint(0, 365))
+        yield {
+            'user_id': USER_ID_BASE + i,
+            'full_name': f"User {i}",
+            'phone': f"+99890{i % 10_000_000:07d}" if rng.random() < 0.8 else None,
+            'created': created,
+            'updated': created,
+        }
+
+
+def gen_funnel_statistics(rng, start, end, volumes, ids, now):
+    users = volumes['users']
+    funnel_ids = ids['funnel']
+    for i in range(start, end):
+        # У каждого пользователя не больше одной записи на воронку
+        funnel_id = funnel_ids[(i // users + i % users) % len(funnel_ids)]
+        started = now - timedelta(days=rng.randint(0, 365))
+        completed = rng.random() < 0.4
+        current_step = FUNNEL_STEPS - 1 if completed else rng.randint(0, FUNNEL_STEPS - 1)
+        yield {
+            'user_id': USER_ID_BASE + i % users,
+            'funnel_id': funnel_id,
+            'current_step': current_step,
+            'completed': completed,
+            'started_at': started,
+            'completed_at': started + timedelta(hours=rng.randint(1, 72)) if completed else None,
+            'step_statistics': {str(step): {'view_time': rng.randint(1, 120), 'completed': True}
+                                for step in range(current_step)},
+            'created': started,
+            'updated': started,
+        }
+
+
+def gen_subscriptions(rng, start, end, volumes, ids, now):
+    users = volumes['users']
+    plan_ids = ids['subscription_plan']
+    for _ in range(start, end):
+        plan = rng.randrange(len(plan_ids))
+        created = now - timedelta(days=rng.randint(0, 400))
+        expires_at = created + timedelta(days=30 * (plan + 1))
+        yield {
+            'user_id': USER_ID_BASE + rng.randrange(users),
+            'plan_id': plan_ids[plan],
+            'is_active': expires_at > now,
+            'expires_at': expires_at,
+            'invite_link': None,
+            'payment_verified': rng.random() < 0.7,
+            'created': created,
+            'updated': created,
+        }
+
+
+def gen_free_link_uses(rng, start, end, volumes, ids, now):
+    users = volumes['users']
+    free_link_ids = ids['free_link']
+    for _ in range(start, end):
+        used_at = now - timedelta(days=rng.randint(0, 60))
+        expires_at = used_at + timedelta(days=7)
+        yield {
+            'free_link_id': rng.choice(free_link_ids),
+            'user_id': USER_ID_BASE + rng.randrange(users),
+            'used_at': used_at,
+            'expires_at': expires_at,
+            'is_expired': expires_at < now and rng.random() < 0.95,
+            'created': used_at,
+            'updated': used_at,
+        }
+
+
+def reference_rows(now):
+    """Воронки, тарифы и free link - небольшие справочные таблицы (шаги - funnel_step_rows)"""
+    from database.models import Funnel, SubscriptionPlan, FreeLink
+
+    return [
+        (Funnel, [
+            {'name': f"Funnel {i}", 'key': f"funnel_{i}", 'description': None, 'is_active': True}
+            for i in range(1, FUNNELS + 1)
+        ]),
+        (SubscriptionPlan, [
+            {'name': f"Plan {i}", 'duration_days': 30 * i, 'price_usd': 10 * i, 'price_uzs': 125000 * i,
+             'is_active': True, 'channel_id': -1001000000000 - i}
+            for i in range(1, PLANS + 1)
+        ]),
+        (FreeLink, [
+            {'key': f"free_{i}", 'name': f"Free {i}", 'channel_id': str(-1002000000000 - i),
+             'channel_invite_link': f"https://t.me/+free{i}", 'duration_days': 7, 'max_uses': -1,
+             'current_uses': 0, 'is_active': True, 'created_by': USER_ID_BASE}
+            for i in range(1, FREE_LINKS + 1)
+        ]),
+    ]
+
+
+def funnel_step_rows(funnel_ids):
+    return [
+        {'funnel_id': funnel_id, 'step_number': s, 'content_type': 'text', 'content_data': f"Step {s}",
+         'caption': None, 'button_text': "Keyingi ➡️"}
+        for funnel_id in funnel_ids for s in range(1, FUNNEL_STEPS + 1)
+    ]
+
+
+async def ensure_empty(engine):
+    """Фиксированные ключи и user_id конфликтуют с уже существующими данными"""
+    from sqlalchemy import func, select
+    from database.models import (
+        User, Funnel, FunnelStep, FunnelStatistic, SubscriptionPlan, Subscription, FreeLink, FreeLinkUse
+    )
+
+    async with engine.connect() as conn:
+        filled = [
+            model.__tablename__
+            for model in (User, Funnel, FunnelStep, FunnelStatistic, SubscriptionPlan, Subscription, FreeLink, FreeLinkUse)
+            if await conn.scalar(select(func.count()).select_from(model.__table__))
+        ]
+    if filled:
+        raise RuntimeError(f"Database is not empty ({', '.join(filled)}): seed_data needs an empty database")
+
+
+async def read_ids(engine, model) -> list:
+    """id строк справочной таблицы в порядке вставки (база была пустой - все строки наши)"""
+    from sqlalchemy import select
+
+    async with engine.connect() as conn:
+        return (await conn.execute(select(model.__table__.c.id).order_by(model.__table__.c.id))).scalars().all()
+
+
+# ===================== ЗАПИСЬ =====================
+
+class BulkWriter:
+    """Многострочные INSERT ... VALUES пачками или COPY (PostgreSQL + asyncpg)"""
+
+    def __init__(self, engine, batch_size: int = 1000, use_copy: bool = False) -> None:
+        self.engine = engine
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+
+    @staticmethod
+    def _columns(table):
+        return [column for column in table.columns if column.name != 'id']
+
+    def _complete(self, columns, row: dict, now: datetime) -> dict:
+        """Заполняем пропущенные колонки: у всех строк пачки должен быть одинаковый набор ключей"""
+        for column in columns:
+            if column.name in row:
+                continue
+            if column.name in ('created', 'updated'):
+                row[column.name] = now
+            elif column.default is not None and column.default.is_scalar:
+                row[column.name] = column.default.arg
+            else:
+                row[column.name] = None
+        return row
+
+    async def write(self, model, rows, now: datetime) -> int:
+        from sqlalchemy import insert
+
+        table = model.__table__
+        columns = self._columns(table)
+        rows = [self._complete(columns, row, now) for row in rows]
+        if not rows:
+            return 0
+
+        if self.use_copy:
+            records = [
+                tuple(
+                    json.dumps(row[column.name]) if isinstance(row[column.name], dict) else row[column.name]
+                    for column in columns
+                )
+                for row in rows
+            ]
+            async with self.engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.copy_records_to_table(
+                    table.name, records=records, columns=[column.name for column in columns]
+                )
+            return len(rows)
+
+        # executemany с insertmanyvalues отправляет тот же многострочный INSERT ... VALUES,
+        # но компилирует выражение один раз (insert().values([...]) компилируется на каждую пачку)
+        async with self.engine.begin() as conn:
+            for i in range(0, len(rows), self.batch_size):
+                await conn.execute(insert(table), rows[i:i + self.batch_size])
+        return len(rows)
+
+
+async def seed_database(
+    engine,
+    volumes: dict,
+    seed: int = 42,
+    workers: int | None = None,
+    batch_size: int = 1000,
+    use_copy: bool | None = None
+) -> dict:
+    """Заполнение пустой базы; возвращает {таблица: (строк, секунд)}"""
+    from database.models import User, FunnelStep, FunnelStatistic, Subscription, FreeLinkUse
+
+    is_postgresql = engine.dialect.name == 'postgresql'
+    if use_copy is None:
+        use_copy = is_postgresql and engine.dialect.driver == 'asyncpg'
+    if workers is None:
+        # SQLite допускает только одного писателя
+        workers = 4 if is_postgresql else 1
+
+    await ensure_empty(engine)
+    writer = BulkWriter(engine, batch_size, use_copy)
+    now = datetime.now()
+    report = {}
+    ids = {}
+
+    for model, rows in reference_rows(now):
+        started = time.perf_counter()
+        report[model.__tablename__] = (await writer.write(model, rows, now), time.perf_counter() - started)
+        ids[model.__tablename__] = await read_ids(engine, model)
+    started = time.perf_counter()
+    report[FunnelStep.__tablename__] = (
+        await writer.write(FunnelStep, funnel_step_rows(ids['funnel']), now), time.perf_counter() - started
+    )
+
+    async def run_phase(plan):
+        """plan: [(model, generator, total)] - чанки всех таблиц фазы обрабатываются параллельно"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for model, generator, total in plan:
+            for chunk, start in enumerate(range(0, total, CHUNK_ROWS)):
+                queue.put_nowait((model, generator, chunk, start, min(start + CHUNK_ROWS, total)))
+
+        counts = {model.__tablename__: 0 for model, _, _ in plan}
+        started = time.perf_counter()
+
+        async def worker():
+            while not queue.empty():
+                model, generator, chunk, start, end = queue.get_nowait()
+                rng = _chunk_rng(seed, model.__tablename__, chunk)
+                rows = list(generator(rng, start, end, volumes, ids, now))
+                counts[model.__tablename__] += await writer.write(model, rows, now)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        elapsed = time.perf_counter() - started
+        for name, count in counts.items():
+            report[name] = (count, elapsed)
+        total = sum(counts.values())
+        print(f"  ✅ {', '.join(f'{name}: {count:,}' for name, count in counts.items())} "
+              f"in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+    # Пользователи первыми - на них ссылаются внешние ключи
+    await run_phase([(User, gen_users, volumes['users'])])
+    await run_phase([
+        (FunnelStatistic, gen_funnel_statistics, min(volumes['funnel_statistics'], volumes['users'] * FUNNELS)),
+        (Subscription, gen_subscriptions, volumes['subscriptions']),
+        (FreeLinkUse, gen_free_link_uses, volumes['free_link_uses']),
+    ])
+    return report
+
+
+async def main():
+    args = parse_args()
+
+    from database.engine import create_db, engine
+
+    engine.echo = False
+    volumes = volumes_from_args(args)
+    if args.create_tables:
+        await create_db()
+
+    print(f"🌱 Seeding {engine.dialect.name}: {volumes}")
+    started = time.perf_counter()
+    try:
+        await seed_database(
+            engine, volumes, args.seed, args.workers, args.batch_size, use_copy=False if args.no_copy else None
+        )
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        await engine.dispose()
+    print(f"\n🎉 Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,428 @@
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Date, and_, case, cast, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import FreeLinkUse, Subscription, SubscriptionPlan
+from database.orm_query import (
+    orm_replace_subscription_rollups,
+    orm_upsert_subscription_rollups,
+    orm_get_last_subscription_rollup_day,
+    orm_get_subscription_rollups,
+    orm_replace_free_link_rollups,
+    orm_get_free_link_rollups_refreshed_at,
+    orm_get_changed_free_link_ids,
+    orm_get_free_link_rollups,
+    orm_get_free_link_rollup_totals
+)
+
+
+ANALYTICS_CHUNK_SIZE = int(os.getenv('ANALYTICS_CHUNK_SIZE', '5000'))
+# Har soatlik yangilashda qayta hisoblanadigan oxirgi kunlar (kechikib tasdiqlangan to'lovlar uchun)
+ANALYTICS_REFRESH_DAYS = int(os.getenv('ANALYTICS_REFRESH_DAYS', '7'))
+# Free link rollup lari shuncha link dan iborat bo'laklarda qayta hisoblanadi (IN (...) ro'yxati uchun)
+FREE_LINK_REFRESH_BATCH = 500
+
+
+def _empty_delta() -> Dict[str, Any]:
+    return {
+        'revenue_usd': 0.0,
+        'revenue_uzs': 0,
+        'new_paid': 0,
+        'active_delta': 0,
+        'churned': 0,
+        'mrr_delta': 0.0,
+    }
+
+
+def _day(column, dialect: str):
+    """DateTime ustunidan kun (SQLite da CAST AS DATE faqat yilni qaytaradi)"""
+    return func.date(column) if dialect == 'sqlite' else cast(column, Date)
+
+
+def _as_date(value) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _monthly_price(price_usd, duration_days: int) -> float:
+    """Tarif narxini 30 kunlik (oylik) summaga keltirish"""
+    return float(price_usd) * 30 / max(duration_days, 1)
+
+
+class AnalyticsService:
+    """Obunalar bo'yicha daromad, churn va MRR analitikasi
+
+    To'langan (payment_verified) obuna [created, expires_at) oralig'ida faol hisoblanadi.
+    Foydalanuvchining bir-biriga ulangan obunalari bitta "to'lov davri" ga birlashtiriladi:
+    davr uzaytirilmasdan tugagan kun - churn kuni.
+    """
+
+    @staticmethod
+    async def _collect_deltas_sql(session: AsyncSession) -> Dict[date, Dict[str, Any]]:
+        """PostgreSQL: kunlik o'zgarishlarni window funksiyalar bilan hisoblash"""
+        deltas: Dict[date, Dict[str, Any]] = defaultdict(_empty_delta)
+        verified = Subscription.payment_verified == True
+        start_d = cast(Subscription.created, Date)
+        end_d = cast(Subscription.expires_at, Date)
+
+        # Daromad va yangi to'lovlar - obuna yaratilgan kun bo'yicha
+        revenue_query = select(
+            start_d, func.sum(SubscriptionPlan.price_usd), func.sum(SubscriptionPlan.price_uzs), func.count()
+        ).join(SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id).where(verified).group_by(start_d)
+        for day, revenue_usd, revenue_uzs, new_paid in (await session.execute(revenue_query)).all():
+            deltas[day]['revenue_usd'] += float(revenue_usd or 0)
+            deltas[day]['revenue_uzs'] += int(revenue_uzs or 0)
+            deltas[day]['new_paid'] += new_paid
+
+        # MRR: boshlanish kuni +, tugash kuni -
+        monthly = SubscriptionPlan.price_usd * 30 / func.greatest(SubscriptionPlan.duration_days, 1)
+        mrr_events = union_all(
+            select(start_d.label('day'), monthly.label('mrr'))
+            .join(SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id).where(verified),
+            select(end_d.label('day'), (-monthly).label('mrr'))
+            .join(SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id).where(verified),
+        ).subquery()
+        mrr_query = select(mrr_events.c.day, func.sum(mrr_events.c.mrr)).group_by(mrr_events.c.day)
+        for day, mrr_delta in (await session.execute(mrr_query)).all():
+            deltas[day]['mrr_delta'] += float(mrr_delta or 0)
+
+        # Foydalanuvchi to'lov davrlari (gaps-and-islands)
+        paid = select(
+            Subscription.user_id.label('user_id'), start_d.label('start_d'), end_d.label('end_d')
+        ).where(verified).subquery()
+        marked = select(
+            paid.c.user_id, paid.c.start_d, paid.c.end_d,
+            func.max(paid.c.end_d).over(
+                partition_by=paid.c.user_id, order_by=paid.c.start_d, rows=(None, -1)
+            ).label('prev_end')
+        ).subquery()
+        grouped = select(
+            marked.c.user_id, marked.c.start_d, marked.c.end_d,
+            func.sum(
+                case(((marked.c.prev_end == None) | (marked.c.start_d > marked.c.prev_end), 1), else_=0)
+            ).over(partition_by=marked.c.user_id, order_by=marked.c.start_d).label('grp')
+        ).subquery()
+        islands = select(
+            func.min(grouped.c.start_d).label('start_d'), func.max(grouped.c.end_d).label('end_d')
+        ).group_by(grouped.c.user_id, grouped.c.grp).subquery()
+        island_events = union_all(
+            select(islands.c.start_d.label('day'), literal(1).label('delta'), literal(0).label('churn')),
+            select(islands.c.end_d.label('day'), literal(-1).label('delta'), literal(1).label('churn')),
+        ).subquery()
+        islands_query = select(
+            island_events.c.day, func.sum(island_events.c.delta), func.sum(island_events.c.churn)
+        ).group_by(island_events.c.day)
+        for day, active_delta, churned in (await session.execute(islands_query)).all():
+            deltas[day]['active_delta'] += int(active_delta)
+            deltas[day]['churned'] += int(churned)
+
+        return deltas
+
+    @staticmethod
+    async def _collect_deltas_python(session: AsyncSession) -> Dict[date, Dict[str, Any]]:
+        """SQLite: obunalarni chunk-chunk o'qib, kunlik o'zgarishlarni Python da hisoblash"""
+        deltas: Dict[date, Dict[str, Any]] = defaultdict(_empty_delta)
+        query = select(
+            Subscription.user_id, Subscription.created, Subscription.expires_at,
+            SubscriptionPlan.price_usd, SubscriptionPlan.price_uzs, SubscriptionPlan.duration_days
+        ).join(SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id).where(
+            Subscription.payment_verified == True
+        ).order_by(Subscription.user_id, Subscription.created).execution_options(
+            yield_per=ANALYTICS_CHUNK_SIZE, stream_results=True
+        )
+
+        def close_island(start: date, end: date):
+            deltas[start]['active_delta'] += 1
+            deltas[end]['active_delta'] -= 1
+            deltas[end]['churned'] += 1
+
+        current_user = None
+        island_start = island_end = None
+        result = await session.stream(query)
+        async for chunk in result.partitions():
+            for user_id, created, expires_at, price_usd, price_uzs, duration_days in chunk:
+                start, end = created.date(), expires_at.date()
+
+                deltas[start]['revenue_usd'] += float(price_usd)
+                deltas[start]['revenue_uzs'] += int(price_uzs)
+                deltas[start]['new_paid'] += 1
+                monthly = _monthly_price(price_usd, duration_days)
+                deltas[start]['mrr_delta'] += monthly
+                deltas[end]['mrr_delta'] -= monthly
+
+                if user_id != current_user or start > island_end:
+                    if island_start is not None:
+                        close_island(island_start, island_end)
+                    current_user, island_start, island_end = user_id, start, end
+                else:
+                    island_end = max(island_end, end)
+
+        if island_start is not None:
+            close_island(island_start, island_end)
+        return deltas
+
+    @staticmethod
+    async def _collect_recent_rows(session: AsyncSession, since: date) -> list[Dict[str, Any]]:
+        """[since, bugun] kunlari: faqat shu oraliq bilan kesishgan obunalar o'qiladi
+
+        Kun D uchun: faol to'lovchilar va MRR - start <= D < end obunalar, churn - D da tugagan
+        va D ni qoplaydigan boshqa obunasi yo'q foydalanuvchilar (to'liq hisoblash bilan bir xil).
+        """
+        today = date.today()
+        days = [since + timedelta(days=i) for i in range((today - since).days + 1)]
+        rows = {day: {**_empty_delta(), 'active': set(), 'ending': set(), 'mrr': 0.0} for day in days}
+
+        query = select(
+            Subscription.user_id, Subscription.created, Subscription.expires_at,
+            SubscriptionPlan.price_usd, SubscriptionPlan.price_uzs, SubscriptionPlan.duration_days
+        ).join(SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id).where(
+            Subscription.payment_verified == True,
+            Subscription.expires_at >= datetime.combine(since, time.min),
+            Subscription.created < datetime.combine(today + timedelta(days=1), time.min),
+        ).execution_options(yield_per=ANALYTICS_CHUNK_SIZE, stream_results=True)
+
+        result = await session.stream(query)
+        async for chunk in result.partitions():
+            for user_id, created, expires_at, price_usd, price_uzs, duration_days in chunk:
+                start, end = created.date(), expires_at.date()
+                if start in rows:
+                    rows[start]['revenue_usd'] += float(price_usd)
+                    rows[start]['revenue_uzs'] += int(price_uzs)
+                    rows[start]['new_paid'] += 1
+                if end in rows:
+                    rows[end]['ending'].add(user_id)
+                monthly = _monthly_price(price_usd, duration_days)
+                day = max(start, since)
+                while day < end and day <= today:
+                    rows[day]['active'].add(user_id)
+                    rows[day]['mrr'] += monthly
+                    day += timedelta(days=1)
+
+        return [{
+            'day': day,
+            'revenue_usd': round(row['revenue_usd'], 2),
+            'revenue_uzs': row['revenue_uzs'],
+            'new_paid': row['new_paid'],
+            'active_paying': len(row['active']),
+            'churned': len(row['ending'] - row['active']),
+            'mrr_usd': round(row['mrr'], 2),
+        } for day, row in rows.items()]
+
+    @staticmethod
+    async def refresh_daily_rollups(session: AsyncSession, full: bool = False) -> int:
+        """Oxirgi ANALYTICS_REFRESH_DAYS kunni qayta hisoblash (jadval bo'sh yoki full=True - to'liq)
+
+        Yozilgan kunlar sonini qaytaradi.
+        """
+        started = datetime.now()
+        last_day = await orm_get_last_subscription_rollup_day(session)
+        if not full and last_day is not None:
+            # Bot uzoq to'xtagan bo'lsa - oxirgi yozilgan kundan boshlab (oraliq qolmasligi uchun)
+            since = min(last_day, date.today() - timedelta(days=max(ANALYTICS_REFRESH_DAYS, 1) - 1))
+            rows = await AnalyticsService._collect_recent_rows(session, since)
+            await orm_upsert_subscription_rollups(session, rows)
+            logging.info(
+                f"Subscription rollups updated: {len(rows)} days since {since} in "
+                f"{(datetime.now() - started).total_seconds():.2f}s"
+            )
+            return len(rows)
+
+        if session.bind.dialect.name == 'postgresql':
+            deltas = await AnalyticsService._collect_deltas_sql(session)
+        else:
+            deltas = await AnalyticsService._collect_deltas_python(session)
+
+        today = date.today()
+        rows = []
+        if deltas:
+            active = 0
+            mrr = 0.0
+            day = min(deltas)
+            while day <= today:
+                delta = deltas.get(day) or _empty_delta()
+                active += delta['active_delta']
+                mrr += delta['mrr_delta']
+                rows.append({
+                    'day': day,
+                    'revenue_usd': round(delta['revenue_usd'], 2),
+                    'revenue_uzs': delta['revenue_uzs'],
+                    'new_paid': delta['new_paid'],
+                    'active_paying': active,
+                    'churned': delta['churned'],
+                    'mrr_usd': round(max(mrr, 0.0), 2),
+                })
+                day += timedelta(days=1)
+
+        await orm_replace_subscription_rollups(session, rows)
+        logging.info(
+            f"Subscription rollups rebuilt: {len(rows)} days in "
+            f"{(datetime.now() - started).total_seconds():.2f}s"
+        )
+        return len(rows)
+
+    @staticmethod
+    async def get_summary(session: AsyncSession, days: int = 30) -> Dict[str, Any]:
+        """Admin ekrani uchun rollup jadvalidan xulosa"""
+        rollups = await orm_get_subscription_rollups(session, date.today() - timedelta(days=days))
+        if not rollups:
+            return {'days': [], 'mrr_usd': 0.0, 'active_paying': 0,
+                    'revenue_usd': 0.0, 'revenue_uzs': 0, 'churned': 0, 'churn_rate': 0.0,
+                    'refreshed_at': None}
+
+        first, last = rollups[0], rollups[-1]
+        churned = sum(r.churned for r in rollups)
+        base = first.active_paying or 1
+        return {
+            'days': rollups,
+            'mrr_usd': float(last.mrr_usd),
+            'active_paying': last.active_paying,
+            'revenue_usd': sum(float(r.revenue_usd) for r in rollups),
+            'revenue_uzs': sum(r.revenue_uzs for r in rollups),
+            'churned': churned,
+            'churn_rate': churned / base * 100,
+            'refreshed_at': last.updated,
+        }
+
+
+class FreeLinkAnalyticsService:
+    """Free link kampaniyalari: kirishlar dinamikasi, pullik obunaga konversiya va daromad
+
+    Foydalanuvchi birinchi marta kirgan free link ga biriktiriladi (first touch) - bir nechta link
+    orqali kirgan foydalanuvchi konversiyasi ikki marta hisoblanmaydi. Konversiya - shu kirishdan
+    keyin yaratilgan to'langan obuna; daromad - o'sha obunalar narxi.
+    """
+
+    @staticmethod
+    async def _collect_rows(session: AsyncSession, free_link_ids: Optional[list[int]] = None) -> list[Dict[str, Any]]:
+        """Link x kun qatorlari; free_link_ids berilsa - faqat shu link lar (butun davri)"""
+        dialect = session.bind.dialect.name
+        rows: Dict[tuple, Dict[str, Any]] = defaultdict(lambda: {
+            'redemptions': 0, 'new_users': 0, 'converted': 0, 'revenue_usd': 0.0, 'revenue_uzs': 0,
+        })
+
+        # Kirishlar - kun bo'yicha
+        use_day = _day(FreeLinkUse.used_at, dialect)
+        redemptions_query = select(
+            FreeLinkUse.free_link_id, use_day, func.count()
+        ).group_by(FreeLinkUse.free_link_id, use_day)
+        if free_link_ids is not None:
+            redemptions_query = redemptions_query.where(FreeLinkUse.free_link_id.in_(free_link_ids))
+        for free_link_id, day, redemptions in (await session.execute(redemptions_query)).all():
+            rows[(free_link_id, _as_date(day))]['redemptions'] = redemptions
+
+        # Har bir foydalanuvchining birinchi kirishi (link lar cheklangan bo'lsa ham - foydalanuvchining
+        # barcha kirishlari ichidan, aks holda boshqa link orqali kelganlar ham shu link ga yozilib qoladi)
+        ranked = select(
+            FreeLinkUse.user_id, FreeLinkUse.free_link_id, FreeLinkUse.used_at,
+            func.row_number().over(
+                partition_by=FreeLinkUse.user_id, order_by=(FreeLinkUse.used_at, FreeLinkUse.id)
+            ).label('rn')
+        )
+        if free_link_ids is not None:
+            ranked = ranked.where(FreeLinkUse.user_id.in_(
+                select(FreeLinkUse.user_id).where(FreeLinkUse.free_link_id.in_(free_link_ids))
+            ))
+        ranked = ranked.subquery()
+        first_day = _day(ranked.c.used_at, dialect)
+        first_touch = ranked.c.rn == 1
+        if free_link_ids is not None:
+            first_touch = and_(first_touch, ranked.c.free_link_id.in_(free_link_ids))
+
+        new_users_query = select(
+            ranked.c.free_link_id, first_day, func.count()
+        ).where(first_touch).group_by(ranked.c.free_link_id, first_day)
+        for free_link_id, day, new_users in (await session.execute(new_users_query)).all():
+            rows[(free_link_id, _as_date(day))]['new_users'] = new_users
+
+        # Birinchi kirishdan keyingi to'langan obunalar
+        conversion_query = select(
+            ranked.c.free_link_id, first_day,
+            func.count(ranked.c.user_id.distinct()),
+            func.sum(SubscriptionPlan.price_usd),
+            func.sum(SubscriptionPlan.price_uzs),
+        ).join(
+            Subscription, and_(
+                Subscription.user_id == ranked.c.user_id,
+                Subscription.payment_verified == True,
+                Subscription.created >= ranked.c.used_at,
+            )
+        ).join(
+            SubscriptionPlan, Subscription.plan_id == SubscriptionPlan.id
+        ).where(first_touch).group_by(ranked.c.free_link_id, first_day)
+        for free_link_id, day, converted, revenue_usd, revenue_uzs in (await session.execute(conversion_query)).all():
+            row = rows[(free_link_id, _as_date(day))]
+            row['converted'] = converted
+            row['revenue_usd'] = round(float(revenue_usd or 0), 2)
+            row['revenue_uzs'] = int(revenue_uzs or 0)
+
+        return [
+            {'free_link_id': free_link_id, 'day': day, **values}
+            for (free_link_id, day), values in sorted(rows.items())
+        ]
+
+    @staticmethod
+    async def refresh_daily_rollups(session: AsyncSession, full: bool = False) -> int:
+        """free_link_daily_rollup ni yangilash, yozilgan qatorlar sonini qaytaradi
+
+        Konversiya birinchi kirish kuniga yoziladi, shuning uchun bugungi to'lov eski kunni ham
+        o'zgartiradi. Kun oynasi o'rniga o'zgargan link lar qayta hisoblanadi: oxirgi
+        ANALYTICS_REFRESH_DAYS kunda kirish bo'lgan yoki foydalanuvchisi to'lov qilgan link lar.
+        Jadval bo'sh yoki full=True - to'liq qayta hisoblash.
+        """
+        started = datetime.now()
+        refreshed_at = await orm_get_free_link_rollups_refreshed_at(session)
+        if full or refreshed_at is None:
+            records = await FreeLinkAnalyticsService._collect_rows(session)
+            await orm_replace_free_link_rollups(session, records)
+            logging.info(
+                f"Free link rollups rebuilt: {len(records)} rows in "
+                f"{(datetime.now() - started).total_seconds():.2f}s"
+            )
+            return len(records)
+
+        # Bot uzoq to'xtagan bo'lsa - oxirgi yangilashdan boshlab (func.now() UTC bo'lishi mumkin - 1 kun zaxira)
+        since = min(
+            date.today() - timedelta(days=max(ANALYTICS_REFRESH_DAYS, 1) - 1),
+            refreshed_at.date() - timedelta(days=1),
+        )
+        free_link_ids = await orm_get_changed_free_link_ids(session, datetime.combine(since, time.min))
+        written = 0
+        for i in range(0, len(free_link_ids), FREE_LINK_REFRESH_BATCH):
+            batch = free_link_ids[i:i + FREE_LINK_REFRESH_BATCH]
+            records = await FreeLinkAnalyticsService._collect_rows(session, batch)
+            await orm_replace_free_link_rollups(session, records, free_link_ids=batch)
+            written += len(records)
+        logging.info(
+            f"Free link rollups updated: {len(free_link_ids)} links ({written} rows) changed since {since} in "
+            f"{(datetime.now() - started).total_seconds():.2f}s"
+        )
+        return written
+
+    @staticmethod
+    async def get_summary(session: AsyncSession, free_link_id: int, days: int = 14) -> Dict[str, Any]:
+        """Admin ekrani uchun: butun davr yig'indilari va so'nggi kunlar (bo'sh kunlar 0 bilan)"""
+        totals = await orm_get_free_link_rollup_totals(session, free_link_id)
+        if totals['refreshed_at'] is None:
+            # Kirishlari yo'q link uchun qator yozilmaydi: jadval hisoblangan bo'lsa - nollar
+            totals['refreshed_at'] = await orm_get_free_link_rollups_refreshed_at(session)
+        since = date.today() - timedelta(days=days - 1)
+        by_day = {r.day: r for r in await orm_get_free_link_rollups(session, free_link_id, since)}
+
+        timeline = []
+        for offset in range(days):
+            day = since + timedelta(days=offset)
+            rollup = by_day.get(day)
+            timeline.append({
+                'day': day,
+                'redemptions': rollup.redemptions if rollup else 0,
+                'new_users': rollup.new_users if rollup else 0,
+                'converted': rollup.converted if rollup else 0,
+            })
+
+        totals['conversion_rate'] = totals['converted'] / totals['new_users'] * 100 if totals['new_users'] else 0.0
+        totals['days'] = timeline
+        return totals
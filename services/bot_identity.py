@@ -0,0 +1,61 @@
+import importlib.util
+import io
+import logging
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.utils.deep_linking import create_deep_link
+
+from common.cache import TTLCache
+
+
+class BotIdentity:
+    """Bot username (startda bir marta aniqlanadi) va deep-linklar keshi"""
+
+    def __init__(self) -> None:
+        self.id: Optional[int] = None
+        self.username: Optional[str] = None
+        # Link lar o'zgarmaydi - TTL faqat hajmni cheklash uchun (eski kalitlar LRU bo'yicha chiqadi)
+        self._links = TTLCache(ttl=86400, maxsize=4096)
+
+    async def resolve(self, bot: Bot) -> None:
+        """getMe - faqat startda (yoki username hali noma'lum bo'lsa)"""
+        me = await bot.me()
+        self.id = me.id
+        self.username = me.username
+        self._links.clear()
+
+    def deep_link(self, key: str) -> str:
+        """https://t.me/<bot>?start=<key> (keshlangan)"""
+        link = self._links.get(key)
+        if link is None:
+            username = self.username or 'your_bot'
+            try:
+                link = create_deep_link(username, 'start', key)
+            except ValueError:
+                # Start parametri faqat A-Z, a-z, 0-9, _ va - bo'lishi mumkin; eski kalitlar uchun ham ko'rsatamiz
+                logging.warning(f"Deep link key {key!r} is not a valid start parameter")
+                link = f"https://t.me/{username}?start={key}"
+            if self.username:
+                self._links.set(key, link)
+        return link
+
+    @staticmethod
+    def qr_available() -> bool:
+        """segno o'rnatilganmi (import qilmasdan)"""
+        return importlib.util.find_spec('segno') is not None
+
+    @staticmethod
+    def qr_png(data: str, scale: int = 8) -> bytes:
+        """Link uchun QR kod (PNG) - tarmoqsiz, segno kutubxonasi bilan"""
+        try:
+            import segno
+        except ImportError:
+            raise RuntimeError("QR kod uchun segno o'rnatilmagan (pip install segno)")
+
+        buffer = io.BytesIO()
+        segno.make(data, error='m').save(buffer, kind='png', scale=scale, border=2)
+        return buffer.getvalue()
+
+
+bot_identity = BotIdentity()
@@ -0,0 +1,163 @@
+import asyncio
+import csv
+import gzip
+import importlib.util
+import logging
+import os
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.orm_query import (
+    orm_stream_users_rows,
+    orm_stream_subscriptions_rows,
+    orm_stream_funnel_statistics_rows
+)
+
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+
+# Har bir eksport uchun: ustunlar (nom, parquet turi) va streaming funksiya
+EXPORTS = {
+    'users': {
+        'columns': [
+            ('user_id', 'int64'),
+            ('full_name', 'string'),
+            ('phone', 'string'),
+            ('created', 'timestamp'),
+            ('updated', 'timestamp'),
+        ],
+        'stream': orm_stream_users_rows,
+    },
+    'subscriptions': {
+        'columns': [
+            ('id', 'int64'),
+            ('user_id', 'int64'),
+            ('plan', 'string'),
+            ('price_usd', 'float64'),
+            ('price_uzs', 'int64'),
+            ('is_active', 'bool'),
+            ('payment_verified', 'bool'),
+            ('expires_at', 'timestamp'),
+            ('created', 'timestamp'),
+        ],
+        'stream': orm_stream_subscriptions_rows,
+    },
+    'funnel_stats': {
+        'columns': [
+            ('id', 'int64'),
+            ('user_id', 'int64'),
+            ('funnel_key', 'string'),
+            ('current_step', 'int64'),
+            ('completed', 'bool'),
+            ('started_at', 'timestamp'),
+            ('completed_at', 'timestamp'),
+        ],
+        'stream': orm_stream_funnel_statistics_rows,
+    },
+}
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+
+def _normalize_value(value):
+    """Decimal qiymatlarni float ga aylantirish (CSV va Parquet uchun)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class ExportService:
+    """Jadvallarni fayl ko'rinishida streaming eksport qilish servisi"""
+
+    @staticmethod
+    def parquet_available() -> bool:
+        """pyarrow o'rnatilganmi (import qilmasdan)"""
+        return importlib.util.find_spec('pyarrow') is not None
+
+    @staticmethod
+    async def export_to_file(session: AsyncSession, kind: str, fmt: str = 'csv') -> tuple[str, int]:
+        """Jadvalni vaqtinchalik faylga eksport qilish, (fayl yo'li, qatorlar soni) qaytaradi"""
+        if kind not in EXPORTS:
+            raise ValueError(f"Noma'lum eksport turi: {kind}")
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Noma'lum format: {fmt}")
+
+        suffix = '.csv.gz' if fmt == 'csv' else '.parquet'
+        fd, path = tempfile.mkstemp(prefix=f"{kind}_", suffix=suffix)
+        os.close(fd)
+
+        try:
+            if fmt == 'csv':
+                rows = await ExportService._write_csv(session, kind, path)
+            else:
+                rows = await ExportService._write_parquet(session, kind, path)
+        except Exception:
+            os.remove(path)
+            raise
+
+        logging.info(f"Exported {rows} rows of '{kind}' to {path}")
+        return path, rows
+
+    @staticmethod
+    async def _write_csv(session: AsyncSession, kind: str, path: str) -> int:
+        """Gzip CSV ga chunk-chunk yozish"""
+        export = EXPORTS[kind]
+        rows = 0
+        with gzip.open(path, 'wt', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow([name for name, _ in export['columns']])
+            async for chunk in export['stream'](session, EXPORT_CHUNK_SIZE):
+                # Siqish CPU talab qiladi - event loop ni bloklamaslik uchun threadda
+                await asyncio.to_thread(
+                    writer.writerows,
+                    [[_normalize_value(v) for v in row] for row in chunk]
+                )
+                rows += len(chunk)
+        return rows
+
+    @staticmethod
+    async def _write_parquet(session: AsyncSession, kind: str, path: str) -> int:
+        """Parquet faylga har bir chunk ni alohida row group sifatida yozish"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet eksport uchun pyarrow o'rnatilmagan")
+
+        types = {
+            'int64': pa.int64(),
+            'float64': pa.float64(),
+            'string': pa.string(),
+            'bool': pa.bool_(),
+            'timestamp': pa.timestamp('us'),
+        }
+        export = EXPORTS[kind]
+        names = [name for name, _ in export['columns']]
+        schema = pa.schema([(name, types[type_name]) for name, type_name in export['columns']])
+
+        rows = 0
+        writer = pq.ParquetWriter(path, schema, compression='snappy')
+        try:
+            async for chunk in export['stream'](session, EXPORT_CHUNK_SIZE):
+                columns = list(zip(*chunk))
+                batch = pa.record_batch(
+                    [
+                        pa.array([_normalize_value(v) for v in column], type=schema.field(i).type)
+                        for i, column in enumerate(columns)
+                    ],
+                    names=names
+                )
+                await asyncio.to_thread(writer.write_batch, batch)
+                rows += len(chunk)
+        finally:
+            writer.close()
+        return rows
+
+    @staticmethod
+    def build_filename(kind: str, fmt: str) -> str:
+        """Yuboriladigan fayl nomi"""
+        suffix = 'csv.gz' if fmt == 'csv' else 'parquet'
+        return f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{suffix}"
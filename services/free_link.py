@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.orm_query import (
     orm_get_free_link_by_key, orm_check_free_link_usage, orm_use_free_link,
-    orm_get_user
+    orm_get_user_profile
 )
 from kbds.inline import get_freelink_access_kb
 from kbds.reply import phone_request_kb
@@ -79,8 +79,8 @@ class FreeLinkService:
                 return True
             
             # Telefon raqamni tekshirish
-            user = await orm_get_user(session, message.from_user.id)
-            if not user or not user.phone:
+            profile = await orm_get_user_profile(session, message.from_user.id)
+            if not profile or not profile.has_phone:
                 # Telefon raqam yo'q - so'ramiz va free link keyni saqlaymiz
                 if state:
                     await state.update_data(pending_free_link_key=key)
@@ -142,6 +142,10 @@ class FreeLinkService:
                 logging.error(f"Error creating invite link for channel {free_link.channel_id}: {e}")
                 # Agar invite link yaratishda xatolik bo'lsa, standart linkni ishlatamiz
                 one_time_link = free_link.channel_invite_link
+                if not one_time_link:
+                    # Ommaviy yaratilgan link - kanal linki hali fonda tayyorlanmoqda
+                    await message.answer("❌ Kanal linkini yaratib bo'lmadi, keyinroq qayta urinib ko'ring.")
+                    return True
             
             # Foydalanuvchiga xabar yuborish
             duration_text = _format_duration_days(free_link.duration_days)
@@ -0,0 +1,141 @@
+import asyncio
+import csv
+import io
+import logging
+import os
+import secrets
+from datetime import datetime
+from typing import Optional
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.rate_limit import bulk_priority
+from common.tasks import supervisor
+from database.engine import session_maker
+from database.orm_query import (
+    orm_bulk_create_free_links,
+    orm_get_free_links_pending_invite,
+    orm_set_free_link_invite_links
+)
+from services.bot_identity import bot_identity
+
+
+FREE_LINK_BULK_MAX = int(os.getenv('FREE_LINK_BULK_MAX', '5000'))
+FREE_LINK_INVITE_WORKERS = int(os.getenv('FREE_LINK_INVITE_WORKERS', '4'))
+FREE_LINK_INVITE_BATCH = 200
+
+# channel_invite_link bo'sh - invite link hali fonda yaratilmagan
+PENDING_INVITE = ''
+
+
+class FreeLinkBulkService:
+    """Kampaniya uchun free linklarni ommaviy yaratish; kanal invite linklari fonda yaratiladi"""
+
+    _task: Optional[asyncio.Task] = None
+    _rerun = False
+
+    @staticmethod
+    def generate_keys(prefix: str, count: int) -> list[str]:
+        """prefix_<tasodifiy> kalitlar (ketma-ket raqamlarni taxmin qilib bo'lmasin)"""
+        keys = set()
+        while len(keys) < count:
+            keys.add(f"{prefix}_{secrets.token_urlsafe(6)}")
+        return list(keys)
+
+    @staticmethod
+    async def create_campaign(
+        session: AsyncSession,
+        prefix: str,
+        count: int,
+        max_uses: int,
+        duration_days: int,
+        channel_id: str,
+        created_by: int
+    ) -> list[tuple[int, str, str]]:
+        """count ta free link yaratish (batch INSERT), (id, key, name) ro'yxatini qaytaradi"""
+        created = []
+        for _ in range(3):
+            missing = count - len(created)
+            if missing <= 0:
+                break
+            keys = FreeLinkBulkService.generate_keys(prefix, missing)
+            rows = [{
+                'key': key,
+                'name': f"{prefix} #{len(created) + i + 1}",
+                'channel_id': channel_id,
+                'channel_invite_link': PENDING_INVITE,
+                'duration_days': duration_days,
+                'max_uses': max_uses,
+                'created_by': created_by,
+            } for i, key in enumerate(keys)]
+            created += await orm_bulk_create_free_links(session, rows)
+        return sorted(created)
+
+    @staticmethod
+    def build_csv(links: list[tuple[int, str, str]]) -> bytes:
+        """id, name, key, link ustunli CSV (Excel uchun BOM bilan)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['id', 'name', 'key', 'link'])
+        for free_link_id, key, name in links:
+            writer.writerow([free_link_id, name, key, bot_identity.deep_link(key)])
+        return buffer.getvalue().encode('utf-8-sig')
+
+    @classmethod
+    def schedule_invite_links(cls, bot: Bot) -> asyncio.Task:
+        """Invite linki yo'q free linklar uchun fon vazifasini ishga tushirish (bittadan ortiq emas)"""
+        cls._rerun = True
+        if cls._task is None or cls._task.done():
+            # To'xtatishda joriy batch tugashi kutiladi, qolganlari keyingi startda
+            cls._task = supervisor.spawn(cls._fill_invite_links(bot), name='free_link_invites', drain=True)
+        return cls._task
+
+    @classmethod
+    async def _fill_invite_links(cls, bot: Bot):
+        """Kutilayotgan free linklar uchun invite link yaratish (FREE_LINK_INVITE_WORKERS ta parallel)"""
+        with bulk_priority():
+            while cls._rerun:
+                cls._rerun = False
+                started = datetime.now()
+                created = failed = 0
+                after_id = 0
+                while True:
+                    async with session_maker() as session:
+                        pending = await orm_get_free_links_pending_invite(
+                            session, after_id=after_id, limit=FREE_LINK_INVITE_BATCH
+                        )
+                    if not pending:
+                        break
+                    after_id = pending[-1][0]
+
+                    invite_links = await cls._create_invite_links(bot, pending)
+                    failed += len(pending) - len(invite_links)
+                    created += len(invite_links)
+                    async with session_maker() as session:
+                        await orm_set_free_link_invite_links(session, invite_links)
+
+                if created or failed:
+                    logging.info(
+                        f"Free link invite links: {created} created, {failed} failed in "
+                        f"{(datetime.now() - started).total_seconds():.1f}s"
+                    )
+
+    @staticmethod
+    async def _create_invite_links(bot: Bot, pending: list[tuple[int, str, str]]) -> dict[int, str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+        invite_links: dict[int, str] = {}
+
+        async def worker():
+            while not queue.empty():
+                free_link_id, key, channel_id = queue.get_nowait()
+                try:
+                    invite = await bot.create_chat_invite_link(chat_id=channel_id, name=f"FreeLink_{key}"[:32])
+                    invite_links[free_link_id] = invite.invite_link
+                except Exception as e:
+                    logging.error(f"Error creating invite link for free link {free_link_id}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(max(FREE_LINK_INVITE_WORKERS, 1))))
+        return invite_links
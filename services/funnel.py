@@ -10,6 +10,7 @@ from aiogram.exceptions import TelegramAPIError
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 
 from database.orm_query import (
     orm_get_funnel_by_key,
@@ -17,9 +18,11 @@ from database.orm_query import (
     orm_update_funnel_step,
     orm_complete_funnel,
     orm_get_active_subscription_plans,
-    orm_get_user
+    orm_get_user_profile
 )
-from kbds.inline import get_funnel_next_step_kb, get_subscription_plans_kb
+from common.tasks import supervisor
+from database.models import FunnelStatistic, FunnelStep
+from kbds.inline import get_funnel_next_step_kb, get_subscription_plans_kb, get_back_to_menu_kb
 from kbds.reply import phone_request_kb
 
 
@@ -36,8 +39,8 @@ class FunnelService:
         """Запуск воронки для пользователя"""
         try:
             # Avval foydalanuvchining telefon raqamini tekshiramiz
-            user = await orm_get_user(session, message.from_user.id)
-            if not user or not user.phone:
+            profile = await orm_get_user_profile(session, message.from_user.id)
+            if not profile or not profile.has_phone:
                 # Telefon raqam yo'q - so'raymiz va funnel keyni saqlaymiz
                 if state:
                     await state.update_data(pending_funnel_key=funnel_key)
@@ -74,7 +77,6 @@ class FunnelService:
                 return False
             
             # Получаем шаги воронки отдельным запросом
-            from database.models import FunnelStep
             steps_query = select(FunnelStep).where(
                 FunnelStep.funnel_id == funnel.id
             ).order_by(FunnelStep.step_number)
@@ -126,8 +128,6 @@ class FunnelService:
         """Переход к следующему шагу воронки"""
         try:
             # Получаем текущую статистику пользователя
-            from database.orm_query import select, FunnelStatistic, Funnel
-            from sqlalchemy.orm import joinedload
             
             query = select(FunnelStatistic).where(
                 FunnelStatistic.user_id == callback.from_user.id,
@@ -144,7 +144,6 @@ class FunnelService:
             funnel = stat.funnel
             
             # Получаем шаги воронки отдельным запросом
-            from database.models import FunnelStep
             steps_query = select(FunnelStep).where(
                 FunnelStep.funnel_id == funnel.id
             ).order_by(FunnelStep.step_number)
@@ -306,7 +305,6 @@ class FunnelService:
                 )
             else:
                 # Test tugmasi bilan
-                from kbds.inline import get_back_to_menu_kb
                 keyboard = get_back_to_menu_kb()
                 await message.answer(
                     "🎉 <b>Tabriklaymiz!</b> Voronkani muvaffaqiyatli tugalladingiz!\n\n"
@@ -349,7 +347,7 @@ async def send_funnel_messages(message: types.Message, key: str, session: AsyncS
                     await message.answer(text)
                     await asyncio.sleep(1.5)
 
-            asyncio.create_task(send_all())
+            supervisor.spawn(send_all(), name=f"legacy_funnel:{message.from_user.id}", drain=True)
             logging.info(f"Started funnel for user {message.from_user.id} with key {key}")
 
         except Exception as e:
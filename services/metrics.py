@@ -0,0 +1,374 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from itertools import accumulate
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class Histogram:
+    """HDR uslubidagi histogramma: logarifmik bucketlar, nisbiy aniqlik ~precision
+
+    Qiymatlar millisekundlarda yoziladi. Bucketlar siyrak (dict) saqlanadi,
+    shuning uchun xotira faqat uchragan diapazonlarga sarflanadi.
+    bounds - Prometheus bucket chegaralari: ular uchun aniq sonlar alohida yuritiladi.
+    """
+
+    def __init__(self, precision: float = 0.02, lowest: float = 0.01, bounds: Iterable[float] = ()) -> None:
+        self.lowest = lowest
+        self._log_base = math.log1p(precision)
+        self._buckets: Dict[int, int] = {}
+        self.bounds = tuple(sorted(bounds))
+        self._bound_counts = [0] * len(self.bounds)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return int(math.log(value / self.lowest) / self._log_base) + 1
+
+    def _upper_bound(self, index: int) -> float:
+        return self.lowest * math.exp(self._log_base * index)
+
+    def record(self, value: float) -> None:
+        index = self._index(value)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        if self.bounds:
+            # le - "kichik yoki teng": qiymat o'zidan katta yoki teng birinchi chegaraga tushadi
+            position = bisect_left(self.bounds, value)
+            if position < len(self.bounds):
+                self._bound_counts[position] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """q (0-100) persentil qiymati"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds: Iterable[float]) -> List[Tuple[float, int]]:
+        """Berilgan chegaralar uchun kumulyativ sonlar (Prometheus bucketlari uchun)
+
+        Chegaralar konstruktordagi bounds bilan bir xil bo'lsa - aniq sonlar. Aks holda taxminiy:
+        logarifmik bucket faqat yuqori chegarasi <= bound bo'lsa hisoblanadi, shuning uchun
+        bound dan ~precision pastdagi qiymatlar tushib qolishi mumkin (kamroq ko'rsatadi).
+        """
+        bounds = tuple(bounds)
+        if bounds == self.bounds:
+            return list(zip(bounds, accumulate(self._bound_counts)))
+        items = sorted(self._buckets.items())
+        result = []
+        seen = 0
+        position = 0
+        for bound in bounds:
+            while position < len(items) and self._upper_bound(items[position][0]) <= bound:
+                seen += items[position][1]
+                position += 1
+            result.append((bound, seen))
+        return result
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'mean': round(self.mean, 3),
+            'p50': round(self.percentile(50), 3),
+            'p95': round(self.percentile(95), 3),
+            'p99': round(self.percentile(99), 3),
+            'max': round(self.max, 3),
+        }
+
+
+class HandlerLatency:
+    """Bitta handler uchun umumiy, DB va Telegram API vaqtlari"""
+
+    def __init__(self) -> None:
+        # total Prometheus ga eksport qilinadi - bucketlari aniq
+        self.total = Histogram(bounds=DEFAULT_BUCKETS_MS)
+        self.db = Histogram()
+        self.api = Histogram()
+        self.errors = 0
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            'total_ms': self.total.summary(),
+            'db_ms': self.db.summary(),
+            'api_ms': self.api.summary(),
+            'errors': self.errors,
+        }
+
+
+class LatencyRegistry:
+    """Handler nomi bo'yicha latency statistikasi"""
+
+    def __init__(self) -> None:
+        self.handlers: Dict[str, HandlerLatency] = {}
+        self.started_at = time.time()
+
+    def record(self, name: str, total_ms: float, db_ms: float, api_ms: float, error: bool = False) -> None:
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerLatency()
+        stats.total.record(total_ms)
+        stats.db.record(db_ms)
+        stats.api.record(api_ms)
+        if error:
+            stats.errors += 1
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[str, HandlerLatency]]:
+        """Eng ko'p chaqirilgan handlerlar"""
+        items = sorted(self.handlers.items(), key=lambda item: item[1].total.count, reverse=True)
+        return items[:limit] if limit else items
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            'uptime_seconds': round(time.time() - self.started_at),
+            'handlers': {name: stats.summary() for name, stats in self.top()},
+        }
+
+    def reset(self) -> None:
+        self.handlers.clear()
+        self.started_at = time.time()
+
+
+latency_registry = LatencyRegistry()
+
+
+# ===================== PROMETHEUS METRIKALARI =====================
+
+# Latency bucketlari (soniyalarda)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+DEFAULT_BUCKETS_MS = tuple(bound * 1000 for bound in DEFAULT_BUCKETS)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Metric(ABC):
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        ...
+
+
+class Counter(_Metric):
+    """Faqat o'suvchi hisoblagich"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in sorted(self.values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Gauge(_Metric):
+    """Joriy qiymat; collector berilsa qiymatlar scrape paytida olinadi"""
+
+    kind = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        collector: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.collector = collector
+
+    def set(self, *labels: str, value: float) -> None:
+        self.values[labels] = value
+
+    def inc(self, *labels: str, value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        values = self.collector() if self.collector else self.values
+        lines = self.header()
+        for labels, value in sorted(values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class LabeledHistogram(_Metric):
+    """Label lar bo'yicha Histogram lar to'plami (qiymatlar soniyalarda)"""
+
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[str, ...], Histogram] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        histogram = self.histograms.get(labels)
+        if histogram is None:
+            # Ichki Histogram millisekundlarda ishlaydi
+            histogram = self.histograms[labels] = Histogram(bounds=(bound * 1000 for bound in self.buckets))
+        histogram.record(value * 1000)
+
+    def render(self) -> List[str]:
+        return self.header() + render_histogram_lines(
+            self.name, self.labelnames, sorted(self.histograms.items()), self.buckets
+        )
+
+
+def render_histogram_lines(
+    name: str,
+    labelnames: Tuple[str, ...],
+    items: Iterable[Tuple[Tuple[str, ...], Histogram]],
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+) -> List[str]:
+    """Millisekundli Histogram larni Prometheus formatida (soniyalarda) chiqarish"""
+    lines = []
+    for labels, histogram in items:
+        for bound, count in histogram.cumulative(bound * 1000 for bound in buckets):
+            le = 'le="%g"' % (bound / 1000)
+            lines.append(f'{name}_bucket{_format_labels(labelnames, labels, le)} {count}')
+        inf = _format_labels(labelnames, labels, 'le="+Inf"')
+        lines.append(f'{name}_bucket{inf} {histogram.count}')
+        lines.append(f'{name}_sum{_format_labels(labelnames, labels)} {histogram.sum / 1000:.6f}')
+        lines.append(f'{name}_count{_format_labels(labelnames, labels)} {histogram.count}')
+    return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_prometheus() -> str:
+    """Barcha ro'yxatdan o'tgan metrikalarni Prometheus text formatida"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+updates_total = Counter('bot_updates_total', 'Processed Telegram updates by type', ('type',))
+telegram_api_requests_total = Counter(
+    'telegram_api_requests_total', 'Telegram Bot API requests by method', ('method',)
+)
+telegram_api_errors_total = Counter(
+    'telegram_api_errors_total', 'Telegram Bot API errors by method and error type', ('method', 'error')
+)
+telegram_api_retries_total = Counter(
+    'telegram_api_retries_total', 'Telegram Bot API requests retried after flood control', ('method',)
+)
+scheduler_sweep_seconds = LabeledHistogram(
+    'scheduler_sweep_duration_seconds', 'Duration of periodic background sweeps', ('job',)
+)
+scheduler_sweep_errors_total = Counter(
+    'scheduler_sweep_errors_total', 'Failed periodic background sweeps', ('job',)
+)
+scheduler_last_sweep = Gauge(
+    'scheduler_last_sweep_timestamp_seconds', 'Unix time of the last finished sweep', ('job',)
+)
+broadcast_progress = Gauge(
+    'broadcast_messages', 'Current broadcast progress (total/sent/failed)', ('state',)
+)
+startup_step_seconds = Gauge(
+    'bot_startup_step_seconds', 'Duration of startup steps during the last boot', ('step',)
+)
+
+
+def broadcast_started(total: int) -> None:
+    """Yangi tarqatma: broadcast_messages qaytadan boshlanadi"""
+    broadcast_progress.set('total', value=total)
+    broadcast_progress.set('sent', value=0)
+    broadcast_progress.set('failed', value=0)
+
+
+def broadcast_result(sent: bool) -> None:
+    broadcast_progress.inc('sent' if sent else 'failed')
+
+
+class _HandlerLatencyMetric(_Metric):
+    """latency_registry dagi handler histogrammalarini eksport qilish"""
+
+    kind = 'histogram'
+
+    def render(self) -> List[str]:
+        items = sorted(((name,), stats.total) for name, stats in latency_registry.handlers.items())
+        return self.header() + render_histogram_lines(self.name, self.labelnames, items)
+
+
+_HandlerLatencyMetric(
+    'bot_handler_duration_seconds', 'Update processing time by handler', ('handler',)
+)
+
+
+@contextmanager
+def track_sweep(job: str):
+    """Fon vazifasi (sweep) davomiyligini va xatolarini yozish"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        scheduler_sweep_errors_total.inc(job)
+        raise
+    finally:
+        scheduler_sweep_seconds.observe(job, value=time.perf_counter() - started)
+        scheduler_last_sweep.set(job, value=time.time())
@@ -0,0 +1,84 @@
+import logging
+import os
+from typing import TYPE_CHECKING, Optional
+
+from common.jobs import jobs
+from common.tasks import supervisor
+from database.engine import engine
+from services.metrics import Gauge, latency_registry, render_prometheus
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+# aiohttp.web faqat server yoqilganda import qilinadi (METRICS_PORT=0 da startup tezroq)
+
+
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0') or 0)
+# Prometheus text exposition format versiyasi bilan
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _collect_pool_stats():
+    """SQLAlchemy pool holati (QueuePool bo'lmasa - bo'sh)"""
+    pool = engine.pool
+    stats = {}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[(name,)] = method()
+    return stats
+
+
+Gauge('db_pool_connections', 'SQLAlchemy connection pool state', ('state',), collector=_collect_pool_stats)
+
+
+async def metrics_handler(request: 'web.Request') -> 'web.Response':
+    """Prometheus text format"""
+    from aiohttp import web
+    return web.Response(text=render_prometheus(), headers={'Content-Type': PROMETHEUS_CONTENT_TYPE})
+
+
+async def latency_handler(request: 'web.Request') -> 'web.Response':
+    """Handlerlar latency statistikasi (JSON)"""
+    from aiohttp import web
+    return web.json_response(latency_registry.snapshot())
+
+
+async def health_handler(request: 'web.Request') -> 'web.Response':
+    """Liveness/readiness probe: 200 - ok, 503 - vazifalar nosog'lom yoki bot to'xtatilmoqda"""
+    from aiohttp import web
+    report = jobs.snapshot()
+    if supervisor.closing:
+        report['status'] = 'shutting_down'
+    return web.json_response(report, status=200 if report['status'] == 'ok' else 503)
+
+
+def create_metrics_app() -> 'web.Application':
+    from aiohttp import web
+
+    app = web.Application()
+    app.router.add_get('/metrics', metrics_handler)
+    app.router.add_get('/latency', latency_handler)
+    app.router.add_get('/health', health_handler)
+    return app
+
+
+async def start_metrics_server() -> Optional['web.AppRunner']:
+    """Lokal metrics serverini ishga tushirish (METRICS_PORT=0 bo'lsa o'chirilgan)"""
+    if not METRICS_PORT:
+        return None
+
+    from aiohttp import web
+
+    runner = web.AppRunner(create_metrics_app(), access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    except OSError as e:
+        logging.error(f"Metrics server could not start on {METRICS_HOST}:{METRICS_PORT}: {e}")
+        await runner.cleanup()
+        return None
+
+    logging.info(f"Metrics server listening on http://{METRICS_HOST}:{METRICS_PORT}")
+    return runner
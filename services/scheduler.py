@@ -1,9 +1,8 @@
-import asyncio
 import logging
-from datetime import datetime
 
 from aiogram import Bot
 from database.engine import session_maker
+from common.rate_limit import bulk_priority
 from database.orm_query import (
     orm_get_expired_free_link_uses, 
     orm_mark_free_link_use_expired,
@@ -17,8 +16,8 @@ class FreeLinkScheduler:
     
     @staticmethod
     async def check_expired_free_links(bot: Bot):
-        """Muddati tugagan free linklar uchun foydalanuvchilarni kanaldan chiqarish"""
-        try:
+        """Muddati tugagan free linklar uchun foydalanuvchilarni kanaldan chiqarish (JobRunner orqali har soatda)"""
+        with bulk_priority():
             async with session_maker() as session:
                 # Muddati tugagan ishlatishlarni olish
                 expired_uses = await orm_get_expired_free_link_uses(session)
@@ -26,7 +25,7 @@ class FreeLinkScheduler:
                 for use in expired_uses:
                     try:
                         # Foydalanuvchini kanaldan chiqarish
-                        await bot.kick_chat_member(
+                        await bot.ban_chat_member(
                             chat_id=use.free_link.channel_id,
                             user_id=use.user_id
                         )
@@ -59,18 +58,3 @@ class FreeLinkScheduler:
                         logging.error(f"Error processing expired free link for user {use.user_id}: {user_error}")
                         # Mark as expired even if removal failed
                         await orm_mark_free_link_use_expired(session, use.id)
-                        
-        except Exception as e:
-            logging.error(f"Error in check_expired_free_links: {e}")
-    
-    @staticmethod
-    async def start_scheduler(bot: Bot):
-        """Scheduler ni boshlash"""
-        while True:
-            try:
-                await FreeLinkScheduler.check_expired_free_links(bot)
-                # Har 1 soatda tekshirish
-                await asyncio.sleep(3600)
-            except Exception as e:
-                logging.error(f"Error in scheduler: {e}")
-                await asyncio.sleep(300)  # Xato bo'lsa 5 daqiqada qaytadan
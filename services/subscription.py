@@ -4,15 +4,20 @@ from typing import Optional
 
 from aiogram import types, Bot
 from aiogram.exceptions import TelegramAPIError
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
+from common.admins import admin_registry
 from database.orm_query import (
     orm_get_active_subscription_plans,
     orm_create_subscription,
     orm_verify_payment,
     orm_get_user_active_subscriptions,
-    orm_expire_subscription
+    orm_expire_subscription,
+    orm_get_subscription_plan_by_id
 )
+from database.models import Subscription
 from kbds.inline import (
     get_subscription_plans_kb,
     get_payment_kb,
@@ -73,8 +78,6 @@ class SubscriptionService:
     ):
         """Выбор плана подписки"""
         try:
-            from database.orm_query import orm_get_subscription_plan_by_id
-            
             # Получаем план
             plan = await orm_get_subscription_plan_by_id(session, plan_id)
             
@@ -119,9 +122,6 @@ class SubscriptionService:
     ):
         """Обработка платежа"""
         try:
-            from database.orm_query import select, Subscription, SubscriptionPlan
-            from sqlalchemy.orm import joinedload
-            
             # Получаем подписку
             query = select(Subscription).where(
                 Subscription.id == subscription_id,
@@ -174,9 +174,6 @@ class SubscriptionService:
     ) -> bool:
         """Подтверждение платежа администратором"""
         try:
-            from database.orm_query import select, Subscription, SubscriptionPlan
-            from sqlalchemy.orm import joinedload
-            
             # Получаем подписку
             query = select(Subscription).where(
                 Subscription.id == subscription_id
@@ -269,7 +266,7 @@ class SubscriptionService:
     ):
         """Уведомление админов о новом платеже"""
         try:
-            admin_ids = bot.my_admins_list if hasattr(bot, 'my_admins_list') else []
+            admin_ids = list(admin_registry)
             
             text = f"💳 <b>Yangi to'lov!</b>\n\n"
             text += f"👤 Foydalanuvchi: {subscription.user_id}\n"
@@ -292,36 +289,30 @@ class SubscriptionService:
         session: AsyncSession,
         bot: Bot
     ):
-        """Проверка и отключение просроченных подписок"""
-        try:
-            from database.orm_query import select, Subscription
-            
-            # Получаем просроченные подписки
-            query = select(Subscription).where(
-                Subscription.is_active == True,
-                Subscription.expires_at <= datetime.now()
-            )
-            
-            result = await session.execute(query)
-            expired_subscriptions = result.scalars().all()
-            
-            for subscription in expired_subscriptions:
-                try:
-                    # Отключаем подписку
-                    await orm_expire_subscription(session, subscription.id)
-                    
-                    # Уведомляем пользователя
-                    await bot.send_message(
-                        subscription.user_id,
-                        f"⏰ Sizning premium obunangiz muddati tugadi.\n"
-                        f"Davom etish uchun yangi obuna sotib oling."
-                    )
-                    
-                    logging.info(f"Expired subscription {subscription.id} for user {subscription.user_id}")
-                    
-                except Exception as e:
-                    logging.error(f"Error expiring subscription {subscription.id}: {e}")
-                    continue
-            
-        except Exception as e:
-            logging.error(f"Error checking expired subscriptions: {e}")
+        """Проверка и отключение просроченных подписок (ошибка выборки уходит в JobRunner: backoff, /health)"""
+        # Получаем просроченные подписки
+        query = select(Subscription).where(
+            Subscription.is_active == True,
+            Subscription.expires_at <= datetime.now()
+        )
+        
+        result = await session.execute(query)
+        expired_subscriptions = result.scalars().all()
+        
+        for subscription in expired_subscriptions:
+            try:
+                # Отключаем подписку
+                await orm_expire_subscription(session, subscription.id)
+                
+                # Уведомляем пользователя
+                await bot.send_message(
+                    subscription.user_id,
+                    f"⏰ Sizning premium obunangiz muddati tugadi.\n"
+                    f"Davom etish uchun yangi obuna sotib oling."
+                )
+                
+                logging.info(f"Expired subscription {subscription.id} for user {subscription.user_id}")
+                
+            except Exception as e:
+                logging.error(f"Error expiring subscription {subscription.id}: {e}")
+                continue